@@ -0,0 +1,172 @@
+"""
+Benchmarks of the command-execution hot path, run against the mock hardware.
+
+Usage (from the repository root):
+    python -m benchmark.run_benchmarks [--output results.json] [--compare previous.json] [--number N]
+"""
+import argparse
+import itertools
+import json
+import platform
+import subprocess
+import time
+import timeit
+
+from mock import GPIO
+import mock.board
+from mock.HD44780 import HD44780
+from src.cleaning_robot import CleaningRobot
+from src.display_manager import DisplayManager
+from src.room import Room
+
+
+def create_robot(room: Room, charge_left: int = 100) -> CleaningRobot:
+    robot = CleaningRobot(room)
+    robot.initialize_robot()
+    robot.ibs.charge_left = charge_left
+    return robot
+
+
+# Each benchmark takes the number of operations to time, and returns a function
+# together with how many times to call it and how many operations a call performs
+
+def bench_forward(number: int):
+    robot = create_robot(Room(0, number + 1))
+    return lambda: robot.execute_command(robot.FORWARD), number, 1
+
+
+def bench_rotation(number: int):
+    robot = create_robot(Room(2, 2))
+    return lambda: robot.execute_command(robot.RIGHT), number, 1
+
+
+def bench_obstacle(number: int):
+    robot = create_robot(Room(2, 2))
+    GPIO.set_input(robot.INFRARED_PIN, GPIO.HIGH)
+    return lambda: robot.execute_command(robot.FORWARD), number, 1
+
+
+def bench_low_power(number: int):
+    robot = create_robot(Room(2, 2), charge_left=5)
+    return lambda: robot.execute_command(robot.FORWARD), number, 1
+
+
+def bench_route(number: int):
+    robot = create_robot(Room(0, number + 1))
+    route = robot.FORWARD * number
+    return lambda: robot.execute_commands(route), 1, number
+
+
+def bench_construction(number: int):
+    room = Room(2, 2)
+    return lambda: CleaningRobot(room), number, 1
+
+
+def bench_display_info(number: int):
+    display = DisplayManager(mock.board.I2C())
+    return lambda: display.update_display_info((1, 2, 'N'), (1, 3), 42), number, 1
+
+
+class CursorHD44780(HD44780):
+    """
+    A display whose driver can move the cursor, which the mock one cannot, so that the diff updates are used
+    """
+
+    def lcd_set_cursor(self, line: int, column: int):
+        pass
+
+    def lcd_write(self, text: str):
+        pass
+
+
+def bench_display_info_diff(number: int):
+    display = DisplayManager(mock.board.I2C())
+    display.display = CursorHD44780(mock.board.I2C())
+    display.diff_updates = True
+    positions = itertools.cycle([(0, y, 'N') for y in range(10)])
+    return lambda: display.update_display_info(next(positions), None, 42), number, 1
+
+
+def bench_position_valid(size: int):
+    def bench(number: int):
+        room = Room(size - 1, size - 1)
+        position = (size // 2, size // 2)
+        return lambda: room.is_position_valid(position), number, 1
+    return bench
+
+
+BENCHMARKS = {
+    "execute_command_forward": bench_forward,
+    "execute_command_rotation": bench_rotation,
+    "execute_command_obstacle": bench_obstacle,
+    "execute_command_low_power": bench_low_power,
+    "execute_commands_route_per_command": bench_route,
+    "cleaning_robot_construction": bench_construction,
+    "display_update_info": bench_display_info,
+    "display_update_info_diff": bench_display_info_diff,
+    "room_is_position_valid_10x10": bench_position_valid(10),
+    "room_is_position_valid_100x100": bench_position_valid(100),
+    "room_is_position_valid_1000x1000": bench_position_valid(1000),
+}
+
+
+def run_benchmark(create, number: int, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        GPIO.cleanup()
+        function, calls, operations = create(number)
+        timings.append(timeit.timeit(function, number=calls) / (calls * operations))
+    best = min(timings)
+    return {
+        "best_us": best * 1e6,
+        "mean_us": sum(timings) / len(timings) * 1e6,
+        "ops_per_sec": 1 / best,
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def get_version() -> str:
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="JSON file where the results are saved")
+    parser.add_argument("--compare", help="JSON file of a previous run to compare against")
+    parser.add_argument("--number", type=int, default=2000, help="calls per timing")
+    parser.add_argument("--repeat", type=int, default=5, help="timings per benchmark (the best one is kept)")
+    parser.add_argument("--filter", default="", help="only run the benchmarks whose name contains this string")
+    args = parser.parse_args()
+
+    previous = {}
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)["results"]
+
+    results = {}
+    for name, create in BENCHMARKS.items():
+        if args.filter not in name:
+            continue
+        results[name] = run_benchmark(create, args.number, args.repeat)
+        line = f"{name:40} {results[name]['best_us']:10.2f} us {results[name]['ops_per_sec']:14.0f} ops/s"
+        if name in previous:
+            line += f" {previous[name]['best_us'] / results[name]['best_us']:8.2f}x vs previous"
+        print(line)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "version": get_version(),
+                "timestamp": time.time(),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "results": results,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,12 @@
 Mock Library for RPi.GPIO
 """
 
+import contextlib
+import contextvars
 import logging
 import os
+import time
+from collections import deque
 
 logger = logging.getLogger(__name__)
 
@@ -49,12 +53,40 @@ SPI = 41
 UNKNOWN = -1
 VERSION = '0.7.0'
 
-_mode = 0
+MAX_CHANNEL = 63
+TRANSITION_HISTORY = 4096
+OUTPUT_HISTORY = 4096
 
-channel_config = {}
 
-#flags
-setModeDone = False
+class Context:
+    """
+    State of the simulated GPIO pins. Contexts are independent of each other, so that several
+    simulated robots can run in the same process (see use_context).
+    """
+    def __init__(self):
+        self.mode = 0
+        self.mode_done = False
+        self.channel_config = {}
+        # Level of every channel, both outputs and simulated inputs (see set_input)
+        self.pin_values = bytearray(MAX_CHANNEL + 1)
+        # Most recent level changes, as (time, channel, value), see get_transitions()
+        self.transitions = deque(maxlen=TRANSITION_HISTORY)
+        # Most recent output() calls, as (time, channels, values), see get_outputs()
+        self.outputs = deque(maxlen=OUTPUT_HISTORY)
+        self.event_detections = {}
+
+
+_context = contextvars.ContextVar("gpio_context", default=Context())
+
+
+class EventDetection:
+    def __init__(self, edge, bouncetime):
+        self.edge = edge
+        self.bouncetime = bouncetime
+        self.callbacks = []
+        self.detected = False
+        self.last_event_time = None
+
 
 class Channel:
     def __init__(self,channel, direction, initial=0,pull_up_down=PUD_OFF):
@@ -71,28 +103,25 @@ def setmode(mode):
     BOARD - Use Raspberry Pi board numbers
     BCM   - Use Broadcom GPIO 00..nn numbers
     """
-    # GPIO = GPIO()
-    if(mode == BCM):
-        setModeDone = True
-        _mode = mode
-
-    elif (mode == BOARD):
-        setModeDone = True
+    context = _context.get()
+    if mode in (BCM, BOARD):
+        context.mode_done = True
+        context.mode = mode
     else:
-        setModeDone = False
+        context.mode_done = False
 
 def getmode():
     """
     Get numbering mode used for channel numbers.
     Returns BOARD, BCM or None
     """
-    return _mode
+    return _context.get().mode
 
 def setwarnings(flag):
     """
     Enable or disable warning messages
     """
-    logger.info("Set warnings as {}".format(flag))
+    logger.info("Set warnings as %s", flag)
 
 def setup(channel, direction, initial=0,pull_up_down=PUD_OFF):
     """
@@ -103,25 +132,48 @@ def setup(channel, direction, initial=0,pull_up_down=PUD_OFF):
     [initial]      - Initial value for an output channel
 
     """
-    logger.info("Setup channel : {} as {} with initial :{} and pull_up_down {}".format(channel,direction,initial,pull_up_down))
-    global channel_config
-    channel_config[channel] = Channel(channel, direction, initial, pull_up_down)
+    logger.info("Setup channel : %s as %s with initial :%s and pull_up_down %s", channel,direction,initial,pull_up_down)
+    context = _context.get()
+    for c in _as_list(channel):
+        context.channel_config[c] = Channel(c, direction, initial, pull_up_down)
+        if direction == OUT:
+            context.pin_values[c] = HIGH if initial == HIGH else LOW
 
 def output(channel, value):
     """
     Output to a GPIO channel or list of channels
     channel - either board pin number or BCM number depending on which mode is set.
-    value   - 0/1 or False/True or LOW/HIGH
+    value   - 0/1 or False/True or LOW/HIGH, or a list/tuple of values, one per channel
 
     """
-    logger.info("Output channel : {} with value : {}".format(channel, value))
+    logger.info("Output channel : %s with value : %s", channel, value)
+    now = time.monotonic()
+    if not isinstance(channel, (list, tuple)):
+        value = HIGH if value else LOW
+        _context.get().outputs.append((now, (channel,), (value,)))
+        _set_level(channel, value, now)
+        return
+
+    values = value if isinstance(value, (list, tuple)) else [value] * len(channel)
+    if len(values) != len(channel):
+        raise RuntimeError("Number of channels != number of values")
+    values = tuple([HIGH if v else LOW for v in values])
+    # The channels of a list are written at once: their changes share the same time
+    context = _context.get()
+    context.outputs.append((now, tuple(channel), values))
+    pin_values = context.pin_values
+    for c, v in zip(channel, values):
+        if pin_values[c] != v:
+            pin_values[c] = v
+            context.transitions.append((now, c, v))
 
 def input(channel):
     """
     Input from a GPIO channel.  Returns HIGH=1=True or LOW=0=False
     channel - either board pin number or BCM number depending on which mode is set.
     """
-    logger.info("Reading from channel {}".format(channel))
+    logger.info("Reading from channel %s", channel)
+    return _context.get().pin_values[channel]
 
 def wait_for_edge(channel,edge,bouncetime,timeout):
     """
@@ -131,10 +183,10 @@ def wait_for_edge(channel,edge,bouncetime,timeout):
     [bouncetime] - time allowed between calls to allow for switchbounce
     [timeout]    - timeout in ms
     """
-    logger.info("Waiting for edge : {} on channel : {} with bounce time : {} and Timeout :{}".format(edge,channel,bouncetime,timeout))
+    logger.info("Waiting for edge : %s on channel : %s with bounce time : %s and Timeout :%s", edge,channel,bouncetime,timeout)
 
 
-def add_event_detect(channel,edge,callback,bouncetime):
+def add_event_detect(channel,edge,callback=None,bouncetime=None):
     """
     Enable edge detection events for a particular GPIO channel.
     channel      - either board pin number or BCM number depending on which mode is set.
@@ -142,14 +194,22 @@ def add_event_detect(channel,edge,callback,bouncetime):
     [callback]   - A callback function for the event (optional)
     [bouncetime] - Switch bounce timeout in ms for callback
     """
-    logger.info("Event detect added for edge : {} on channel : {} with bounce time : {} and callback {}".format(edge,channel,bouncetime,callback))
+    logger.info("Event detect added for edge : %s on channel : %s with bounce time : %s and callback %s", edge,channel,bouncetime,callback)
+    detection = _context.get().event_detections[channel] = EventDetection(edge, bouncetime)
+    if callback is not None:
+        detection.callbacks.append(callback)
 
 def event_detected(channel):
     """
     Returns True if an edge has occurred on a given GPIO.  You need to enable edge detection using add_event_detect() first.
     channel - either board pin number or BCM number depending on which mode is set.
     """
-    logger.info("Waiting for even detection on channel :{}".format(channel))
+    logger.info("Waiting for even detection on channel :%s", channel)
+    detection = _context.get().event_detections.get(channel)
+    if detection is None:
+        return False
+    detected, detection.detected = detection.detected, False
+    return detected
 
 def add_event_callback(channel,callback):
     """
@@ -157,21 +217,23 @@ def add_event_callback(channel,callback):
     channel      - either board pin number or BCM number depending on which mode is set.
     callback     - a callback function
     """
-    logger.info("Event callback : {} added for channel : {}".format(callback,channel))
+    logger.info("Event callback : %s added for channel : %s", callback,channel)
+    _context.get().event_detections[channel].callbacks.append(callback)
 
 def remove_event_detect(channel):
     """
     Remove edge detection for a particular GPIO channel
     channel - either board pin number or BCM number depending on which mode is set.
     """
-    logger.info("Event detect removed for channel : {}".format(channel))
+    logger.info("Event detect removed for channel : %s", channel)
+    _context.get().event_detections.pop(channel, None)
 
 def gpio_function(channel):
     """
     Return the current GPIO function (IN, OUT, PWM, SERIAL, I2C, SPI)
     channel - either board pin number or BCM number depending on which mode is set.
     """
-    logger.info("GPIO function of channel : {} is {}".format(channel,channel_config[channel].direction))
+    logger.info("GPIO function of channel : %s is %s", channel,_context.get().channel_config[channel].direction)
 
 
 class PWM:
@@ -183,9 +245,8 @@ class PWM:
         self.channel = channel
         self.frequency = frequency
         self.dutycycle = 0
-        global channel_config
-        channel_config[channel] = Channel(channel,PWM,)
-        logger.info("Initialized PWM for channel : {} at frequency : {}".format(channel,frequency))
+        _context.get().channel_config[channel] = Channel(channel,PWM,)
+        logger.info("Initialized PWM for channel : %s at frequency : %s", channel,frequency)
 
     # where dc is the duty cycle (0.0 <= dc <= 100.0)
     def start(self, dutycycle):
@@ -194,7 +255,7 @@ class PWM:
         dutycycle - the duty cycle (0.0 to 100.0)
         """
         self.dutycycle = dutycycle
-        logger.info("Start pwm on channel : {} with duty cycle : {}".format(self.channel,dutycycle))
+        logger.info("Start pwm on channel : %s with duty cycle : %s", self.channel,dutycycle)
 
     # where freq is the new frequency in Hz
     def ChangeFrequency(self, frequency):
@@ -202,7 +263,7 @@ class PWM:
         Change the frequency
         frequency - frequency in Hz (freq > 1.0)
         """
-        logger.info("Freqency changed for channel : {} from : {} -> to : {}".format(self.channel,self.frequency,frequency))
+        logger.info("Freqency changed for channel : %s from : %s -> to : %s", self.channel,self.frequency,frequency)
         self.frequency = frequency
 
     # where 0.0 <= dc <= 100.0
@@ -211,12 +272,12 @@ class PWM:
         Change the duty cycle
         dutycycle - between 0.0 and 100.0
         """
+        logger.info("Dutycycle changed for channel : %s from : %s -> to : %s", self.channel,self.dutycycle,dutycycle)
         self.dutycycle = dutycycle
-        logger.info("Dutycycle changed for channel : {} from : {} -> to : {}".format(self.channel,self.dutycycle,dutycycle))
 
     # stop PWM generation
     def stop(self):
-        logger.info("Stop PWM on channel : {} with duty cycle : {}".format(self.channel,self.dutycycle))
+        logger.info("Stop PWM on channel : %s with duty cycle : %s", self.channel,self.dutycycle)
 
 
 def cleanup(channel=None):
@@ -224,7 +285,97 @@ def cleanup(channel=None):
     Clean up by resetting all GPIO channels that have been used by this program to INPUT with no pullup/pulldown and no event detection
     [channel] - individual channel or list/tuple of channels to clean up.  Default - clean every channel that has been used.
     """
+    context = _context.get()
     if channel is not None:
-        logger.info("Cleaning up channel : {}".format(channel))
+        logger.info("Cleaning up channel : %s", channel)
+        for c in _as_list(channel):
+            context.pin_values[c] = LOW
+            context.event_detections.pop(c, None)
     else:
-        logger.info("Cleaning up all channels")
\ No newline at end of file
+        logger.info("Cleaning up all channels")
+        context.pin_values[:] = bytes(len(context.pin_values))
+        context.transitions.clear()
+        context.outputs.clear()
+        context.event_detections.clear()
+
+
+#MOCK ONLY Functions
+def set_input(channel, value):
+    """
+    Simulates an external signal on an input channel. If the level changes and edge detection is enabled
+    on the channel, the event is detected and the callbacks are run (in the calling thread), unless the
+    edge arrives within the bounce time of the previous one.
+    channel - either board pin number or BCM number depending on which mode is set.
+    value   - 0/1 or False/True or LOW/HIGH
+    """
+    logger.info("Simulated input on channel : %s with value : %s", channel, value)
+    value = HIGH if value else LOW
+    changed = _set_level(channel, value)
+
+    detection = _context.get().event_detections.get(channel)
+    if detection is None or not changed:
+        return
+    edge = RISING if value == HIGH else FALLING
+    if detection.edge not in (edge, BOTH):
+        return
+
+    now = time.monotonic()
+    if detection.bouncetime and detection.last_event_time is not None \
+            and (now - detection.last_event_time) * 1000 < detection.bouncetime:
+        return
+    detection.last_event_time = now
+    detection.detected = True
+    for callback in list(detection.callbacks):
+        callback(channel)
+
+def get_outputs():
+    """
+    Returns the most recent output() calls, oldest first, as (time, channels, values) tuples.
+    A call writing a list of channels is a single entry.
+    """
+    return list(_context.get().outputs)
+
+def get_transitions(channel=None):
+    """
+    Returns the most recent level changes, oldest first, as (time, channel, value) tuples
+    [channel] - only return the changes of this channel
+    """
+    transitions = _context.get().transitions
+    if channel is None:
+        return list(transitions)
+    return [t for t in transitions if t[1] == channel]
+
+
+def get_context():
+    """
+    Returns the context in use
+    """
+    return _context.get()
+
+
+@contextlib.contextmanager
+def use_context(context=None):
+    """
+    Uses a context for all the GPIO calls of the with block (in the current thread or task)
+    [context] - the context to use; a new one by default
+    """
+    token = _context.set(context if context is not None else Context())
+    try:
+        yield _context.get()
+    finally:
+        _context.reset(token)
+
+
+def _set_level(channel, value, now=None):
+    # Returns True if the level of the channel changed
+    context = _context.get()
+    value = HIGH if value else LOW
+    if context.pin_values[channel] == value:
+        return False
+    context.pin_values[channel] = value
+    context.transitions.append((time.monotonic() if now is None else now, channel, value))
+    return True
+
+
+def _as_list(channel):
+    return channel if isinstance(channel, (list, tuple)) else [channel]
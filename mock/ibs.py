@@ -3,11 +3,11 @@ from mock.board import I2C
 class IBS:
 
     def __init__(self, i2c: I2C, address: int = 0x77):
-        pass
+        self.charge_left = 100  # Simulated charge left
 
     def get_charge_left(self) -> int:
         """
         Returns the charge left.
         :return: the charge left (i.e., a percentage value from 0 to 100)
         """
-        pass
+        return self.charge_left
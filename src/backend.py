@@ -0,0 +1,28 @@
+import importlib.util
+import os
+
+MOCK = "mock"
+HARDWARE = "hardware"
+
+
+def use_hardware(*modules: str) -> bool:
+    """
+    Chooses between the libraries of the actual hardware and the mock ones, without importing them.
+    The CLEANING_ROBOT_BACKEND environment variable forces the choice ("mock" or "hardware");
+    otherwise the actual hardware is used if all its libraries are installed.
+    :param modules: the names of the libraries of the actual hardware (e.g., "RPi.GPIO")
+    """
+    backend = os.getenv("CLEANING_ROBOT_BACKEND")
+    if backend is not None:
+        if backend not in (MOCK, HARDWARE):
+            raise ValueError(f"Unknown backend {backend!r}, expected {MOCK!r} or {HARDWARE!r}")
+        return backend == HARDWARE
+    return all(_is_installed(module) for module in modules)
+
+
+def _is_installed(module: str) -> bool:
+    try:
+        return importlib.util.find_spec(module) is not None
+    except ModuleNotFoundError:
+        # The parent package is missing
+        return False
@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import deque
+
+
+class BatteryMonitor:
+    """
+    Rate-limited access to the IBS. Readings are cached for a configurable time, can be taken
+    periodically by a background sampler, and are used to estimate the discharge rate of the battery.
+    """
+
+    CACHE_TTL = 0.5  # Seconds
+    SAMPLE_INTERVAL = 5  # Seconds
+    LOW_POWER_THRESHOLD = 10  # Percentage
+
+    def __init__(self, ibs, ttl: float = CACHE_TTL, sample_interval: float = SAMPLE_INTERVAL, history: int = 32, clock=time.monotonic):
+        """
+        :param ibs: the IBS to read the charge left from
+        :param ttl: the time during which a reading is reused (0 to read the IBS every time)
+        :param sample_interval: the time between two readings of the background sampler
+        :param history: the number of readings used to estimate the discharge rate
+        :param clock: the function returning the current time in seconds
+        """
+        self.ibs = ibs
+        self.ttl = ttl
+        self.sample_interval = sample_interval
+        self.clock = clock
+        self.samples = deque(maxlen=history)
+        self.__lock = threading.Lock()
+        self.__ibs_lock = threading.Lock()  # The sampler and the callers never use the bus at once
+        self.__sampler = None
+        self.__stop_sampling = threading.Event()
+
+    def get_charge_left(self) -> int:
+        """
+        Returns the charge left, reading the IBS only if the last reading is older than the TTL
+        """
+        with self.__lock:
+            if self.samples and self.clock() - self.samples[-1][0] < self.ttl:
+                return self.samples[-1][1]
+        return self.read()
+
+    def read(self) -> int:
+        """
+        Reads the charge left from the IBS, bypassing the cache
+        """
+        with self.__ibs_lock:
+            charge_left = self.ibs.get_charge_left()
+        with self.__lock:
+            self.samples.append((self.clock(), charge_left))
+        return charge_left
+
+    def start(self) -> None:
+        """
+        Starts reading the IBS every sample_interval seconds in a background thread
+        """
+        if self.__sampler is not None:
+            return
+        self.__stop_sampling.clear()
+        self.__sampler = threading.Thread(target=self.__sample, name="battery-sampler", daemon=True)
+        self.__sampler.start()
+
+    def stop(self) -> None:
+        if self.__sampler is None:
+            return
+        self.__stop_sampling.set()
+        self.__sampler.join()
+        self.__sampler = None
+
+    def get_discharge_rate(self) -> float | None:
+        """
+        Estimates the discharge rate with a least-squares fit of the recent readings
+        :return: the charge lost per second, or None if there are not enough readings
+        """
+        with self.__lock:
+            samples = list(self.samples)
+        if len(samples) < 2:
+            return None
+
+        mean_t = sum(t for t, _ in samples) / len(samples)
+        mean_c = sum(c for _, c in samples) / len(samples)
+        variance = sum((t - mean_t) ** 2 for t, _ in samples)
+        if variance == 0:
+            return None
+        covariance = sum((t - mean_t) * (c - mean_c) for t, c in samples)
+        return -covariance / variance
+
+    def predict_time_to_low_power(self, threshold: int = LOW_POWER_THRESHOLD) -> float | None:
+        """
+        Predicts when the charge left will reach the low power threshold
+        :return: the seconds left (0 if already reached), or None if the battery is not discharging
+        """
+        if not self.samples:
+            return None
+        charge_left = self.samples[-1][1]
+        if charge_left <= threshold:
+            return 0
+        rate = self.get_discharge_rate()
+        if rate is None or rate <= 0:
+            return None
+        return (charge_left - threshold) / rate
+
+    def will_reach_low_power_within(self, seconds: float, threshold: int = LOW_POWER_THRESHOLD) -> bool:
+        """
+        Tells whether a task lasting the given time (e.g., a route) would be interrupted by the low power mode
+        """
+        if seconds <= 0:
+            # Only the last reading matters, which spares the estimate of the rate
+            return bool(self.samples) and self.samples[-1][1] <= threshold
+        time_left = self.predict_time_to_low_power(threshold)
+        return time_left is not None and time_left <= seconds
+
+    def __sample(self) -> None:
+        while not self.__stop_sampling.wait(self.sample_interval):
+            self.read()
@@ -1,16 +1,25 @@
 import time
+from functools import cached_property
+from typing import Iterable
 
+from src.backend import use_hardware
+from src.battery_monitor import BatteryMonitor
+from src.command_journal import CommandJournal, MOVED, OBSTACLE, LOW_POWER
 from src.display_manager import DisplayManager
+from src.motor_driver import MotorDriver
+from src.obstacle_sensor import ObstacleSensor
+from src.robot_state import RobotState, HEADINGS, FORWARD_DELTA
 from src.room import Room
+from src.telemetry import TelemetryRecord, NO_OBSTACLE
 
-DEPLOYMENT = False  # This variable is to understand whether you are deploying on the actual hardware
+# This variable is to understand whether you are deploying on the actual hardware
+DEPLOYMENT = use_hardware("RPi.GPIO", "board", "IBS")
 
-try:
+if DEPLOYMENT:
     import RPi.GPIO as GPIO
     import board
     import IBS
-    DEPLOYMENT = True
-except:
+else:
     import mock.GPIO as GPIO
     import mock.board as board
     import mock.ibs as IBS
@@ -38,54 +47,162 @@ class CleaningRobot:
     S = 'S'
     E = 'E'
     W = 'W'
+    HEADINGS = HEADINGS  # Clockwise order
+    STEPS = FORWARD_DELTA  # Displacement of a forward movement
 
     LEFT = 'l'
     RIGHT = 'r'
-    FORWARD = 'f'
+    FORWARD = 'f'  # Followed by a number of cells (e.g., "f5"), moves forward keeping the wheel motor running
+    MAX_RUN_DIGITS = 9  # Digits of the number of cells of a run, more than any room is wide
+    BATTERY_READ_MOTIONS = 3  # Motions during which a battery reading is reused on the actual hardware
 
     def __init__(self, room: Room):
+        self.gpio = GPIO
         GPIO.setmode(GPIO.BOARD)
         GPIO.setwarnings(False)
-        GPIO.setup(self.INFRARED_PIN, GPIO.IN)
-        GPIO.setup(self.RECHARGE_LED_PIN, GPIO.OUT)
-        GPIO.setup(self.CLEANING_SYSTEM_PIN, GPIO.OUT)
+        GPIO.setup([self.RECHARGE_LED_PIN, self.CLEANING_SYSTEM_PIN], GPIO.OUT)
 
-        GPIO.setup(self.PWMA, GPIO.OUT)
-        GPIO.setup(self.AIN2, GPIO.OUT)
-        GPIO.setup(self.AIN1, GPIO.OUT)
-        GPIO.setup(self.PWMB, GPIO.OUT)
-        GPIO.setup(self.BIN2, GPIO.OUT)
-        GPIO.setup(self.BIN1, GPIO.OUT)
-        GPIO.setup(self.STBY, GPIO.OUT)
-
-        ic2 = board.I2C()
-        self.ibs = IBS.IBS(ic2)
-
-        self.pos_x = None
-        self.pos_y = None
-        self.heading = None
+        self.__state = RobotState(None, None, None)
+        self.__status = None  # Cached robot_status(), rebuilt when the state changes
 
         self.recharge_led_on = False
         self.cleaning_system_on = False
 
         self.room = room
 
-        self.display_manager = DisplayManager(ic2)
+        # Optional journal of the executed commands, see recover_robot()
+        self.journal = None
+
+        # Optional telemetry generator, which is sent a TelemetryRecord for every step (see telemetry_writer)
+        self.telemetry = None
+        self.__step_started = 0.0
+
+        # Whether the consecutive forward moves of a route keep the wheel motor running, which
+        # saves a stop and a start per cell on the actual hardware
+        self.run_length_moves = DEPLOYMENT
+
+    # The subsystems below are opened on first use, since many robots (e.g., in simulations) never use some of them
+
+    @cached_property
+    def i2c(self):
+        return board.I2C()
+
+    @cached_property
+    def ibs(self):
+        return IBS.IBS(self.i2c)
+
+    @cached_property
+    def battery(self) -> BatteryMonitor:
+        # Readings are cached only on the actual hardware, where each motion takes time, and sampled
+        # in the background there so that the discharge rate is known before the robot moves
+        if not DEPLOYMENT:
+            return BatteryMonitor(self.ibs, ttl=0)
+        battery = BatteryMonitor(self.ibs, ttl=self.BATTERY_READ_MOTIONS * MotorDriver.MOTION_TIME)
+        battery.start()
+        return battery
+
+    @cached_property
+    def display_manager(self) -> DisplayManager:
+        # On the actual hardware, the display is written at most a few times per second, and only the
+        # changed characters if its driver can move the cursor
+        return DisplayManager(self.i2c, diff_updates=DEPLOYMENT,
+                              max_refresh_rate=DisplayManager.REFRESH_RATE if DEPLOYMENT else None)
+
+    @cached_property
+    def motor_driver(self) -> MotorDriver:
+        wheel_pins = (self.AIN1, self.AIN2, self.PWMA)
+        rotation_pins = (self.BIN1, self.BIN2, self.PWMB)
+        self.gpio.setup([*wheel_pins, *rotation_pins, self.STBY], GPIO.OUT)
+        # Sleep only if you are deploying on the actual hardware
+        return MotorDriver(self.gpio, wheel_pins, rotation_pins, self.STBY, MotorDriver.MOTION_TIME if DEPLOYMENT else 0)
+
+    @cached_property
+    def obstacle_sensor(self) -> ObstacleSensor:
+        self.gpio.setup(self.INFRARED_PIN, GPIO.IN)
+        sensor = ObstacleSensor(self.gpio, self.INFRARED_PIN, ObstacleSensor.BOUNCE_TIME if DEPLOYMENT else 0)
+        # Stop the wheels as soon as an obstacle appears in front of the robot
+        sensor.add_listener(self.motor_driver.abort_forward_motion)
+        return sensor
 
     def initialize_robot(self) -> None:
-        self.pos_x = 0
-        self.pos_y = 0
-        self.heading = 'N'
+        self.state = RobotState(0, 0, self.N)
+        self.__record_position()
+
+    def recover_robot(self, journal: CommandJournal) -> None:
+        """
+        Restores the state of the robot after a restart, instead of initialize_robot(), from the
+        last snapshot in the journal and the commands journaled after it. The commands are replayed
+        without driving the hardware. The executed commands are journaled from now on.
+        :param journal: the journal of the robot
+        """
+        snapshot = journal.load_snapshot()
+        if snapshot is None:
+            self.initialize_robot()
+        else:
+            if (snapshot.max_x, snapshot.max_y) != (self.room.max_x, self.room.max_y):
+                raise CleaningRobotError
+            self.room.grid[:] = snapshot.grid
+            self.state = snapshot.state
+            self.cleaning_system_on = snapshot.cleaning
+
+        for entry in journal.replay():
+            self.cleaning_system_on = entry.cleaning
+            if entry.outcome == OBSTACLE:
+                self.__record_obstacle()
+            elif entry.outcome == LOW_POWER:
+                self.recharge_led_on = True
+            elif entry.command == self.FORWARD:
+                self.__compute_new_position_on_forward()
+            else:
+                self.__compute_new_heading_on_rotation(entry.command)
+        self.journal = journal
+
+    @property
+    def state(self) -> RobotState:
+        return self.__state
+
+    @state.setter
+    def state(self, state: RobotState) -> None:
+        self.__state = state
+        self.__status = None
+
+    @property
+    def pos_x(self) -> int:
+        return self.__state.x
+
+    @pos_x.setter
+    def pos_x(self, x: int) -> None:
+        self.state = self.__state._replace(x=x)
+
+    @property
+    def pos_y(self) -> int:
+        return self.__state.y
+
+    @pos_y.setter
+    def pos_y(self, y: int) -> None:
+        self.state = self.__state._replace(y=y)
+
+    @property
+    def heading(self) -> str:
+        return self.__state.heading
+
+    @heading.setter
+    def heading(self, heading: str) -> None:
+        self.state = self.__state._replace(heading=heading)
 
     def robot_status(self) -> str:
-        return f"({self.pos_x},{self.pos_y},{self.heading})"
+        if self.__status is None:
+            self.__status = self.__state.status()
+        return self.__status
 
     def execute_command(self, command: str) -> str:
-        charge_left = self.ibs.get_charge_left()
+        self.__step_started = time.perf_counter()
+        charge_left = self.__read_battery(1)[0]
 
         if charge_left <= 10:
             self.__enter_low_power_mode()
             self.display_manager.update_display_low_power()
+            self.__record_step(self.FORWARD if self.__is_forward_run(command) else command, LOW_POWER, charge_left)
             return f"!{self.robot_status()}"
 
         match command:
@@ -93,55 +210,172 @@ class CleaningRobot:
                 if not self.room.is_position_valid(self.__get_future_position_after_forward_movement()):
                     raise CleaningRobotError
 
-                if self.obstacle_found():
-                    self.__play_buzzer_tone()
-                    self.__update_display_info(with_obstacle=True)
-                    return f"{self.robot_status()},{self.__get_obstacle_position_str()}"
+                if self.obstacle_found() or not self.__move(self.FORWARD):
+                    return self.__handle_obstacle(command, charge_left)
+
+                self.__record_step(command, MOVED, charge_left)
+                self.__update_display_info(with_obstacle=False, charge_left=charge_left)
+            case self.LEFT | self.RIGHT:
+                self.__move(command)
+                self.__record_step(command, MOVED, charge_left)
+                self.__update_display_info(with_obstacle=False, charge_left=charge_left)
+            case _ if self.__is_forward_run(command):
+                cells = int(command[1:])
+                dx, dy = self.STEPS[self.heading]
+                if not self.room.is_position_valid((self.pos_x + dx * cells, self.pos_y + dy * cells)):
+                    raise CleaningRobotError
+
+                if not self.__move_forward_cells(cells, charge_left):
+                    return self.__handle_obstacle(self.FORWARD, charge_left)
 
-                self.activate_wheel_motor()
-                self.__compute_new_position_on_forward()
-                self.__update_display_info(with_obstacle=False)
-            case self.LEFT:
-                self.activate_rotation_motor(self.LEFT)
-                self.__compute_new_heading_on_rotation(self.LEFT)
-                self.__update_display_info(with_obstacle=False)
-            case self.RIGHT:
-                self.activate_rotation_motor(self.RIGHT)
-                self.__compute_new_heading_on_rotation(self.RIGHT)
-                self.__update_display_info(with_obstacle=False)
+                self.__update_display_info(with_obstacle=False, charge_left=charge_left)
             case _:
                 raise CleaningRobotError
 
-    def __compute_new_position_on_forward(self) -> None:
-        self.pos_x, self.pos_y = self.__get_future_position_after_forward_movement()
+    def execute_commands(self, commands: Iterable[str], battery_check_interval: int = 10) -> list[str]:
+        """
+        Executes a whole route sent by the RMS. The route is validated before the robot
+        moves, and the execution stops at the first obstacle or when the battery is low.
+        :param commands: a route string (e.g., "ffrf") or an iterable of commands
+        :param battery_check_interval: number of commands executed between two battery reads
+        :return: the status of the robot after each executed command
+        """
+        if battery_check_interval < 1:
+            raise CleaningRobotError
+
+        commands = list(commands)
+        self.__validate_route(commands)
+
+        results = []
+        charge_left = None
+        self.__step_started = time.perf_counter()
+        i = 0
+        next_check = 0  # Index of the command before which the battery is read
+        while i < len(commands):
+            command = commands[i]
+            if i == next_check:
+                charge_left, low_power_ahead = self.__read_battery(battery_check_interval)
+                # Close to the low power mode, the battery is read before every command
+                next_check = i + (1 if low_power_ahead else battery_check_interval)
+                if charge_left <= 10:
+                    self.__enter_low_power_mode()
+                    self.display_manager.update_display_low_power()
+                    self.__record_step(command, LOW_POWER, charge_left)
+                    results.append(f"!{self.robot_status()}")
+                    return results
+
+            if command == self.FORWARD and self.run_length_moves:
+                # The consecutive forward moves, up to the next battery read, are a single motion
+                cells = 1
+                while i + cells < min(len(commands), next_check) and commands[i + cells] == self.FORWARD:
+                    cells += 1
+                moved = self.__move_forward_cells(cells, charge_left, results)
+            else:
+                cells = 1
+                moved = not (command == self.FORWARD and self.obstacle_found()) and self.__move(command)
+                if moved:
+                    self.__record_step(command, MOVED, charge_left)
+                    results.append(self.robot_status())
+
+            if not moved:
+                results.append(self.__handle_obstacle(command, charge_left))
+                return results
+            i += cells
+
+        if results:
+            # The display is refreshed once, at the end of the route
+            self.__update_display_info(with_obstacle=False, charge_left=charge_left)
+        return results
+
+    def __read_battery(self, motions: int) -> tuple[int, bool]:
+        # Returns the charge left, and whether the battery is predicted to reach the low power mode
+        # within the motions: a cached reading is then too old, and the IBS is read again
+        low_power_ahead = self.battery.will_reach_low_power_within(motions * self.motor_driver.motion_time)
+        charge_left = self.battery.read() if low_power_ahead else self.battery.get_charge_left()
+        return charge_left, low_power_ahead
+
+    def __validate_route(self, commands: list[str]) -> None:
+        state = self.state
+        for command in commands:
+            match command:
+                case self.FORWARD:
+                    state = state.moved_forward()
+                    if not self.room.is_position_valid((state.x, state.y)):
+                        raise CleaningRobotError
+                case self.LEFT | self.RIGHT:
+                    state = state.turned(command)
+                case _:
+                    raise CleaningRobotError
 
-    def __compute_new_heading_on_rotation(self, direction: str) -> None:
-        headings = (self.N, self.E, self.S, self.W)
-        new_heading = None
+    def __move(self, command: str) -> bool:
+        # Returns False if the robot stopped because an obstacle appeared while moving forward
+        if command == self.FORWARD:
+            self.activate_wheel_motor()
+            if self.motor_driver.aborted:
+                return False
+            self.__compute_new_position_on_forward()
+        else:
+            self.activate_rotation_motor(command)
+            self.__compute_new_heading_on_rotation(command)
+        return True
+
+    def __move_forward_cells(self, cells: int, charge_left: int, results: list[str] = None) -> bool:
+        # Returns False if the robot stopped before the last cell because of an obstacle
+        moved = self.activate_wheel_motor_for(cells)
+        # The cells of a run share its motion time
+        duration = (time.perf_counter() - self.__step_started) / moved if moved else None
+        for _ in range(moved):
+            self.__compute_new_position_on_forward()
+            self.__record_step(self.FORWARD, MOVED, charge_left, duration)
+            if results is not None:
+                results.append(self.robot_status())
+        return moved == cells
+
+    def __is_forward_run(self, command: str) -> bool:
+        cells = command[1:]
+        return (command[:1] == self.FORWARD and len(cells) <= self.MAX_RUN_DIGITS and cells.isascii()
+                and cells.isdigit() and int(cells) > 0)
+
+    def __handle_obstacle(self, command: str, charge_left: int) -> str:
+        self.__record_obstacle()
+        self.__record_step(command, OBSTACLE, charge_left)
+        self.__play_buzzer_tone()
+        self.__update_display_info(with_obstacle=True, charge_left=charge_left)
+        return f"{self.robot_status()},{self.__get_obstacle_position_str()}"
+
+    def __record_step(self, command: str, outcome: int, charge_left: int, duration: float = None) -> None:
+        if self.journal is not None:
+            self.journal.append(command, outcome, self.cleaning_system_on)
+            if self.journal.needs_snapshot:
+                self.journal.write_snapshot(self.state, self.cleaning_system_on, self.room.max_x, self.room.max_y, self.room.grid)
+
+        if self.telemetry is not None:
+            now = time.perf_counter()
+            if duration is None:
+                duration = now - self.__step_started
+            self.__step_started = now
+            obstacle = self.__get_obstacle_position() if outcome == OBSTACLE else NO_OBSTACLE
+            self.telemetry.send(TelemetryRecord(time.time(), self.pos_x, self.pos_y, self.heading, command,
+                                                outcome, charge_left, *obstacle, duration))
 
-        match direction:
-            case self.LEFT:
-                new_heading = (headings.index(self.heading) - 1) % 4
-            case self.RIGHT:
-                new_heading = (headings.index(self.heading) + 1) % 4
+    def __compute_new_position_on_forward(self) -> None:
+        self.state = self.state.moved_forward()
+        self.__record_position()
 
-        self.heading = headings[new_heading]
+    def __record_position(self) -> None:
+        position = (self.pos_x, self.pos_y)
+        self.room.mark(position, Room.VISITED)
+        if self.cleaning_system_on:
+            self.room.mark(position, Room.CLEANED)
 
-    def __get_future_position_after_forward_movement(self) -> tuple[int, int]:
-        x = self.pos_x
-        y = self.pos_y
+    def __record_obstacle(self) -> None:
+        self.room.mark(self.__get_obstacle_position(), Room.OBSTACLE)
 
-        match self.heading:
-            case self.N:
-                y += 1
-            case self.S:
-                y -= 1
-            case self.E:
-                x += 1
-            case self.W:
-                x -= 1
+    def __compute_new_heading_on_rotation(self, direction: str) -> None:
+        self.state = self.state.turned(direction)
 
-        return x, y
+    def __get_future_position_after_forward_movement(self) -> tuple[int, int]:
+        return self.state.forward_position()
 
     def __get_obstacle_position(self) -> tuple[int, int]:
         # The position of the obstacle is the position that the robot
@@ -153,83 +387,64 @@ class CleaningRobot:
         return f"({x},{y})"
 
     def obstacle_found(self) -> bool:
-        return GPIO.input(self.INFRARED_PIN)
+        return self.obstacle_sensor.obstacle_detected
 
     def manage_cleaning_system(self) -> None:
-        if self.ibs.get_charge_left() <= 10:
+        if self.battery.get_charge_left() <= 10:
             self.__enter_low_power_mode()
         else:
             self.__enter_cleaning_mode()
 
     def __enter_cleaning_mode(self) -> None:
-        GPIO.output(self.CLEANING_SYSTEM_PIN, GPIO.HIGH)
-        GPIO.output(self.RECHARGE_LED_PIN, GPIO.LOW)
+        self.gpio.output(self.CLEANING_SYSTEM_PIN, GPIO.HIGH)
+        self.gpio.output(self.RECHARGE_LED_PIN, GPIO.LOW)
         self.cleaning_system_on = True
         self.recharge_led_on = False
 
     def __enter_low_power_mode(self) -> None:
-        GPIO.output(self.CLEANING_SYSTEM_PIN, GPIO.LOW)
-        GPIO.output(self.RECHARGE_LED_PIN, GPIO.HIGH)
+        self.gpio.output(self.CLEANING_SYSTEM_PIN, GPIO.LOW)
+        self.gpio.output(self.RECHARGE_LED_PIN, GPIO.HIGH)
         self.cleaning_system_on = False
         self.recharge_led_on = True
 
     def __play_buzzer_tone(self) -> None:
-        GPIO.output(self.BUZZER_PIN, GPIO.HIGH)
-        if DEPLOYMENT:
-            time.sleep(0.2)
-        GPIO.output(self.BUZZER_PIN, GPIO.LOW)
+        self.motor_driver.run(self.motor_driver.pulse(self.BUZZER_PIN, 0.2 if DEPLOYMENT else 0))
 
-    def __update_display_info(self, with_obstacle: bool):
+    def __update_display_info(self, with_obstacle: bool, charge_left: int):
         if with_obstacle:
             obstacle_position = self.__get_obstacle_position()
         else:
             obstacle_position = None
-        self.display_manager.update_display_info((self.pos_x, self.pos_y, self.heading), obstacle_position, self.ibs.get_charge_left())
+        self.display_manager.update_display_info((self.pos_x, self.pos_y, self.heading), obstacle_position, charge_left)
 
     def activate_wheel_motor(self) -> None:
         """
         Let the robot move forward by activating its wheel motor
         """
-        # Drive the motor clockwise
-        GPIO.output(self.AIN1, GPIO.HIGH)
-        GPIO.output(self.AIN2, GPIO.LOW)
-        # Set the motor speed
-        GPIO.output(self.PWMA, GPIO.HIGH)
-        # Disable STBY
-        GPIO.output(self.STBY, GPIO.HIGH)
-
-        if DEPLOYMENT: # Sleep only if you are deploying on the actual hardware
-            time.sleep(1) # Wait for the motor to actually move
-
-        # Stop the motor
-        GPIO.output(self.AIN1, GPIO.LOW)
-        GPIO.output(self.AIN2, GPIO.LOW)
-        GPIO.output(self.PWMA, GPIO.LOW)
-        GPIO.output(self.STBY, GPIO.LOW)
+        self.motor_driver.run(self.motor_driver.move_forward())
+
+    def activate_wheel_motor_for(self, cells: int) -> int:
+        """
+        Let the robot move forward by several cells, keeping its wheel motor running between them.
+        The room bounds and the infrared sensor are checked at every cell boundary.
+        :param cells: the number of cells to move by
+        :return: the number of cells the robot moved by, fewer than cells if it found an obstacle
+        """
+        x, y, heading = self.state
+        dx, dy = self.STEPS[heading]
+
+        def can_enter(moved: int) -> bool:
+            cell = (x + dx * (moved + 1), y + dy * (moved + 1))
+            return self.room.is_position_valid(cell) and not self.obstacle_found()
+
+        return self.motor_driver.run(self.motor_driver.move_forward_cells(cells, can_enter))
 
     def activate_rotation_motor(self, direction) -> None:
         """
         Let the robot rotate towards a given direction
         :param direction: "l" to turn left, "r" to turn right
         """
-        if direction == self.LEFT:
-            GPIO.output(self.BIN1, GPIO.HIGH)
-            GPIO.output(self.BIN2, GPIO.LOW)
-        elif direction == self.RIGHT:
-            GPIO.output(self.BIN1, GPIO.LOW)
-            GPIO.output(self.BIN2, GPIO.HIGH)
-
-        GPIO.output(self.PWMB, GPIO.HIGH)
-        GPIO.output(self.STBY, GPIO.HIGH)
-
-        if DEPLOYMENT:  # Sleep only if you are deploying on the actual hardware
-            time.sleep(1)  # Wait for the motor to actually move
-
-        # Stop the motor
-        GPIO.output(self.BIN1, GPIO.LOW)
-        GPIO.output(self.BIN2, GPIO.LOW)
-        GPIO.output(self.PWMB, GPIO.LOW)
-        GPIO.output(self.STBY, GPIO.LOW)
+        self.motor_driver.run(self.motor_driver.rotate(direction))
 
 
 class CleaningRobotError(Exception):
@@ -0,0 +1,184 @@
+import os
+import struct
+import zlib
+from typing import Iterator, NamedTuple
+
+from src.robot_state import HEADINGS, HEADING_INDEX, RobotState
+
+# Outcome of a journaled command
+MOVED = 0
+OBSTACLE = 1
+LOW_POWER = 2
+
+# Recorded instead of a command that is not a single character (e.g., a malformed command
+# rejected by the low power mode before being parsed)
+UNKNOWN_COMMAND = b"?"
+
+# Flags of a journaled command
+CLEANING = 1  # The cleaning system was on
+
+# Sequence number, command, outcome, flags, CRC32 of the previous fields
+RECORD = struct.Struct("<IcBBI")
+RECORD_BODY = struct.Struct("<IcBB")
+
+# Magic, sequence number of the last command, x, y, heading index, cleaning system on, max x, max y
+SNAPSHOT_HEADER = struct.Struct("<4sIiiBBii")
+SNAPSHOT_MAGIC = b"CRS1"
+SNAPSHOT_CRC = struct.Struct("<I")
+
+
+class JournalEntry(NamedTuple):
+    sequence: int
+    command: str
+    outcome: int
+    cleaning: bool
+
+
+class Snapshot(NamedTuple):
+    sequence: int
+    state: RobotState
+    cleaning: bool
+    max_x: int
+    max_y: int
+    grid: bytes
+
+
+class CommandJournal:
+    """
+    Append-only binary journal of the commands executed by a robot, with periodic snapshots
+    of its state, so that the robot can recover its position after a restart (see
+    CleaningRobot.recover_robot).
+
+    Every record is written to the operating system as soon as it is appended, so it survives
+    a crash of the process, while the (slow) fsync to the storage is done once every
+    sync_interval records. A record that was only partially written is dropped when the
+    journal is opened.
+    """
+
+    SNAPSHOT_INTERVAL = 1000  # Commands
+    SYNC_INTERVAL = 32  # Commands
+
+    def __init__(self, path: str, snapshot_interval: int = SNAPSHOT_INTERVAL, sync_interval: int = SYNC_INTERVAL):
+        """
+        :param path: the path of the journal; the snapshot is stored next to it, with the ".snapshot" suffix
+        :param snapshot_interval: the number of commands between two snapshots
+        :param sync_interval: the number of commands between two fsyncs
+        """
+        if snapshot_interval < 1 or sync_interval < 1:
+            raise ValueError("The intervals must be positive")
+        self.path = path
+        self.snapshot_path = path + ".snapshot"
+        self.snapshot_interval = snapshot_interval
+        self.sync_interval = sync_interval
+
+        snapshot = self.load_snapshot()
+        self.__snapshot_sequence = snapshot.sequence if snapshot is not None else 0
+        self.__file = open(path, "a+b", buffering=0)
+        self.__entries = self.__read_entries()
+        self.sequence = self.__entries[-1].sequence if self.__entries else self.__snapshot_sequence
+        self.__unsynced = 0
+
+    @property
+    def needs_snapshot(self) -> bool:
+        return self.sequence - self.__snapshot_sequence >= self.snapshot_interval
+
+    def append(self, command: str, outcome: int, cleaning: bool) -> None:
+        """
+        Records an executed command
+        :param command: the command
+        :param outcome: MOVED, OBSTACLE or LOW_POWER
+        :param cleaning: whether the cleaning system was on
+        """
+        body = RECORD_BODY.pack(self.sequence + 1, encode_command(command), outcome, CLEANING if cleaning else 0)
+        self.sequence += 1
+        self.__file.write(body + zlib.crc32(body).to_bytes(4, "little"))
+        self.__unsynced += 1
+        if self.__unsynced >= self.sync_interval:
+            self.sync()
+
+    def sync(self) -> None:
+        """
+        Forces the appended records to the storage
+        """
+        if self.__unsynced:
+            os.fsync(self.__file.fileno())
+            self.__unsynced = 0
+
+    def replay(self) -> Iterator[JournalEntry]:
+        """
+        Returns the commands recorded after the last snapshot, oldest first.
+        Only the commands found when the journal was opened are returned.
+        """
+        return (entry for entry in self.__entries if entry.sequence > self.__snapshot_sequence)
+
+    def write_snapshot(self, state: RobotState, cleaning: bool, max_x: int, max_y: int, grid) -> None:
+        """
+        Atomically replaces the snapshot with the given state, then empties the journal
+        :param state: the current state of the robot
+        :param cleaning: whether the cleaning system is on
+        :param max_x: the maximum x coordinate of the room
+        :param max_y: the maximum y coordinate of the room
+        :param grid: the occupancy grid of the room
+        """
+        self.sync()
+        data = SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, self.sequence, state.x, state.y, HEADING_INDEX[state.heading],
+                                    cleaning, max_x, max_y) + bytes(grid)
+        temporary_path = self.snapshot_path + ".tmp"
+        with open(temporary_path, "wb") as f:
+            f.write(data + SNAPSHOT_CRC.pack(zlib.crc32(data)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary_path, self.snapshot_path)
+        # The snapshot covers every journaled command, so the journal can start over
+        self.__snapshot_sequence = self.sequence
+        self.__entries = []
+        self.__file.truncate(0)
+        os.fsync(self.__file.fileno())
+
+    def load_snapshot(self) -> Snapshot | None:
+        """
+        Returns the last snapshot, or None if there is no (valid) snapshot
+        """
+        try:
+            with open(self.snapshot_path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        if len(data) < SNAPSHOT_HEADER.size + SNAPSHOT_CRC.size:
+            return None
+        data, (crc,) = data[:-SNAPSHOT_CRC.size], SNAPSHOT_CRC.unpack(data[-SNAPSHOT_CRC.size:])
+        if zlib.crc32(data) != crc:
+            return None
+        magic, sequence, x, y, heading, cleaning, max_x, max_y = SNAPSHOT_HEADER.unpack_from(data)
+        if magic != SNAPSHOT_MAGIC:
+            return None
+        return Snapshot(sequence, RobotState(x, y, HEADINGS[heading]), bool(cleaning), max_x, max_y,
+                        data[SNAPSHOT_HEADER.size:])
+
+    def close(self) -> None:
+        self.sync()
+        self.__file.close()
+
+    def __read_entries(self) -> list[JournalEntry]:
+        self.__file.seek(0)
+        data = self.__file.read()
+        entries = []
+        valid = 0
+        for sequence, command, outcome, flags, crc in RECORD.iter_unpack(data[:len(data) - len(data) % RECORD.size]):
+            if zlib.crc32(data[valid:valid + RECORD_BODY.size]) != crc:
+                break
+            entries.append(JournalEntry(sequence, command.decode(), outcome, bool(flags & CLEANING)))
+            valid += RECORD.size
+        if valid != len(data):
+            # Drop the record that was being written when the process stopped, and whatever follows it
+            self.__file.truncate(valid)
+        return entries
+
+
+def encode_command(command: str) -> bytes:
+    """
+    Encodes a command as a single byte, UNKNOWN_COMMAND if it is not a single ASCII character
+    """
+    if len(command) == 1 and command.isascii():
+        return command.encode()
+    return UNKNOWN_COMMAND
@@ -0,0 +1,106 @@
+import asyncio
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from src.cleaning_robot import CleaningRobot, CleaningRobotError
+
+ERROR_RESPONSE = "ERR"
+
+logger = logging.getLogger(__name__)
+
+
+class CommandServer:
+    """
+    Streaming transport between the RMS and a robot. Each connection carries newline-delimited
+    commands (e.g., "f\\n"); each command gets one response line, in the order the commands were
+    sent, with the status returned by the robot ("(x,y,H)", "!(x,y,H)" or "(x,y,H),(ox,oy)"),
+    or ERR if the robot rejected the command or failed to execute it.
+
+    Clients can pipeline commands without waiting for the responses. Commands are executed one
+    at a time in a worker thread, so that the motors never block the event loop; while they are
+    busy, at most max_pending commands per connection are buffered and the server stops reading,
+    so that the socket pushes back on the client.
+    """
+
+    MAX_PENDING = 64  # Commands
+
+    def __init__(self, robot: CleaningRobot, max_pending: int = MAX_PENDING):
+        """
+        :param robot: the (initialized) robot that executes the commands
+        :param max_pending: the number of commands of a connection buffered while the robot is busy
+        """
+        self.robot = robot
+        self.max_pending = max_pending
+        # A single worker, so that the commands of every connection reach the robot one at a time
+        self.__executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="robot")
+
+    async def start_tcp(self, host: str = "127.0.0.1", port: int = 0) -> asyncio.Server:
+        """
+        Starts accepting connections on a TCP socket (port 0 picks a free port)
+        """
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    async def start_unix(self, path: str) -> asyncio.Server:
+        """
+        Starts accepting connections on a Unix domain socket
+        """
+        return await asyncio.start_unix_server(self.handle_connection, path)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        pending = asyncio.Queue(self.max_pending)
+        executor = asyncio.create_task(self.__execute_pending(pending, writer))
+        try:
+            while line := await reader.readline():
+                command = line.strip().decode(errors="replace")
+                if command:
+                    # Waits while the queue is full, which stops reading from the socket
+                    await pending.put(command)
+            # The client is done sending: respond to the commands still pending
+            await pending.put(None)
+            await executor
+        except (ConnectionError, ValueError):
+            # The client went away, or sent a line longer than the stream limit
+            pass
+        finally:
+            executor.cancel()
+            writer.close()
+
+    def close(self) -> None:
+        self.__executor.shutdown()
+
+    async def __execute_pending(self, pending: asyncio.Queue, writer: asyncio.StreamWriter) -> None:
+        loop = asyncio.get_running_loop()
+        connected = True
+        done = False
+        while not done:
+            commands = [await pending.get()]
+            # Pipelined commands that are already buffered are executed in a single hop to the worker
+            while not pending.empty() and len(commands) < self.max_pending:
+                commands.append(pending.get_nowait())
+            if commands[-1] is None:
+                commands.pop()
+                done = True
+            if commands and connected:
+                context = contextvars.copy_context()
+                responses = await loop.run_in_executor(self.__executor, context.run, self.__execute, commands)
+                writer.write("".join(f"{response}\n" for response in responses).encode())
+                try:
+                    await writer.drain()
+                except ConnectionError:
+                    # Nobody will read the responses: the remaining commands are discarded
+                    connected = False
+
+    def __execute(self, commands: list[str]) -> list[str]:
+        responses = []
+        for command in commands:
+            try:
+                result = self.robot.execute_command(command)
+            except CleaningRobotError:
+                result = ERROR_RESPONSE
+            except Exception:
+                # The connection must keep answering the next commands
+                logger.exception("Command %r failed", command)
+                result = ERROR_RESPONSE
+            responses.append(result if result is not None else self.robot.robot_status())
+        return responses
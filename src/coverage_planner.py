@@ -0,0 +1,244 @@
+import re
+from bisect import bisect_left, bisect_right
+from collections import deque
+
+from src.cleaning_robot import CleaningRobot, CleaningRobotError
+from src.robot_state import FORWARD_DELTA, HEADING_INDEX
+from src.room import Room
+
+# Heading of a single forward step, indexed by its displacement
+STEP_HEADINGS = {step: heading for heading, step in FORWARD_DELTA.items()}
+
+# Cheapest rotation from one heading to another, indexed by the clockwise distance between them
+ROTATIONS = ("", CleaningRobot.RIGHT, CleaningRobot.RIGHT * 2, CleaningRobot.LEFT)
+
+# Index in CleaningRobot.HEADINGS of the heading of a single forward step
+STEP_INDEXES = {step: HEADING_INDEX[heading] for step, heading in STEP_HEADINGS.items()}
+
+# Maps each byte of the occupancy grid to 1 if it contains an obstacle, 0 otherwise
+OBSTACLE_TABLE = bytes(1 if value & Room.OBSTACLE else 0 for value in range(256))
+
+# A run of consecutive reachable cells in a lane
+REACHABLE_RUN = re.compile(b"\x01+")
+
+
+def plan_coverage(room: Room, start: tuple[int, int, str] = (0, 0, CleaningRobot.N)) -> str:
+    """
+    Plans a boustrophedon route covering every free cell of the room reachable from the start.
+    Both sweep directions are planned and the one with fewer rotations is returned, since
+    rotations are as slow as forward movements on the actual hardware.
+    :param room: the room to cover; cells marked with Room.OBSTACLE are avoided
+    :param start: the status of the robot before the route, as (x, y, heading)
+    :return: the route string, to be executed with CleaningRobot.execute_commands
+    """
+    x, y, heading = start
+    if not room.is_position_valid((x, y)) or room.has_obstacle((x, y)) or heading not in CleaningRobot.HEADINGS:
+        raise CleaningRobotError
+
+    blocked = _get_blocked_cells(room)
+    reachable = _find_reachable_cells(room, blocked, (x, y))
+    routes = (_plan_sweep(room, blocked, reachable, start, along_y=True),
+              _plan_sweep(room, blocked, reachable, start, along_y=False))
+    return min(routes, key=lambda route: (count_rotations(route), len(route)))
+
+
+def count_rotations(commands: str) -> int:
+    return commands.count(CleaningRobot.LEFT) + commands.count(CleaningRobot.RIGHT)
+
+
+def commands_for_path(path: list[tuple[int, int]], heading: str) -> tuple[str, str]:
+    """
+    Converts a path of adjacent cells into commands, using the cheapest rotation before each step
+    :param path: the cells to go through, starting from the current position of the robot
+    :param heading: the current heading of the robot
+    :return: the commands and the heading of the robot at the end of the path
+    """
+    commands = []
+    for (x0, y0), (x1, y1) in zip(path, path[1:]):
+        new_heading = STEP_HEADINGS[(x1 - x0, y1 - y0)]
+        distance = (HEADING_INDEX[new_heading] - HEADING_INDEX[heading]) % 4
+        commands.append(ROTATIONS[distance])
+        commands.append(CleaningRobot.FORWARD)
+        heading = new_heading
+    return "".join(commands), heading
+
+
+def find_path(room: Room, source: tuple[int, int], target: tuple[int, int]) -> list[tuple[int, int]] | None:
+    """
+    Finds a shortest path between two cells avoiding the known obstacles
+    :return: the cells of the path, including source and target, or None if the target is unreachable
+    """
+    return _find_path(room, _get_blocked_cells(room), source, target)
+
+
+def _find_path(room: Room, blocked: bytes, source: tuple[int, int], target: tuple[int, int]) -> list[tuple[int, int]] | None:
+    # Breadth-first search on flat cell indexes
+    width = room.width
+    source = source[1] * width + source[0]
+    target = target[1] * width + target[0]
+    parents = {source: None}
+    queue = deque([source])
+    while queue:
+        index = queue.popleft()
+        if index == target:
+            return _trace_path(width, parents, index)
+        for neighbour in _free_neighbours(width, len(blocked), blocked, index):
+            if neighbour not in parents:
+                parents[neighbour] = index
+                queue.append(neighbour)
+    return None
+
+
+def _find_nearest_uncovered(room: Room, blocked: bytes, covered: bytearray, source: tuple[int, int]) -> list[tuple[int, int]] | None:
+    # Breadth-first search stopping at the first uncovered cell, so every other cell of the path is covered
+    width = room.width
+    source = source[1] * width + source[0]
+    parents = {source: None}
+    queue = deque([source])
+    while queue:
+        index = queue.popleft()
+        for neighbour in _free_neighbours(width, len(blocked), blocked, index):
+            if neighbour not in parents:
+                parents[neighbour] = index
+                if not covered[neighbour]:
+                    return _trace_path(width, parents, neighbour)
+                queue.append(neighbour)
+    return None
+
+
+def _trace_path(width: int, parents: dict, index: int) -> list[tuple[int, int]]:
+    path = []
+    while index is not None:
+        path.append((index % width, index // width))
+        index = parents[index]
+    return path[::-1]
+
+
+def _plan_sweep(room: Room, blocked: bytes, reachable: bytearray, start: tuple[int, int, str], along_y: bool) -> str:
+    # Each lane is split into segments of reachable cells. The robot sweeps a segment, then steps into
+    # the nearest uncovered segment of a neighbouring lane overlapping the cells it just swept; a search
+    # for the nearest uncovered cell is only needed when there is none, instead of one per lane change.
+    width = room.width
+    x, y, heading = start
+    heading = HEADING_INDEX[heading]
+    lane_count = room.width if along_y else room.height
+    along, across = ((0, 1), (1, 0)) if along_y else ((1, 0), (0, 1))
+    starts, ends = _get_lane_segments(room, reachable, along_y)
+    covered = bytearray(len(reachable))
+    remaining = reachable.count(1)
+    commands = []
+
+    def move(sign: int, axis: tuple[int, int], count: int) -> None:
+        # Straight moves, after the cheapest rotation toward them
+        nonlocal heading
+        if count:
+            step = STEP_INDEXES[(sign * axis[0], sign * axis[1])]
+            commands.append(ROTATIONS[(step - heading) % 4])
+            commands.append(CleaningRobot.FORWARD * count)
+            heading = step
+
+    lane, position = (x, y) if along_y else (y, x)
+    direction = 1
+    while True:
+        # Sweep the segment toward its farther end, the other side staying an uncovered segment
+        lane_starts, lane_ends = starts[lane], ends[lane]
+        segment = bisect_right(lane_starts, position) - 1
+        first, last = lane_starts[segment], lane_ends[segment]
+        if last - position >= position - first:
+            low, high, sign = position, last, 1
+            rest = first, position - 1
+        else:
+            low, high, sign = first, position, -1
+            rest = position + 1, last
+        if rest[0] <= rest[1]:
+            lane_starts[segment], lane_ends[segment] = rest
+        else:
+            del lane_starts[segment], lane_ends[segment]
+        if along_y:
+            covered[low * width + lane:high * width + lane + 1:width] = bytes([1]) * (high - low + 1)
+        else:
+            covered[lane * width + low:lane * width + high + 1] = bytes([1]) * (high - low + 1)
+        move(sign, along, high - low)
+        remaining -= high - low + 1
+        if not remaining:
+            break
+
+        position = high if sign > 0 else low
+        for step in (direction, -direction):
+            entry = None
+            if 0 <= lane + step < lane_count:
+                entry = _nearest_overlap(starts[lane + step], ends[lane + step], low, high, position)
+            if entry is not None:
+                # Move along the swept cells, then into the neighbouring lane
+                move(1 if entry > position else -1, along, abs(entry - position))
+                move(step, across, 1)
+                direction = step
+                lane, position = lane + step, entry
+                break
+        else:
+            # Lane changes around obstacles need a detour
+            cell = (lane, position) if along_y else (position, lane)
+            path = _find_nearest_uncovered(room, blocked, covered, cell)
+            path_commands, new_heading = commands_for_path(path, CleaningRobot.HEADINGS[heading])
+            commands.append(path_commands)
+            heading = HEADING_INDEX[new_heading]
+            lane, position = path[-1] if along_y else path[-1][::-1]
+
+    return "".join(commands)
+
+
+def _nearest_overlap(lane_starts: list[int], lane_ends: list[int], low: int, high: int, position: int) -> int | None:
+    # The cell nearest to position, between low and high, of an uncovered segment of the lane
+    first = bisect_left(lane_ends, low)
+    stop = bisect_right(lane_starts, high)
+    before = bisect_right(lane_starts, position) - 1
+    nearest = None
+    for segment in (before, before + 1):
+        if first <= segment < stop:
+            entry = min(max(position, lane_starts[segment], low), lane_ends[segment], high)
+            if nearest is None or abs(entry - position) < abs(nearest - position):
+                nearest = entry
+    return nearest
+
+
+def _get_lane_segments(room: Room, reachable: bytearray, along_y: bool) -> tuple[list[list[int]], list[list[int]]]:
+    # The first and last positions of the runs of reachable cells of each lane, in increasing order
+    width = room.width
+    starts, ends = [], []
+    for lane in range(room.width if along_y else room.height):
+        cells = reachable[lane::width] if along_y else reachable[lane * width:(lane + 1) * width]
+        runs = list(REACHABLE_RUN.finditer(cells))
+        starts.append([run.start() for run in runs])
+        ends.append([run.end() - 1 for run in runs])
+    return starts, ends
+
+
+def _get_blocked_cells(room: Room) -> bytes:
+    return room.export_grid().translate(OBSTACLE_TABLE)
+
+
+def _find_reachable_cells(room: Room, blocked: bytes, source: tuple[int, int]) -> bytearray:
+    # Flood fill on flat cell indexes
+    width = room.width
+    reachable = bytearray(len(blocked))
+    source = source[1] * width + source[0]
+    reachable[source] = 1
+    stack = [source]
+    while stack:
+        for neighbour in _free_neighbours(width, len(blocked), blocked, stack.pop()):
+            if not reachable[neighbour]:
+                reachable[neighbour] = 1
+                stack.append(neighbour)
+    return reachable
+
+
+def _free_neighbours(width: int, size: int, blocked: bytes, index: int):
+    x = index % width
+    if index + width < size and not blocked[index + width]:
+        yield index + width
+    if index >= width and not blocked[index - width]:
+        yield index - width
+    if x < width - 1 and not blocked[index + 1]:
+        yield index + 1
+    if x > 0 and not blocked[index - 1]:
+        yield index - 1
@@ -1,13 +1,39 @@
-try:
+import threading
+
+from src.backend import use_hardware
+
+if use_hardware("HD44780", "board"):
     import HD44780
     import board
-except:
+else:
     from mock.HD44780 import HD44780
     import mock.board
 
 class DisplayManager:
-    def __init__(self, i2c):
+
+    REFRESH_RATE = 4  # Refreshes per second
+    LINES = 2
+    COLUMNS = 16
+
+    def __init__(self, i2c, diff_updates: bool = False, max_refresh_rate: float = None):
+        """
+        :param i2c: the I2C bus of the display
+        :param diff_updates: if True, a copy of the display content is kept and only the changed characters are
+            written, when the driver can move the cursor (otherwise the display is redrawn at each update)
+        :param max_refresh_rate: if set, updates are coalesced and written by a background worker at most this many times per second
+        """
         self.display = HD44780(i2c)
+        self.diff_updates = diff_updates and all(hasattr(self.display, name) for name in ("lcd_set_cursor", "lcd_write"))
+        self.framebuffer = None  # The content of the display, one string per line, when diff_updates is True
+
+        self.max_refresh_rate = max_refresh_rate
+        self.__pending = None
+        self.__condition = threading.Condition()
+        self.__worker = None
+        if max_refresh_rate is not None:
+            self.__worker = threading.Thread(target=self.__refresh, name="display-refresh", daemon=True)
+            self.__running = True
+            self.__worker.start()
 
     def update_display_info(self, robot_position: tuple[int, int, str], obstacle_position: tuple[int, int] or None, battery: int):
         rx, ry, rh = robot_position
@@ -17,9 +43,85 @@ class DisplayManager:
             ox, oy = obstacle_position
             obstacle_str = f"({ox},{oy})"
 
-        self.display.lcd_clear()
-        self.display.lcd_string(f"R: ({rx},{ry},{rh}) - O: {obstacle_str} - B: {battery}%")
+        self.__show(f"R: ({rx},{ry},{rh}) - O: {obstacle_str} - B: {battery}%")
 
     def update_display_low_power(self):
-        self.display.lcd_clear()
-        self.display.lcd_string(f"Low power, recharge needed")
+        self.__show(f"Low power, recharge needed")
+
+    def flush(self) -> None:
+        """
+        Writes the pending update, if any, without waiting for the background worker
+        """
+        with self.__condition:
+            message, self.__pending = self.__pending, None
+        if message is not None:
+            self.__write(message)
+
+    def close(self) -> None:
+        """
+        Stops the background worker, writing the pending update first
+        """
+        if self.__worker is not None:
+            with self.__condition:
+                self.__running = False
+                self.__condition.notify()
+            self.__worker.join()
+            self.__worker = None
+        self.flush()
+
+    def __show(self, message: str) -> None:
+        if self.__worker is None:
+            self.__write(message)
+            return
+        # Only the latest update is kept: the previous ones were never displayed
+        with self.__condition:
+            self.__pending = message
+            self.__condition.notify()
+
+    def __refresh(self) -> None:
+        while True:
+            with self.__condition:
+                while self.__pending is None and self.__running:
+                    self.__condition.wait()
+                if self.__pending is None:
+                    return
+            self.flush()
+            # Wait before the next refresh, unless the manager is closed
+            with self.__condition:
+                self.__condition.wait_for(lambda: not self.__running, timeout=1 / self.max_refresh_rate)
+
+    def __write(self, message: str) -> None:
+        if not self.diff_updates:
+            self.display.lcd_clear()
+            self.display.lcd_string(message)
+            return
+
+        frame = self.__to_frame(message)
+        if self.framebuffer is None:
+            self.display.lcd_clear()
+            self.framebuffer = [" " * self.COLUMNS] * self.LINES
+
+        for line, (old, new) in enumerate(zip(self.framebuffer, frame)):
+            for start, end in self.__changed_runs(old, new):
+                self.display.lcd_set_cursor(line, start)
+                self.display.lcd_write(new[start:end])
+        self.framebuffer = frame
+
+    def __to_frame(self, message: str) -> list[str]:
+        # The message wraps on the following lines, and what does not fit is cut
+        columns = self.COLUMNS
+        return [message[i * columns:(i + 1) * columns].ljust(columns) for i in range(self.LINES)]
+
+    @staticmethod
+    def __changed_runs(old: str, new: str, max_gap: int = 2) -> list[tuple[int, int]]:
+        # Runs of changed characters separated by a few unchanged ones are merged,
+        # since moving the cursor costs about as much as rewriting them
+        runs = []
+        for i, (a, b) in enumerate(zip(old, new)):
+            if a == b:
+                continue
+            if runs and i - runs[-1][1] <= max_gap:
+                runs[-1][1] = i + 1
+            else:
+                runs.append([i, i + 1])
+        return [(start, end) for start, end in runs]
@@ -0,0 +1,127 @@
+from typing import NamedTuple
+
+from src.cleaning_robot import CleaningRobot
+from src.coverage_planner import ROTATIONS, STEP_INDEXES
+from src.robot_state import HEADINGS, HEADING_INDEX, RobotState
+from src.room import Room
+
+# Marks every cell that was not visited as an obstacle, keeping its other flags
+UNVISITED_TO_OBSTACLE = bytes(value if value & Room.VISITED else value | Room.OBSTACLE for value in range(256))
+
+
+class Exploration(NamedTuple):
+    room: Room  # The discovered room, where the cells that cannot be reached are obstacles
+    complete: bool  # False if the battery ran low, or the room is larger than the exploration limit
+
+
+def explore_room(robot: CleaningRobot, max_size: int = 256) -> Exploration:
+    """
+    Discovers the boundaries and the obstacles of a room of unknown size, by driving the robot with
+    execute_command: a depth-first search moves it to the cells next to the ones it visited that
+    were never tested, and the walls are found by the infrared sensor like any other obstacle.
+    When a cell has no untested neighbour left the robot backs up along its path, and the search
+    ends as soon as no visited cell has an untested neighbour (the frontier, updated at each step).
+    The robot is left in the discovered room (robot.room), at its position in it.
+    :param robot: the robot, whose current cell is explored from; its heading is kept
+    :param max_size: the maximum number of cells between the start and a wall, in each direction
+    :return: the discovered room
+    """
+    # The start is the center of a room large enough whatever the direction of the walls
+    room = Room(2 * max_size, 2 * max_size)
+    robot.room = room
+    robot.state = RobotState(max_size, max_size, robot.heading or CleaningRobot.N)
+    start = (max_size, max_size)
+    room.mark(start, Room.VISITED)
+
+    frontier = set()
+    _update_frontier(room, frontier, start)
+    path = [start]  # The visited cells from the start to the robot, to back up along
+    complete = True
+    while frontier:
+        target = _nearest_untested_neighbour(room, robot.state)
+        backing_up = target is None
+        if backing_up:
+            # Nothing left to test here: back up to the previous cell of the path
+            path.pop()
+            target = path[-1]
+        elif target[0] in (0, room.max_x) or target[1] in (0, room.max_y):
+            # The room is larger than the limit: the cells beyond it are never tested
+            complete = False
+            room.mark(target, Room.OBSTACLE)
+            _update_frontier(room, frontier, target)
+            continue
+
+        result = _move_to(robot, target)
+        if result is not None and result.startswith("!"):
+            complete = False
+            break
+        if (robot.pos_x, robot.pos_y) == target:
+            if not backing_up:
+                path.append(target)
+        elif backing_up:
+            # An obstacle appeared on the way back
+            complete = False
+            break
+        # Otherwise the robot found an obstacle on the target, and marked it
+        _update_frontier(room, frontier, target)
+
+    discovered = _crop_to_visited(room)
+    robot.room = discovered.room
+    robot.state = RobotState(robot.pos_x - discovered.min_x, robot.pos_y - discovered.min_y, robot.heading)
+    return Exploration(discovered.room, complete)
+
+
+class _Cropped(NamedTuple):
+    room: Room
+    min_x: int
+    min_y: int
+
+
+def _nearest_untested_neighbour(room: Room, state: RobotState) -> tuple[int, int] | None:
+    # The untested neighbour needing the fewest rotations to face
+    heading = HEADING_INDEX[state.heading]
+    for turn in (0, 1, 3, 2):
+        cell = state._replace(heading=HEADINGS[(heading + turn) % 4]).forward_position()
+        if _is_untested(room, cell):
+            return cell
+    return None
+
+
+def _is_untested(room: Room, cell: tuple[int, int]) -> bool:
+    return room.is_position_valid(cell) and not room.is_marked(cell, Room.VISITED | Room.OBSTACLE)
+
+
+def _update_frontier(room: Room, frontier: set, cell: tuple[int, int]) -> None:
+    # A cell was tested: only it and its neighbours can join or leave the frontier
+    x, y = cell
+    for cx, cy in ((x, y), (x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+        if not room.is_position_valid((cx, cy)):
+            continue
+        if room.is_marked((cx, cy), Room.VISITED) and any(_is_untested(room, n) for n in ((cx + 1, cy), (cx - 1, cy), (cx, cy + 1), (cx, cy - 1))):
+            frontier.add((cx, cy))
+        else:
+            frontier.discard((cx, cy))
+
+
+def _move_to(robot: CleaningRobot, target: tuple[int, int]) -> str | None:
+    # Turns the robot toward an adjacent cell and moves forward
+    step = STEP_INDEXES[(target[0] - robot.pos_x, target[1] - robot.pos_y)]
+    for command in ROTATIONS[(step - HEADING_INDEX[robot.heading]) % 4] + CleaningRobot.FORWARD:
+        result = robot.execute_command(command)
+        if result is not None:
+            return result
+    return None
+
+
+def _crop_to_visited(room: Room) -> _Cropped:
+    visited = room.get_positions(Room.VISITED)
+    min_x = min(x for x, _ in visited)
+    max_x = max(x for x, _ in visited)
+    min_y = min(y for _, y in visited)
+    max_y = max(y for _, y in visited)
+
+    grid = bytearray()
+    for y in range(min_y, max_y + 1):
+        row = y * room.width
+        grid += room.grid[row + min_x:row + max_x + 1]
+    return _Cropped(Room.with_grid(max_x - min_x, max_y - min_y, grid.translate(UNVISITED_TO_OBSTACLE)), min_x, min_y)
@@ -0,0 +1,393 @@
+from collections import deque
+from concurrent.futures import Executor
+from typing import NamedTuple
+
+from src.cleaning_robot import CleaningRobot, CleaningRobotError
+from src.coverage_planner import ROTATIONS, commands_for_path, find_path, plan_coverage
+from src.robot_state import HEADINGS, HEADING_INDEX, RobotState
+from src.room import Room
+
+
+class Region(NamedTuple):
+    """
+    The part of a room cleaned by one robot of a fleet
+    """
+    cells: tuple[tuple[int, int], ...]  # In the order they are cleaned
+    start: RobotState  # Where the robot starts cleaning the region
+    commands: str  # The route cleaning the region, from start
+
+
+def partition_room(room: Room, robots: int, start: tuple[int, int, str] = (0, 0, CleaningRobot.N)) -> list[Region]:
+    """
+    Splits the free cells of a room into balanced regions, one per robot. The coverage route of the
+    whole room is cut into consecutive parts cleaning the same number of new cells, so that each
+    region comes with a route that a robot can follow without leaving the free cells.
+    :param room: the room to split; cells marked with Room.OBSTACLE are avoided
+    :param robots: the number of regions
+    :param start: where the coverage route starts, as (x, y, heading)
+    :return: the regions, whose cell counts differ by at most one
+    """
+    if robots < 1:
+        raise CleaningRobotError
+
+    route = plan_coverage(room, start)
+    state = RobotState(*start)
+    order = [(state.x, state.y)]  # The cells, in the order they are covered
+    covered = set(order)
+    steps = [(1, state)]  # After each command: the number of cells covered and the state of the robot
+    for command in route:
+        state = state.moved_forward() if command == CleaningRobot.FORWARD else state.turned(command)
+        if (state.x, state.y) not in covered:
+            covered.add((state.x, state.y))
+            order.append((state.x, state.y))
+        steps.append((len(order), state))
+
+    regions = []
+    begin = 0  # Index in route of the first command of the region
+    for i in range(robots):
+        first, last = i * len(order) // robots, (i + 1) * len(order) // robots
+        end = begin
+        # The region ends with the command covering its last cell
+        while end < len(route) and steps[end][0] < last:
+            end += 1
+        if i == robots - 1:
+            end = len(route)
+        regions.append(Region(tuple(order[first:last]), steps[begin][1], route[begin:end]))
+        begin = end
+    return regions
+
+
+class ReservationTable:
+    """
+    Space-time reservations of the cells of a room, so that no two robots are in the same cell
+    at the same time step. Each check is a constant-time lookup, whatever the number of robots.
+    """
+
+    def __init__(self):
+        self.__steps = {}  # Time step -> {cell: robot}
+        self.__parked = {}  # Cell -> robot, for the robots that stopped for good
+
+    def owner(self, cell: tuple[int, int], t: int) -> int | None:
+        """
+        Returns the robot that reserved a cell at a time step, if any
+        """
+        robot = self.__parked.get(cell)
+        if robot is None:
+            robot = self.__steps.get(t, {}).get(cell)
+        return robot
+
+    def reserve(self, robot: int, cell: tuple[int, int], t: int) -> bool:
+        """
+        Reserves a cell at a time step
+        :return: False if another robot reserved it
+        """
+        owner = self.owner(cell, t)
+        if owner is not None and owner != robot:
+            return False
+        self.__steps.setdefault(t, {})[cell] = robot
+        return True
+
+    def reserve_move(self, robot: int, target: tuple[int, int], t: int) -> bool:
+        """
+        Reserves the cell a robot moves into during the time step t (i.e., where it is at t + 1).
+        The cell must also be free at t: following a robot out of its cell, or swapping cells
+        with it, would collide if it does not actually move.
+        :return: False if the move conflicts with another robot
+        """
+        owner = self.owner(target, t)
+        if owner is not None and owner != robot:
+            return False
+        return self.reserve(robot, target, t + 1)
+
+    def park(self, robot: int, cell: tuple[int, int]) -> None:
+        """
+        Reserves a cell from now on, for a robot that stopped there
+        """
+        self.__parked[cell] = robot
+
+    def release_before(self, t: int) -> None:
+        """
+        Forgets the reservations of the time steps before t, which can no longer conflict
+        """
+        for step in [step for step in self.__steps if step < t]:
+            del self.__steps[step]
+
+
+class FleetCoordinator:
+    """
+    Cleans a room with several robots at once. The room is split into one region per robot (see
+    partition_room), and the robots advance in lock-step: at each time step every robot executes
+    at most one command. A forward movement is only scheduled if its cell is reserved for the
+    robot (see ReservationTable), otherwise the robot waits. A robot that is done moves out of the
+    way of the waiting robots, and when robots wait for each other, one of them takes a detour
+    around the others (skipping the cells they occupy) or, if there is none, gives up its route.
+    The cells left uncleaned this way, or by the robots that stopped, are queued once more on the
+    robots that can still move when they are all done; those that remain are in uncleaned.
+    """
+
+    # Steps without progress along the routes after which the waiting robots take detours, even if
+    # they do not wait for each other (e.g., while the robots that are done keep making way)
+    STALL_STEPS = 16
+
+    def __init__(self, room: Room, starts: list[tuple[int, int, str]]):
+        """
+        :param room: the room to clean
+        :param starts: the initial status of each robot, as (x, y, heading), in different cells
+        """
+        if len({(x, y) for x, y, _ in starts}) != len(starts):
+            raise CleaningRobotError
+
+        self.room = room
+        self.states = [RobotState(*start) for start in starts]
+        self.regions = partition_room(room, len(starts), starts[0])
+        self.reservations = ReservationTable()
+        self.time = 0
+
+        self.__queues = [deque() for _ in starts]
+        self.__stopped = [False] * len(starts)
+        self.__making_way = set()  # The robots that are done, moving out of the way
+        self.__stalled = 0  # Steps without progress along the routes
+        self.__cleaned = {(state.x, state.y) for state in self.states}
+        self.__requeued = set()  # The cells queued once more, which are not queued again
+        for robot, region in zip(self.__assign_regions(), self.regions):
+            self.__queues[robot].extend(self.__route_to(self.states[robot], region))
+        for robot, state in enumerate(self.states):
+            self.reservations.reserve(robot, (state.x, state.y), 0)
+
+    @property
+    def done(self) -> bool:
+        return not any(self.__queues)
+
+    @property
+    def uncleaned(self) -> list[tuple[int, int]]:
+        """
+        The cells of the regions that no robot went through (yet)
+        """
+        return sorted({cell for region in self.regions for cell in region.cells} - self.__cleaned)
+
+    def step(self) -> tuple[str | None, ...]:
+        """
+        Plans the next time step
+        :return: the command of each robot, None for the robots that wait or are done
+        """
+        t = self.time
+        commands = [None] * len(self.states)
+
+        # The robots that stay in their cell reserve it first, so that no robot moves into it
+        movers = []
+        for robot, queue in enumerate(self.__queues):
+            state = self.states[robot]
+            if not queue:
+                self.__making_way.discard(robot)
+                if not self.__stopped[robot]:
+                    self.reservations.reserve(robot, (state.x, state.y), t + 1)
+            elif queue[0] == CleaningRobot.FORWARD:
+                movers.append(robot)
+            else:
+                self.reservations.reserve(robot, (state.x, state.y), t + 1)
+                commands[robot] = queue.popleft()
+                self.states[robot] = state.turned(commands[robot])
+
+        waiting = {}  # Robot -> the robot in its way
+        for robot in movers:
+            state = self.states[robot]
+            target = state.forward_position()
+            if self.reservations.reserve_move(robot, target, t):
+                commands[robot] = self.__queues[robot].popleft()
+                self.states[robot] = state.moved_forward()
+                self.__cleaned.add(target)
+            else:
+                self.reservations.reserve(robot, (state.x, state.y), t + 1)
+                owner = self.reservations.owner(target, t)
+                waiting[robot] = owner if owner is not None else self.reservations.owner(target, t + 1)
+
+        if any(command is not None for robot, command in enumerate(commands) if robot not in self.__making_way):
+            self.__stalled = 0
+        else:
+            self.__stalled += 1
+
+        stuck, blocker = self.__find_stuck(waiting)
+        if self.__stalled > self.STALL_STEPS and waiting:
+            self.__resolve_deadlock(list(waiting))
+            self.__stalled = 0
+        elif blocker is not None and not self.__stopped[blocker] and self.__make_way(blocker, waiting):
+            self.__making_way.add(blocker)
+        elif stuck:
+            self.__resolve_deadlock(stuck)
+
+        self.reservations.release_before(t)
+        self.time += 1
+        if self.done:
+            self.__requeue_uncleaned()
+        return tuple(commands)
+
+    def schedule(self) -> list[tuple[str | None, ...]]:
+        """
+        Plans every time step until the room is clean, or no robot can clean the uncleaned cells
+        """
+        steps = []
+        while not self.done:
+            steps.append(self.step())
+        return steps
+
+    def stop(self, robot: int, state: tuple[int, int, str]) -> None:
+        """
+        Drops the rest of the route of a robot (e.g., after it found an obstacle or its battery
+        is low): it stays where it actually is, and the other robots avoid it
+        """
+        planned = (self.states[robot].x, self.states[robot].y)
+        self.__queues[robot].clear()
+        self.__stopped[robot] = True
+        self.states[robot] = RobotState(*state)
+        if planned != (state[0], state[1]):
+            # The robot did not get to the cell it was sent to
+            self.__cleaned.discard(planned)
+        self.reservations.park(robot, (self.states[robot].x, self.states[robot].y))
+        self.__cleaned.add((self.states[robot].x, self.states[robot].y))
+        if self.done:
+            self.__requeue_uncleaned()
+
+    def run(self, robots: list[CleaningRobot], executor: Executor = None) -> list[int]:
+        """
+        Drives the robots until the room is clean, or no robot can clean the uncleaned cells. The
+        commands of a time step are sent to the robots at once, and the next step starts when every
+        robot executed its command.
+        :param robots: the robots, in the order of the starts, already at their start
+        :param executor: if set, sends the commands of a time step in parallel (e.g., to remote robots)
+        :return: the robots that stopped before the end of their route
+        """
+        stopped = []
+        while not self.done:
+            commands = self.step()
+            active = [robot for robot, command in enumerate(commands) if command is not None]
+
+            def execute(robot: int) -> str | None:
+                return robots[robot].execute_command(commands[robot])
+
+            results = executor.map(execute, active) if executor is not None else map(execute, active)
+            for robot, result in zip(active, results):
+                if result is not None:
+                    # An obstacle or a low battery: the robot stays where it is
+                    self.stop(robot, (robots[robot].pos_x, robots[robot].pos_y, robots[robot].heading))
+                    stopped.append(robot)
+        return stopped
+
+    def __assign_regions(self) -> list[int]:
+        # Greedily pairs the robots and the regions that are the closest
+        pairs = sorted((abs(state.x - region.start.x) + abs(state.y - region.start.y), robot, i)
+                       for robot, state in enumerate(self.states) for i, region in enumerate(self.regions))
+        robots = [None] * len(self.regions)
+        assigned = set()
+        for _, robot, i in pairs:
+            if robots[i] is None and robot not in assigned:
+                robots[i] = robot
+                assigned.add(robot)
+        return robots
+
+    def __route_to(self, state: RobotState, region: Region) -> str:
+        # The route from the start of a robot to its region, then cleaning the region
+        if not region.cells:
+            return ""
+        path = find_path(self.room, (state.x, state.y), (region.start.x, region.start.y))
+        if path is None:
+            raise CleaningRobotError
+        commands, heading = commands_for_path(path, state.heading)
+        return commands + _rotation(heading, region.start.heading) + region.commands
+
+    def __requeue_uncleaned(self) -> None:
+        # Each uncleaned cell goes to the closest robot that can still move, which visits its cells
+        # in nearest-first order. The stopped robots are obstacles on the way.
+        cells = [cell for cell in self.uncleaned if cell not in self.__requeued]
+        robots = [robot for robot, stopped in enumerate(self.__stopped) if not stopped]
+        if not cells or not robots:
+            return
+        self.__requeued.update(cells)
+        room = Room.with_grid(self.room.max_x, self.room.max_y, bytearray(self.room.grid))
+        for robot, stopped in enumerate(self.__stopped):
+            if stopped:
+                room.mark((self.states[robot].x, self.states[robot].y), Room.OBSTACLE)
+
+        assigned = {robot: [] for robot in robots}
+        for cell in cells:
+            robot = min(robots, key=lambda r: abs(self.states[r].x - cell[0]) + abs(self.states[r].y - cell[1]))
+            assigned[robot].append(cell)
+        for robot, targets in assigned.items():
+            state = self.states[robot]
+            position, heading = (state.x, state.y), state.heading
+            while targets:
+                target = min(targets, key=lambda c: abs(c[0] - position[0]) + abs(c[1] - position[1]))
+                targets.remove(target)
+                path = find_path(room, position, target)
+                if path is not None:
+                    commands, heading = commands_for_path(path, heading)
+                    self.__queues[robot].extend(commands)
+                    position = target
+                    targets = [cell for cell in targets if cell not in path]
+
+    def __find_stuck(self, waiting: dict[int, int]) -> tuple[list[int], int | None]:
+        # Follows the robots in the way of each waiting robot: the robots of a cycle waiting for each
+        # other, or waiting for a robot that is done, would wait forever. Returns them, and the robot
+        # that is done (None for a cycle).
+        moving = set()
+        for robot in waiting:
+            chain = []
+            while robot in waiting and robot not in chain and robot not in moving:
+                chain.append(robot)
+                robot = waiting[robot]
+            if robot in chain:
+                return chain[chain.index(robot):], None
+            if robot not in moving and not self.__queues[robot]:
+                return chain[-1:], robot
+            moving.update(chain)
+        return [], None
+
+    def __make_way(self, robot: int, waiting: dict[int, int]) -> bool:
+        # Moves a robot that is done to a free neighbouring cell, out of the way of the waiting robots
+        state = self.states[robot]
+        occupied = {(s.x, s.y) for s in self.states}
+        targets = {self.states[r].forward_position() for r in waiting}
+        neighbours = []
+        for heading in HEADINGS:
+            cell = state._replace(heading=heading).forward_position()
+            if self.room.is_position_valid(cell) and not self.room.has_obstacle(cell) and cell not in occupied:
+                neighbours.append((cell in targets, heading))
+        if not neighbours:
+            return False
+        _, heading = min(neighbours)
+        self.__queues[robot].extend(_rotation(state.heading, heading) + CleaningRobot.FORWARD)
+        return True
+
+    def __resolve_deadlock(self, stuck: list[int]) -> None:
+        # The first stuck robot that can go around the others skips to the next cell of its route
+        # that is free; if none can, the first one gives up its route
+        occupied = {(state.x, state.y) for state in self.states}
+        for robot in stuck:
+            if self.__detour(robot, occupied):
+                return
+        self.__queues[stuck[0]].clear()
+
+    def __detour(self, robot: int, occupied: set[tuple[int, int]]) -> bool:
+        state = self.states[robot]
+        queue = self.__queues[robot]
+        room = Room.with_grid(self.room.max_x, self.room.max_y, bytearray(self.room.grid))
+        for cell in occupied - {(state.x, state.y)}:
+            room.mark(cell, Room.OBSTACLE)
+
+        target = state
+        for i, command in enumerate(queue):
+            target = target.moved_forward() if command == CleaningRobot.FORWARD else target.turned(command)
+            if command != CleaningRobot.FORWARD or (target.x, target.y) in occupied:
+                continue
+            path = find_path(room, (state.x, state.y), (target.x, target.y))
+            if path is not None:
+                commands, heading = commands_for_path(path, state.heading)
+                rest = list(queue)[i + 1:]
+                queue.clear()
+                queue.extend(commands + _rotation(heading, target.heading))
+                queue.extend(rest)
+                return True
+        return False
+
+
+def _rotation(heading: str, target: str) -> str:
+    return ROTATIONS[(HEADING_INDEX[target] - HEADING_INDEX[heading]) % 4]
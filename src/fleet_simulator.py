@@ -0,0 +1,116 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, NamedTuple
+
+import mock.GPIO as GPIO
+from src.cleaning_robot import CleaningRobot, CleaningRobotError
+from src.room import Room
+
+
+class Scenario(NamedTuple):
+    """
+    A route to drive a simulated robot along
+    """
+    name: str
+    room_size: tuple[int, int]  # The maximum x and y coordinates of the room
+    route: str
+    obstacles: tuple[tuple[int, int], ...] = ()
+    start: tuple[int, int, str] = (0, 0, CleaningRobot.N)
+    initial_charge: int = 100
+    charge_per_move: float = 0
+
+
+class ScenarioResult(NamedTuple):
+    name: str
+    status: str  # The status of the robot at the end of the route
+    commands_executed: int
+    obstacles_hit: tuple[tuple[int, int], ...]
+    battery_used: float
+    low_power: bool
+    error: bool  # Whether the route was interrupted by a CleaningRobotError
+
+
+class FleetReport(NamedTuple):
+    scenarios: int
+    completed: int
+    low_power: int
+    errors: int
+    obstacles_hit: int
+    commands_executed: int
+    battery_used: float
+    results: tuple[ScenarioResult, ...]
+
+    @classmethod
+    def merge(cls, results: Iterable[ScenarioResult]) -> "FleetReport":
+        results = tuple(results)
+        return cls(
+            scenarios=len(results),
+            completed=sum(1 for r in results if not r.low_power and not r.error),
+            low_power=sum(1 for r in results if r.low_power),
+            errors=sum(1 for r in results if r.error),
+            obstacles_hit=sum(len(r.obstacles_hit) for r in results),
+            commands_executed=sum(r.commands_executed for r in results),
+            battery_used=sum(r.battery_used for r in results),
+            results=results,
+        )
+
+    def summary(self) -> dict:
+        summary = self._asdict()
+        del summary["results"]
+        return summary
+
+
+def run_scenario(scenario: Scenario) -> ScenarioResult:
+    """
+    Drives a robot along the route of a scenario, with its own simulated GPIO pins and IBS.
+    The infrared sensor reports the scenario obstacles, and each move drains the battery.
+    """
+    with GPIO.use_context():
+        robot = CleaningRobot(Room(*scenario.room_size))
+        robot.initialize_robot()
+        robot.pos_x, robot.pos_y, robot.heading = scenario.start
+        robot.ibs.charge_left = scenario.initial_charge
+
+        obstacles = set(scenario.obstacles)
+        obstacles_hit = []
+        executed = 0
+        low_power = error = False
+        for command in scenario.route:
+            dx, dy = robot.STEPS[robot.heading]
+            GPIO.set_input(robot.INFRARED_PIN, (robot.pos_x + dx, robot.pos_y + dy) in obstacles)
+            try:
+                result = robot.execute_command(command)
+            except CleaningRobotError:
+                error = True
+                break
+
+            if result is not None and result.startswith("!"):
+                low_power = True
+                break
+            executed += 1
+            if result is not None:
+                obstacles_hit.append((robot.pos_x + dx, robot.pos_y + dy))
+            else:
+                robot.ibs.charge_left -= scenario.charge_per_move
+
+        return ScenarioResult(
+            name=scenario.name,
+            status=f"!{robot.robot_status()}" if low_power else robot.robot_status(),
+            commands_executed=executed,
+            obstacles_hit=tuple(obstacles_hit),
+            battery_used=scenario.initial_charge - robot.ibs.charge_left,
+            low_power=low_power,
+            error=error,
+        )
+
+
+def run_fleet(scenarios: Iterable[Scenario], workers: int = None, chunksize: int = 64) -> FleetReport:
+    """
+    Runs many scenarios in parallel on a pool of processes and merges their results
+    :param scenarios: the scenarios to run
+    :param workers: the number of processes (all the cores by default, 1 to run in the calling process)
+    :param chunksize: the number of scenarios sent to a process at a time
+    """
+    if workers == 1:
+        return FleetReport.merge(map(run_scenario, scenarios))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return FleetReport.merge(pool.map(run_scenario, scenarios, chunksize=chunksize))
@@ -0,0 +1,248 @@
+import bisect
+import os
+import threading
+import time
+from collections import Counter
+
+from src.cleaning_robot import CleaningRobot, CleaningRobotError
+
+# Phases of a command whose latency is measured
+COMMAND = "command"
+ROUTE = "route"  # A whole route (see CleaningRobot.execute_commands)
+BATTERY = "battery"
+INFRARED = "infrared"
+MOTOR = "motor"
+DISPLAY = "display"
+
+# Events counted by the instrumented robot
+COMMANDS = "commands"
+OBSTACLES = "obstacles"
+LOW_POWER = "low_power"
+INVALID_COMMANDS = "invalid_commands"
+
+
+class Histogram:
+    """
+    Latency histogram with fixed buckets, as exported to Prometheus
+    """
+
+    def __init__(self, buckets: tuple[float, ...]):
+        """
+        :param buckets: the upper bounds of the buckets, in seconds, in increasing order
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # The last bucket counts the values above every bound
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative_counts(self) -> list[int]:
+        counts = []
+        total = 0
+        for count in self.counts:
+            total += count
+            counts.append(total)
+        return counts
+
+
+class Metrics:
+    """
+    Latency histograms, event counters and hardware call counts of an instrumented robot (see instrument)
+    """
+
+    # From 1 microsecond (mock hardware) to 5 seconds (a motion on the actual hardware)
+    BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3,
+               1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS, prefix: str = "cleaning_robot"):
+        """
+        :param buckets: the upper bounds of the latency buckets, in seconds
+        :param prefix: the prefix of the exported metric names
+        """
+        self.buckets = buckets
+        self.prefix = prefix
+        self.histograms = {}
+        self.counters = Counter()
+        self.calls = Counter()  # Indexed by (bus, call)
+        # Hardware is also accessed by the background threads (e.g., the display refresh)
+        self.__lock = threading.Lock()
+
+    def histogram(self, phase: str) -> Histogram:
+        with self.__lock:
+            return self.__histogram(phase)
+
+    def observe(self, phase: str, seconds: float) -> None:
+        with self.__lock:
+            self.__histogram(phase).observe(seconds)
+
+    def increment(self, counter: str, amount: int = 1) -> None:
+        with self.__lock:
+            self.counters[counter] += amount
+
+    def count_call(self, bus: str, call: str) -> None:
+        with self.__lock:
+            self.calls[bus, call] += 1
+
+    def snapshot(self) -> dict:
+        """
+        Returns a copy of the metrics, as plain data
+        """
+        with self.__lock:
+            return {
+                "phases": {phase: {"count": h.count, "sum": h.sum, "buckets": dict(zip(h.buckets + (float("inf"),), h.cumulative_counts()))}
+                           for phase, h in self.histograms.items()},
+                "counters": dict(self.counters),
+                "calls": {f"{bus}.{call}": count for (bus, call), count in self.calls.items()},
+            }
+
+    def to_prometheus(self) -> str:
+        """
+        Returns the metrics in the Prometheus text exposition format
+        """
+        name = f"{self.prefix}_phase_seconds"
+        lines = [f"# HELP {name} Latency of the phases of the executed commands.", f"# TYPE {name} histogram"]
+        with self.__lock:
+            for phase, histogram in sorted(self.histograms.items()):
+                bounds = [repr(bound) for bound in histogram.buckets] + ["+Inf"]
+                for bound, count in zip(bounds, histogram.cumulative_counts()):
+                    lines.append(f'{name}_bucket{{phase="{phase}",le="{bound}"}} {count}')
+                lines.append(f'{name}_sum{{phase="{phase}"}} {histogram.sum!r}')
+                lines.append(f'{name}_count{{phase="{phase}"}} {histogram.count}')
+
+            for counter, value in sorted(self.counters.items()):
+                lines.append(f"# TYPE {self.prefix}_{counter}_total counter")
+                lines.append(f"{self.prefix}_{counter}_total {value}")
+
+            name = f"{self.prefix}_hardware_calls_total"
+            lines.append(f"# HELP {name} Calls to the GPIO and I2C devices.")
+            lines.append(f"# TYPE {name} counter")
+            for (bus, call), value in sorted(self.calls.items()):
+                lines.append(f'{name}{{bus="{bus}",call="{call}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """
+        Atomically writes the metrics to a file, in the Prometheus text format
+        (e.g., for the textfile collector of the node exporter)
+        """
+        temporary_path = path + ".tmp"
+        with open(temporary_path, "w") as f:
+            f.write(self.to_prometheus())
+        os.replace(temporary_path, path)
+
+    def __histogram(self, phase: str) -> Histogram:
+        histogram = self.histograms.get(phase)
+        if histogram is None:
+            histogram = self.histograms[phase] = Histogram(self.buckets)
+        return histogram
+
+
+class CountingProxy:
+    """
+    Forwards every attribute access to a hardware library or device, counting the calls
+    """
+
+    def __init__(self, target, metrics: Metrics, bus: str):
+        self.__target = target
+        self.__metrics = metrics
+        self.__bus = bus
+
+    def __getattr__(self, name: str):
+        value = getattr(self.__target, name)
+        if not callable(value) or isinstance(value, type):
+            return value
+
+        metrics, bus = self.__metrics, self.__bus
+
+        def counted(*args, **kwargs):
+            metrics.count_call(bus, name)
+            return value(*args, **kwargs)
+        return counted
+
+
+def instrument(robot: CleaningRobot, metrics: Metrics = None) -> Metrics:
+    """
+    Starts measuring the phases of the commands executed by a robot, and counting its events and
+    hardware calls. A robot that is not instrumented runs exactly the same code as before, so the
+    instrumentation costs nothing until it is enabled.
+    :param robot: the robot to instrument
+    :param metrics: where to record the measurements (new metrics by default)
+    :return: the metrics of the robot
+    """
+    metrics = metrics if metrics is not None else Metrics()
+
+    # Only the instances are changed: timed functions shadow the methods of the classes
+    robot.execute_command = _timed_command(metrics, robot.execute_command)
+    robot.execute_commands = _timed_route(metrics, robot.execute_commands)
+    # Every IBS read goes through read(), including the cache misses of get_charge_left()
+    robot.battery.read = _timed(metrics, BATTERY, robot.battery.read)
+    robot.obstacle_found = _timed(metrics, INFRARED, robot.obstacle_found)
+    robot.activate_wheel_motor = _timed(metrics, MOTOR, robot.activate_wheel_motor)
+    robot.activate_wheel_motor_for = _timed(metrics, MOTOR, robot.activate_wheel_motor_for)
+    robot.activate_rotation_motor = _timed(metrics, MOTOR, robot.activate_rotation_motor)
+    robot.display_manager.update_display_info = _timed(metrics, DISPLAY, robot.display_manager.update_display_info)
+    robot.display_manager.update_display_low_power = _timed(metrics, DISPLAY, robot.display_manager.update_display_low_power)
+
+    gpio = CountingProxy(robot.gpio, metrics, "gpio")
+    robot.gpio = robot.motor_driver.gpio = robot.obstacle_sensor.gpio = gpio
+    robot.battery.ibs = CountingProxy(robot.battery.ibs, metrics, "i2c")
+    robot.display_manager.display = CountingProxy(robot.display_manager.display, metrics, "i2c")
+    return metrics
+
+
+def _timed(metrics: Metrics, phase: str, function):
+    metrics.histogram(phase)  # Exported even before the first measurement
+    clock = time.perf_counter
+
+    def timed(*args, **kwargs):
+        start = clock()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            metrics.observe(phase, clock() - start)
+    return timed
+
+
+def _timed_command(metrics: Metrics, execute_command):
+    timed_execute_command = _timed(metrics, COMMAND, execute_command)
+
+    def execute(command):
+        try:
+            result = timed_execute_command(command)
+        except CleaningRobotError:
+            metrics.increment(INVALID_COMMANDS)
+            raise
+        _count_result(metrics, result)
+        return result
+    return execute
+
+
+def _timed_route(metrics: Metrics, execute_commands):
+    timed_execute_commands = _timed(metrics, ROUTE, execute_commands)
+
+    def execute(commands, *args, **kwargs):
+        try:
+            results = timed_execute_commands(commands, *args, **kwargs)
+        except CleaningRobotError:
+            metrics.increment(INVALID_COMMANDS)
+            raise
+        if results:
+            # Only the last command of a route can be interrupted
+            metrics.increment(COMMANDS, len(results) - 1)
+            _count_result(metrics, results[-1])
+        return results
+    return execute
+
+
+def _count_result(metrics: Metrics, result: str | None) -> None:
+    metrics.increment(COMMANDS)
+    if result is None:
+        return
+    if result.startswith("!"):
+        metrics.increment(LOW_POWER)
+    elif "),(" in result:
+        metrics.increment(OBSTACLES)
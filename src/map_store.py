@@ -0,0 +1,156 @@
+import fcntl
+import mmap
+import os
+import re
+import struct
+from contextlib import contextmanager
+
+from src.room import Room
+
+ALL_LAYERS = Room.OBSTACLE | Room.VISITED | Room.CLEANED
+
+# Magic, format, max x, max y, version of the map; the grid follows, one byte per cell
+HEADER = struct.Struct("<4sHxxiiQ")
+MAGIC = b"CRMP"
+FORMAT = 1
+
+
+class MapStore:
+    """
+    Persistent store of the maps learned by the robot (obstacles, visited and cleaned cells),
+    one file per room in a directory. The maps are memory-mapped, so that loading even a big
+    map is instant and the processes reading the same map share its memory.
+
+    Each map has a version, incremented by every save or update. Writers hold
+    a lock on the map, and a new version replaces the file at once: the rooms already loaded
+    keep seeing the version they loaded, and a crash never leaves a partially written map.
+    """
+
+    SUFFIX = ".map"
+    LOCK_SUFFIX = ".lock"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def rooms(self) -> list[str]:
+        return sorted(name[:-len(self.SUFFIX)] for name in os.listdir(self.directory) if name.endswith(self.SUFFIX))
+
+    def version(self, name: str) -> int:
+        """
+        Returns the version of a map, 0 if it is not stored
+        """
+        try:
+            with open(self.__path(name), "rb") as f:
+                return self.__read_header(f.read(HEADER.size))[2]
+        except FileNotFoundError:
+            return 0
+
+    def save(self, name: str, room: Room, layers: int = ALL_LAYERS) -> int:
+        """
+        Stores the whole map of a room, replacing the stored one (if any)
+        :param name: the name of the room
+        :param room: the room to store
+        :param layers: the flags of the cells to store (e.g., Room.OBSTACLE to store only the obstacles)
+        :return: the new version of the map
+        """
+        path = self.__path(name)
+        grid = room.export_grid()
+        if layers != ALL_LAYERS:
+            grid = grid.translate(_mask_table(layers))
+
+        with self.__lock(name):
+            version = self.version(name) + 1
+            self.__write(path, room.max_x, room.max_y, version, grid)
+        return version
+
+    def load(self, name: str, writable: bool = False) -> Room:
+        """
+        Maps a stored room into memory, without reading it
+        :param name: the name of the room
+        :param writable: if False, the grid is read-only and shared with the other processes mapping
+                         the room; if True, changes are private to the returned room (see update)
+        :return: the room
+        """
+        with open(self.__path(name), "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY if writable else mmap.ACCESS_READ)
+        max_x, max_y, _ = self.__read_header(data[:HEADER.size])
+        return Room.with_grid(max_x, max_y, memoryview(data)[HEADER.size:])
+
+    def update(self, name: str, room: Room, base_version: int = None, layers: int = ALL_LAYERS) -> int:
+        """
+        Stores the changes made to a room (e.g., after a run of the robot). The version check and
+        the write are done under the lock of the map, so that of concurrent updates based on the
+        same version, only the first one succeeds.
+        :param name: the name of the room
+        :param room: the room, with the same size as the stored one
+        :param base_version: if set, the version the changes are based on; the update fails
+                             with StaleMapError if the map was changed in the meantime
+        :param layers: the flags of the cells to update; the other flags are left as stored
+        :return: the new version of the map
+        """
+        path = self.__path(name)
+        grid = room.export_grid()
+        with self.__lock(name):
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                max_x, max_y, version = self.__read_header(data[:HEADER.size])
+                stored = data[HEADER.size:]
+            if (max_x, max_y) != (room.max_x, room.max_y):
+                raise ValueError("The room size does not match the stored map")
+            if base_version is not None and base_version != version:
+                raise StaleMapError(f"The map of {name} is at version {version}, not {base_version}")
+
+            if layers != ALL_LAYERS:
+                grid = _merge(stored.translate(_mask_table(~layers & 0xFF)), grid.translate(_mask_table(layers)))
+            version += 1
+            self.__write(path, max_x, max_y, version, grid)
+        return version
+
+    def __path(self, name: str) -> str:
+        if not re.fullmatch(r"\w[\w.-]*", name):
+            raise ValueError(f"Invalid room name {name!r}")
+        return os.path.join(self.directory, name + self.SUFFIX)
+
+    @contextmanager
+    def __lock(self, name: str):
+        # Exclusive lock of a map, between the threads and the processes writing it
+        with open(os.path.join(self.directory, name + self.LOCK_SUFFIX), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    @staticmethod
+    def __write(path: str, max_x: int, max_y: int, version: int, grid: bytes) -> None:
+        # Writes a new file, then replaces the map with it at once
+        temporary_path = path + ".tmp"
+        with open(temporary_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, FORMAT, max_x, max_y, version))
+            f.write(grid)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary_path, path)
+
+    @staticmethod
+    def __read_header(header: bytes) -> tuple[int, int, int]:
+        if len(header) < HEADER.size:
+            raise ValueError("The map is truncated")
+        magic, file_format, max_x, max_y, version = HEADER.unpack(header)
+        if magic != MAGIC or file_format != FORMAT:
+            raise ValueError("Not a map of the supported format")
+        return max_x, max_y, version
+
+
+class StaleMapError(Exception):
+    pass
+
+
+def _mask_table(flags: int) -> bytes:
+    # Maps each cell value to the value with only the given flags
+    return bytes(value & flags for value in range(256))
+
+
+def _merge(a: bytes, b: bytes) -> bytes:
+    # Bitwise OR of two byte strings of the same length, computed in C by big integers
+    return (int.from_bytes(a, "little") | int.from_bytes(b, "little")).to_bytes(len(a), "little")
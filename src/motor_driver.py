@@ -0,0 +1,181 @@
+import asyncio
+
+from src.pin_transaction import PinTransaction
+
+
+class MotorDriver:
+    """
+    Non-blocking driver for the wheel and rotation motors. Motions are coroutines, so that other
+    work (e.g., sensor polling or display updates) can run while a motor is moving.
+    """
+
+    MOTION_TIME = 1  # Seconds needed by a motor to complete a motion on the actual hardware
+    RAMP_TIME = 0.2  # Seconds needed by the wheel motor to reach full speed, or to stop, in a run of forward moves
+    RAMP_STEPS = 4  # Duty cycle changes of a ramp
+    PWM_FREQUENCY = 1000  # Hz
+
+    def __init__(self, gpio, wheel_pins: tuple[int, int, int], rotation_pins: tuple[int, int, int], stby_pin: int, motion_time: float):
+        """
+        :param gpio: the GPIO library to use
+        :param wheel_pins: the IN1, IN2 and PWM pins of the wheel motor
+        :param rotation_pins: the IN1, IN2 and PWM pins of the rotation motor
+        :param stby_pin: the standby pin shared by both motors
+        :param motion_time: the time to wait for a motion to complete (0 when not deploying on the actual hardware)
+        """
+        self.gpio = gpio
+        self.wheel_pins = wheel_pins
+        self.rotation_pins = rotation_pins
+        self.stby_pin = stby_pin
+        self.motion_time = motion_time
+        self.aborted = False  # Whether the last forward motion was aborted
+        self.__forward_abort = None
+        self.__pwm = None  # Created on the first run of forward moves
+
+    async def move_forward(self) -> bool:
+        """
+        Moves the robot forward by one cell, driving the wheel motor clockwise
+        :return: False if the motion was aborted (see abort_forward_motion), True otherwise
+        """
+        self.__forward_abort = self.__new_abort()
+        try:
+            self.aborted = not await self.__drive(self.wheel_pins, self.gpio.HIGH, self.gpio.LOW, self.__forward_abort)
+        finally:
+            self.__forward_abort = None
+        return not self.aborted
+
+    async def move_forward_cells(self, cells: int, can_enter=None) -> int:
+        """
+        Moves the robot forward by several cells, keeping the wheel motor running between them.
+        The motor accelerates and brakes with duty cycle ramps on its PWM pin.
+        :param cells: the number of cells to move by
+        :param can_enter: called at each cell boundary with the number of cells moved so far;
+                          the robot stops there if it returns False
+        :return: the number of cells moved, fewer than cells if the robot stopped or the motion was aborted
+        """
+        if can_enter is not None and not can_enter(0):
+            return 0
+
+        in1, in2, pwm_pin = self.wheel_pins
+        if self.__pwm is None:
+            self.__pwm = self.gpio.PWM(pwm_pin, self.PWM_FREQUENCY)
+        self.__forward_abort = self.__new_abort()
+        moved = 0
+        completed = True
+        try:
+            with PinTransaction(self.gpio) as pins:
+                pins.output(in1, self.gpio.HIGH).output(in2, self.gpio.LOW).output(self.stby_pin, self.gpio.HIGH)
+            self.__pwm.start(0)
+            await self.__ramp(0, 100)
+            while completed:
+                if self.motion_time:
+                    completed = await self.__wait_motion(self.__forward_abort)
+                if completed:
+                    moved += 1
+                    if moved == cells or (can_enter is not None and not can_enter(moved)):
+                        break
+            if completed:
+                await self.__ramp(100, 0)
+        finally:
+            # Stop the motor at once if the motion was aborted or cancelled
+            self.__forward_abort = None
+            self.__pwm.stop()
+            self.gpio.output([in1, in2, self.stby_pin], self.gpio.LOW)
+        self.aborted = not completed
+        return moved
+
+    def abort_forward_motion(self) -> None:
+        """
+        Stops the wheel motor if it is moving. It can be called from any thread (e.g., a GPIO callback).
+        """
+        abort = self.__forward_abort
+        if abort is not None:
+            try:
+                abort.get_loop().call_soon_threadsafe(self.__resolve, abort)
+            except RuntimeError:
+                pass  # The motion ended, and its event loop was closed, in the meantime
+
+    async def rotate(self, direction: str) -> None:
+        """
+        Rotates the robot towards a given direction
+        :param direction: "l" to turn left, "r" to turn right
+        """
+        if direction == "l":
+            await self.__drive(self.rotation_pins, self.gpio.HIGH, self.gpio.LOW)
+        elif direction == "r":
+            await self.__drive(self.rotation_pins, self.gpio.LOW, self.gpio.HIGH)
+        else:
+            await self.__drive(self.rotation_pins, None, None)
+
+    async def pulse(self, pin: int, duration: float) -> None:
+        """
+        Drives a pin high for the given time (e.g., to play the buzzer); like the motions, the pin
+        is only held when the motions are timed
+        """
+        self.gpio.output(pin, self.gpio.HIGH)
+        try:
+            if duration and self.motion_time:
+                await asyncio.sleep(duration)
+        finally:
+            self.gpio.output(pin, self.gpio.LOW)
+
+    def run(self, motion):
+        """
+        Runs a motion to completion, blocking the caller, in an event loop closed afterwards (a
+        timed motion lasts far longer than creating the loop). Without motion time the motions
+        never wait, so they are stepped to completion directly, without an event loop.
+        :param motion: a coroutine of this driver (e.g., driver.move_forward())
+        """
+        if not self.motion_time:
+            try:
+                motion.send(None)
+            except StopIteration as completed:
+                return completed.value
+            motion.close()
+            raise RuntimeError("A motion waited without motion time")
+        with asyncio.Runner() as runner:
+            return runner.run(motion)
+
+    async def __drive(self, pins: tuple[int, int, int], in1_value: int | None, in2_value: int | None, abort=None) -> bool:
+        in1, in2, pwm = pins
+        with PinTransaction(self.gpio) as transaction:
+            if in1_value is not None:
+                transaction.output(in1, in1_value).output(in2, in2_value)
+            # Set the motor speed
+            transaction.output(pwm, self.gpio.HIGH)
+            # Disable STBY
+            transaction.output(self.stby_pin, self.gpio.HIGH)
+
+        completed = True
+        try:
+            if self.motion_time:
+                completed = await self.__wait_motion(abort)  # Wait for the motor to actually move
+        finally:
+            # Stop the motor, also when the motion is cancelled
+            self.gpio.output([in1, in2, pwm, self.stby_pin], self.gpio.LOW)
+        return completed
+
+    async def __ramp(self, start: float, end: float) -> None:
+        for step in range(1, self.RAMP_STEPS + 1):
+            self.__pwm.ChangeDutyCycle(start + (end - start) * step / self.RAMP_STEPS)
+            if self.motion_time:
+                await asyncio.sleep(self.RAMP_TIME / self.RAMP_STEPS)
+
+    async def __wait_motion(self, abort) -> bool:
+        if abort is None:
+            await asyncio.sleep(self.motion_time)
+            return True
+        try:
+            # Shielded, so that the abort still works for the next cells of a run
+            await asyncio.wait_for(asyncio.shield(abort), self.motion_time)
+            return False
+        except asyncio.TimeoutError:
+            return True
+
+    def __new_abort(self):
+        # Nothing can be aborted when the motions do not wait
+        return asyncio.get_running_loop().create_future() if self.motion_time else None
+
+    @staticmethod
+    def __resolve(abort) -> None:
+        if not abort.done():
+            abort.set_result(None)
@@ -0,0 +1,166 @@
+import heapq
+
+from src.cleaning_robot import CleaningRobot, CleaningRobotError
+from src.robot_state import DX, DY, HEADING_INDEX
+from src.room import Room
+
+INF = float("inf")
+
+
+class Navigator:
+    """
+    Drives a robot to a target cell with D* Lite. The search runs backwards from the target
+    over (x, y, heading) states, so that the costs computed so far stay valid when the robot
+    moves, and an obstacle found along the way only repairs the affected part of the search.
+    """
+
+    def __init__(self, robot: CleaningRobot, turn_cost: float = 2):
+        """
+        :param robot: the robot to drive; its room holds the known obstacles
+        :param turn_cost: the cost of a rotation, compared to the cost of a forward movement (i.e., 1)
+        """
+        if turn_cost <= 0:
+            raise CleaningRobotError
+        self.robot = robot
+        self.turn_cost = turn_cost
+        self.expanded = 0  # Number of states expanded by the search, for diagnostics
+
+    @property
+    def room(self) -> Room:
+        return self.robot.room
+
+    def navigate_to(self, target: tuple[int, int]) -> str:
+        """
+        Moves the robot to the target cell, replanning whenever an obstacle is found
+        :param target: the (x, y) cell to reach
+        :return: the status of the robot at the end of the navigation ("!(x,y,H)" if the battery ran low)
+        """
+        if not self.room.is_position_valid(target) or self.room.has_obstacle(target):
+            raise CleaningRobotError
+
+        self.__initialize(target)
+        start = self.__robot_state()
+        last = start
+        self.__compute_shortest_path(start)
+
+        while start[:2] != target:
+            if self.__g(start) == INF:
+                raise CleaningRobotError
+
+            command, next_state = self.__get_best_move(start)
+            result = self.robot.execute_command(command)
+            if result is not None and result.startswith("!"):
+                return result
+
+            if self.__robot_state() == next_state:
+                start = next_state
+                continue
+
+            # The robot found an obstacle (already recorded in the room): only the forward
+            # edges entering the obstacle cell changed, so only their sources are updated
+            self.km += self.__heuristic(last, start)
+            last = start
+            ox, oy = next_state[0], next_state[1]
+            for heading in range(4):
+                self.__update_vertex((ox - DX[heading], oy - DY[heading], heading))
+            self.__compute_shortest_path(start)
+
+        return self.robot.robot_status()
+
+    def __initialize(self, target: tuple[int, int]) -> None:
+        self.target = target
+        self.km = 0
+        self.g = {}
+        self.rhs = {}
+        self.queue = []
+        self.open = {}
+        for heading in range(4):
+            goal = (target[0], target[1], heading)
+            self.rhs[goal] = 0
+            self.__push(goal)
+
+    def __robot_state(self) -> tuple[int, int, int]:
+        return self.robot.pos_x, self.robot.pos_y, HEADING_INDEX[self.robot.heading]
+
+    def __get_best_move(self, state: tuple[int, int, int]) -> tuple[str, tuple[int, int, int]]:
+        x, y, heading = state
+        moves = (
+            (CleaningRobot.FORWARD, (x + DX[heading], y + DY[heading], heading)),
+            (CleaningRobot.LEFT, (x, y, (heading - 1) % 4)),
+            (CleaningRobot.RIGHT, (x, y, (heading + 1) % 4)),
+        )
+        return min(moves, key=lambda move: self.__cost(state, move[1]) + self.__g(move[1]))
+
+    def __g(self, state) -> float:
+        return self.g.get(state, INF)
+
+    def __rhs(self, state) -> float:
+        return self.rhs.get(state, INF)
+
+    def __heuristic(self, a, b) -> float:
+        return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+    def __calculate_key(self, state) -> tuple[float, float]:
+        k = min(self.__g(state), self.__rhs(state))
+        return k + self.__heuristic(self.__robot_state(), state) + self.km, k
+
+    def __cost(self, source, destination) -> float:
+        if source[2] != destination[2]:
+            return self.turn_cost
+        if self.room.is_position_valid(destination[:2]) and not self.room.is_marked(destination[:2], Room.OBSTACLE):
+            return 1
+        return INF
+
+    def __successors(self, state):
+        x, y, heading = state
+        yield x + DX[heading], y + DY[heading], heading
+        yield x, y, (heading - 1) % 4
+        yield x, y, (heading + 1) % 4
+
+    def __predecessors(self, state):
+        x, y, heading = state
+        if self.room.is_position_valid((x - DX[heading], y - DY[heading])):
+            yield x - DX[heading], y - DY[heading], heading
+        yield x, y, (heading - 1) % 4
+        yield x, y, (heading + 1) % 4
+
+    def __update_vertex(self, state) -> None:
+        if not self.room.is_position_valid(state[:2]):
+            return
+        if state[:2] != self.target:
+            self.rhs[state] = min(self.__cost(state, s) + self.__g(s) for s in self.__successors(state))
+        self.open.pop(state, None)
+        if self.__g(state) != self.__rhs(state):
+            self.__push(state)
+
+    def __push(self, state) -> None:
+        key = self.__calculate_key(state)
+        self.open[state] = key
+        heapq.heappush(self.queue, (key, state))
+
+    def __top_key(self) -> tuple[float, float]:
+        # Entries removed from the open set are left in the heap and skipped here
+        while self.queue and self.open.get(self.queue[0][1]) != self.queue[0][0]:
+            heapq.heappop(self.queue)
+        return self.queue[0][0] if self.queue else (INF, INF)
+
+    def __compute_shortest_path(self, start) -> None:
+        while self.__top_key() < self.__calculate_key(start) or self.__rhs(start) != self.__g(start):
+            if not self.queue:
+                return
+            old_key, state = heapq.heappop(self.queue)
+            del self.open[state]
+            self.expanded += 1
+
+            new_key = self.__calculate_key(state)
+            if old_key < new_key:
+                self.__push(state)
+            elif self.__g(state) > self.__rhs(state):
+                self.g[state] = self.__rhs(state)
+                for predecessor in self.__predecessors(state):
+                    self.__update_vertex(predecessor)
+            else:
+                self.g[state] = INF
+                self.__update_vertex(state)
+                for predecessor in self.__predecessors(state):
+                    self.__update_vertex(predecessor)
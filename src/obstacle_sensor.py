@@ -0,0 +1,59 @@
+import threading
+import time
+
+
+class ObstacleSensor:
+    """
+    Interrupt-driven infrared obstacle sensor. The level of the sensor pin is cached and kept up to date
+    by GPIO edge events, so checking for an obstacle does not read the pin. Since the edges following
+    an event are ignored for the bounce time, the pin is read until the first check after it.
+    """
+
+    BOUNCE_TIME = 10  # Milliseconds
+
+    def __init__(self, gpio, pin: int, bouncetime: int = BOUNCE_TIME):
+        """
+        :param gpio: the GPIO library to use
+        :param pin: the pin of the infrared distance sensor (HIGH when an obstacle is found)
+        :param bouncetime: the time during which edges following an event are ignored
+        """
+        self.gpio = gpio
+        self.pin = pin
+        self.bouncetime = bouncetime
+        self.listeners = []
+        self.__obstacle_detected = bool(gpio.input(pin))
+        self.__unsettled_until = None  # The end of the bounce time of the last edge, until the pin is read after it
+        self.__lock = threading.Lock()
+
+        gpio.remove_event_detect(pin)
+        gpio.add_event_detect(pin, gpio.BOTH, callback=self.__on_edge, bouncetime=bouncetime)
+
+    @property
+    def obstacle_detected(self) -> bool:
+        if self.__unsettled_until is not None:
+            # The edge of the settled level may have been ignored
+            with self.__lock:
+                if self.__unsettled_until is not None:
+                    self.__obstacle_detected = bool(self.gpio.input(self.pin))
+                    if time.monotonic() >= self.__unsettled_until:
+                        self.__unsettled_until = None
+        return self.__obstacle_detected
+
+    def add_listener(self, listener) -> None:
+        """
+        Registers a function to call, without arguments, as soon as an obstacle appears.
+        On the actual hardware it is called from the GPIO event thread.
+        """
+        self.listeners.append(listener)
+
+    def close(self) -> None:
+        self.gpio.remove_event_detect(self.pin)
+
+    def __on_edge(self, channel: int) -> None:
+        with self.__lock:
+            self.__obstacle_detected = obstacle_detected = bool(self.gpio.input(channel))
+            if self.bouncetime:
+                self.__unsettled_until = time.monotonic() + self.bouncetime / 1000
+        if obstacle_detected:
+            for listener in self.listeners:
+                listener()
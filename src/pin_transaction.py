@@ -0,0 +1,41 @@
+class PinTransaction:
+    """
+    Collects the output changes of several pins and writes them with a single GPIO call (a list
+    of channels), so that the pins never go through inconsistent intermediate states, such as
+    a motor taken out of standby before its direction is set.
+
+    Used as a context manager, the changes are written when the with block ends, and dropped
+    if it raises an exception.
+    """
+
+    def __init__(self, gpio):
+        """
+        :param gpio: the GPIO library to use
+        """
+        self.gpio = gpio
+        self.levels = {}  # In the order the channels were first changed
+
+    def output(self, channel: int, value: int) -> "PinTransaction":
+        """
+        Changes the level of a channel when the transaction is committed. Changing a channel
+        again replaces its level.
+        """
+        self.levels[channel] = value
+        return self
+
+    def commit(self) -> None:
+        if self.levels:
+            self.gpio.output(list(self.levels), list(self.levels.values()))
+            self.levels.clear()
+
+    def rollback(self) -> None:
+        self.levels.clear()
+
+    def __enter__(self) -> "PinTransaction":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
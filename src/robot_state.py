@@ -0,0 +1,42 @@
+from typing import NamedTuple
+
+HEADINGS = ('N', 'E', 'S', 'W')  # Clockwise order
+
+# Precomputed lookup tables, indexed by heading
+TURN_LEFT = {heading: HEADINGS[(i - 1) % 4] for i, heading in enumerate(HEADINGS)}
+TURN_RIGHT = {heading: HEADINGS[(i + 1) % 4] for i, heading in enumerate(HEADINGS)}
+FORWARD_DELTA = {'N': (0, 1), 'E': (1, 0), 'S': (0, -1), 'W': (-1, 0)}
+HEADING_INDEX = {heading: i for i, heading in enumerate(HEADINGS)}
+
+# Displacement of a forward movement, indexed by heading index (e.g., in arrays of headings)
+DX = tuple(FORWARD_DELTA[heading][0] for heading in HEADINGS)
+DY = tuple(FORWARD_DELTA[heading][1] for heading in HEADINGS)
+
+TURNS = {'l': TURN_LEFT, 'r': TURN_RIGHT}
+
+
+class RobotState(NamedTuple):
+    """
+    Immutable position and heading of a robot. Being a tuple, it has no per-instance
+    dictionary, so that millions of states can be kept (e.g., for replay and simulation).
+    """
+    x: int
+    y: int
+    heading: str
+
+    def turned(self, direction: str) -> "RobotState":
+        """
+        :param direction: "l" to turn left, "r" to turn right
+        """
+        return RobotState(self.x, self.y, TURNS[direction][self.heading])
+
+    def moved_forward(self) -> "RobotState":
+        dx, dy = FORWARD_DELTA[self.heading]
+        return RobotState(self.x + dx, self.y + dy, self.heading)
+
+    def forward_position(self) -> tuple[int, int]:
+        dx, dy = FORWARD_DELTA[self.heading]
+        return self.x + dx, self.y + dy
+
+    def status(self) -> str:
+        return f"({self.x},{self.y},{self.heading})"
@@ -1,4 +1,14 @@
+import re
+from functools import cache
+
+
 class Room:
+
+    # Flags stored in each cell of the occupancy grid
+    OBSTACLE = 1
+    VISITED = 2
+    CLEANED = 4
+
     def __init__(self, x, y):
         if x is not None:
             self.max_x = x
@@ -10,6 +20,81 @@ class Room:
         else:
             self.max_y = 2
 
+        # One byte per cell, row by row starting from (0,0)
+        self.grid = bytearray(self.width * self.height)
+
+    @classmethod
+    def with_grid(cls, x: int, y: int, grid) -> "Room":
+        """
+        Creates a room whose occupancy grid is backed by an existing buffer
+        (e.g., a memory-mapped file for very large rooms)
+        :param x: the maximum x coordinate of the room
+        :param y: the maximum y coordinate of the room
+        :param grid: a writable buffer of (x + 1) * (y + 1) bytes
+        """
+        room = cls.__new__(cls)
+        room.max_x = x
+        room.max_y = y
+        if len(grid) != room.width * room.height:
+            raise ValueError("The grid size does not match the room size")
+        room.grid = grid
+        return room
+
+    @property
+    def width(self) -> int:
+        return self.max_x + 1
+
+    @property
+    def height(self) -> int:
+        return self.max_y + 1
+
     def is_position_valid(self, position: tuple[int, int]) -> bool:
         x, y = position
-        return 0 <= x <= self.max_x and 0 <= y <= self.max_y
\ No newline at end of file
+        return 0 <= x <= self.max_x and 0 <= y <= self.max_y
+
+    def mark(self, position: tuple[int, int], flag: int) -> None:
+        self.grid[self.__index(position)] |= flag
+
+    def unmark(self, position: tuple[int, int], flag: int) -> None:
+        self.grid[self.__index(position)] &= ~flag & 0xFF
+
+    def is_marked(self, position: tuple[int, int], flag: int) -> bool:
+        return bool(self.grid[self.__index(position)] & flag)
+
+    def has_obstacle(self, position: tuple[int, int]) -> bool:
+        return self.is_position_valid(position) and self.is_marked(position, self.OBSTACLE)
+
+    def count(self, flag: int) -> int:
+        # Map the cells to 1 if they contain the flag, and count them in C
+        grid = self.grid if isinstance(self.grid, (bytes, bytearray)) else bytes(self.grid)
+        return grid.translate(_flag_table(flag)).count(1)
+
+    def get_positions(self, flag: int) -> list[tuple[int, int]]:
+        """
+        Returns the positions of all the cells marked with the given flag
+        """
+        width = self.width
+        return [(m.start() % width, m.start() // width) for m in self.__find(flag)]
+
+    def export_grid(self) -> bytes:
+        """
+        Returns a copy of the occupancy grid, one byte per cell, row by row starting from (0,0)
+        """
+        return bytes(self.grid)
+
+    def __find(self, flag: int):
+        # Scan the grid in C by matching every byte value that contains the flag
+        values = bytes(v for v in range(256) if v & flag)
+        return re.finditer(b"[" + re.escape(values) + b"]", self.grid)
+
+    def __index(self, position: tuple[int, int]) -> int:
+        if not self.is_position_valid(position):
+            raise IndexError(f"Position {position} is outside the room")
+        x, y = position
+        return y * self.width + x
+
+
+@cache
+def _flag_table(flag: int) -> bytes:
+    # Maps each byte of the occupancy grid to 1 if it contains the flag, 0 otherwise
+    return bytes(1 if value & flag else 0 for value in range(256))
@@ -0,0 +1,54 @@
+import numpy as np
+
+from src.cleaning_robot import CleaningRobot, CleaningRobotError
+from src import robot_state
+from src.robot_state import HEADING_INDEX
+from src.room import Room
+
+# The displacements of robot_state, as arrays to index with arrays of headings
+DX = np.array(robot_state.DX, dtype=np.int64)
+DY = np.array(robot_state.DY, dtype=np.int64)
+
+
+def plan_route(commands: str, start: tuple[int, int, str] = (0, 0, CleaningRobot.N)) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Computes the position and heading of the robot after each command of a route,
+    assuming that no obstacle is found along the way
+    :param commands: the route string (e.g., "ffrf")
+    :param start: the status of the robot before the route, as (x, y, heading)
+    :return: the x coordinates, y coordinates and heading indexes (see CleaningRobot.HEADINGS)
+    """
+    x, y, heading = start
+    if heading not in CleaningRobot.HEADINGS:
+        raise CleaningRobotError
+
+    codes = np.frombuffer(commands.encode(), dtype=np.uint8)
+    forward = codes == ord(CleaningRobot.FORWARD)
+    left = codes == ord(CleaningRobot.LEFT)
+    right = codes == ord(CleaningRobot.RIGHT)
+    if not np.all(forward | left | right):
+        raise CleaningRobotError
+
+    # A rotation is a +1/-1 step on the headings, so the heading is a cumulative sum mod 4
+    rotations = right.astype(np.int64) - left.astype(np.int64)
+    headings = (HEADING_INDEX[heading] + np.cumsum(rotations)) % 4
+
+    # Only forward commands move the robot, along the heading they are executed with
+    xs = x + np.cumsum(np.where(forward, DX[headings], 0))
+    ys = y + np.cumsum(np.where(forward, DY[headings], 0))
+    return xs, ys, headings
+
+
+def find_first_invalid_step(room: Room, commands: str, start: tuple[int, int, str] = (0, 0, CleaningRobot.N)) -> int | None:
+    """
+    Finds the first command of a route that would move the robot out of the room
+    :param room: the room where the route is executed
+    :param commands: the route string (e.g., "ffrf")
+    :param start: the status of the robot before the route, as (x, y, heading)
+    :return: the index of the first invalid command, or None if the whole route is valid
+    """
+    xs, ys, _ = plan_route(commands, start)
+    invalid = (xs < 0) | (xs > room.max_x) | (ys < 0) | (ys > room.max_y)
+    if not invalid.any():
+        return None
+    return int(np.argmax(invalid))
@@ -0,0 +1,109 @@
+from typing import NamedTuple
+
+from src.cleaning_robot import CleaningRobot, CleaningRobotError
+from src.coverage_planner import ROTATIONS
+from src.motor_driver import MotorDriver
+from src.robot_state import DX, DY
+
+
+class OptimizedRoute(NamedTuple):
+    commands: str
+    original_time: float  # Estimated execution time of the original route, in seconds
+    time: float  # Estimated execution time of the optimized route, in seconds
+
+    @property
+    def time_saved(self) -> float:
+        return self.original_time - self.time
+
+
+def estimate_time(commands: str, motion_time: float = MotorDriver.MOTION_TIME) -> float:
+    """
+    Estimates the time needed to execute a route, since every motion (a forward movement
+    or a rotation) takes the same time on the actual hardware
+    """
+    return len(commands) * motion_time
+
+
+def optimize_route(commands: str, motion_time: float = MotorDriver.MOTION_TIME) -> OptimizedRoute:
+    """
+    Rewrites a route into an equivalent one that is faster to execute: the robot visits the same
+    cells and ends in the same position and heading, wherever it starts from. Consecutive rotations
+    are merged into the cheapest one (e.g., "lr" is dropped and "rrr" becomes "l"), and detours
+    that bring the robot back to a cell without visiting any cell for the first time are removed.
+    :param commands: the route string (e.g., "ffrrrf")
+    :param motion_time: the time needed by a motion, to estimate the time saved
+    :return: the optimized route
+    """
+    moves, heading = _trace(commands)
+    optimized = _to_commands(_remove_detours(moves), heading)
+    if len(optimized) > len(commands):
+        optimized = commands
+    return OptimizedRoute(optimized, estimate_time(commands, motion_time), estimate_time(optimized, motion_time))
+
+
+def _trace(commands: str) -> tuple[list[tuple[int, tuple[int, int]]], int]:
+    # Returns the heading index and the resulting position of every forward movement, relative
+    # to a robot starting at (0,0) heading north, and the final heading index
+    heading = 0
+    x = y = 0
+    moves = []
+    for command in commands:
+        match command:
+            case CleaningRobot.FORWARD:
+                x += DX[heading]
+                y += DY[heading]
+                moves.append((heading, (x, y)))
+            case CleaningRobot.LEFT:
+                heading = (heading - 1) % 4
+            case CleaningRobot.RIGHT:
+                heading = (heading + 1) % 4
+            case _:
+                raise CleaningRobotError
+    return moves, heading
+
+
+def _remove_detours(moves: list[tuple[int, tuple[int, int]]]) -> list[tuple[int, tuple[int, int]]]:
+    # How many times each cell is visited by the moves still to be read
+    future_visits = {}
+    for _, position in moves:
+        future_visits[position] = future_visits.get(position, 0) + 1
+
+    # The kept moves, as (heading, position, index of the previous kept move to the same position)
+    kept = [(0, (0, 0), None)]
+    last_index = {(0, 0): 0}  # Index in kept of the last move to each position
+    first_index = {(0, 0): 0}  # Index in kept of the first move to each position
+    # The last kept move that is the first one to its cell, when the cell is never visited again:
+    # a detour after it is dead, since every other cell is also visited before or after the detour
+    last_needed = 0
+    for heading, position in moves:
+        future_visits[position] -= 1
+        if not future_visits[position] and position in first_index:
+            last_needed = max(last_needed, first_index[position])
+        i = last_index.get(position)
+        if i is not None and last_needed <= i:
+            # Back where it was: drop the moves of the detour and this one
+            while len(kept) > i + 1:
+                _, cell, previous = kept.pop()
+                if previous is None:
+                    del last_index[cell], first_index[cell]
+                else:
+                    last_index[cell] = previous
+            continue
+        kept.append((heading, position, i))
+        last_index[position] = len(kept) - 1
+        if i is None:
+            first_index[position] = len(kept) - 1
+            if not future_visits[position]:
+                last_needed = len(kept) - 1
+    return [(heading, position) for heading, position, _ in kept[1:]]
+
+
+def _to_commands(moves: list[tuple[int, tuple[int, int]]], final_heading: int) -> str:
+    commands = []
+    heading = 0
+    for move_heading, _ in moves:
+        commands.append(ROTATIONS[(move_heading - heading) % 4])
+        commands.append(CleaningRobot.FORWARD)
+        heading = move_heading
+    commands.append(ROTATIONS[(final_heading - heading) % 4])
+    return "".join(commands)
@@ -0,0 +1,145 @@
+import logging
+import os
+import socket
+import struct
+from typing import Generator, Iterable, Iterator, NamedTuple
+
+from src.command_journal import encode_command
+from src.robot_state import HEADING_INDEX
+
+# Wall-clock time, sequence number, x, y, heading index, command, outcome (see command_journal),
+# charge left, obstacle x, obstacle y (-1 if no obstacle was found), duration of the step in seconds
+RECORD = struct.Struct("<dIiiBcBBiif")
+
+NO_OBSTACLE = (-1, -1)
+
+logger = logging.getLogger(__name__)
+
+
+class TelemetryRecord(NamedTuple):
+    time: float
+    x: int
+    y: int
+    heading: str
+    command: str
+    outcome: int
+    charge_left: int
+    obstacle_x: int
+    obstacle_y: int
+    duration: float
+
+
+def encode(records: Iterable[TelemetryRecord], first_sequence: int = 0) -> Iterator[bytes]:
+    """
+    Encodes a stream of records, numbering them, into fixed-width binary records
+    """
+    for sequence, record in enumerate(records, first_sequence):
+        yield _pack(record, sequence)
+
+
+def telemetry_writer(sink, block_records: int = 256) -> Generator[None, TelemetryRecord, None]:
+    """
+    Starts a generator that encodes the records sent to it and writes them to a sink in blocks
+    of whole records. The robot sends a record for every step once the generator is set as its
+    telemetry (robot.telemetry = telemetry_writer(sink)); closing the generator writes the
+    records still buffered. A record that cannot be encoded (e.g., with a charge out of range)
+    is dropped with a warning, leaving a gap in the sequence numbers, and the stream goes on.
+    :param sink: where the blocks are written: a RotatingFileSink, a SocketSink or any object with
+                 the write() and flush() methods of a binary file
+    :param block_records: the number of records written at once
+    :return: the started generator
+    """
+    writer = _write_blocks(sink, block_records)
+    next(writer)
+    return writer
+
+
+def _write_blocks(sink, block_records: int) -> Generator[None, TelemetryRecord, None]:
+    block_size = block_records * RECORD.size
+    block = bytearray()
+    sequence = 0
+    try:
+        while True:
+            record = yield
+            try:
+                block += _pack(record, sequence)
+            except (struct.error, KeyError) as error:
+                # A value out of range or an unknown heading
+                logger.warning("Telemetry record %d dropped: %s", sequence, error)
+            sequence += 1
+            if len(block) >= block_size:
+                sink.write(block)
+                block = bytearray()  # The sink may keep the written block
+    finally:
+        if block:
+            sink.write(block)
+        sink.flush()
+
+
+def _pack(record: TelemetryRecord, sequence: int) -> bytes:
+    return RECORD.pack(record.time, sequence, record.x, record.y, HEADING_INDEX[record.heading],
+                       encode_command(record.command), record.outcome, record.charge_left,
+                       record.obstacle_x, record.obstacle_y, record.duration)
+
+
+class RotatingFileSink:
+    """
+    Writes the telemetry to a local file, which is rotated when it reaches max_bytes: the current
+    file is renamed with the ".1" suffix, the previous ".1" becomes ".2" and so on, keeping at
+    most backup_count old files. Files are only rotated between two writes, so they always contain
+    whole records.
+    """
+
+    MAX_BYTES = 16 * 1024 * 1024
+    BACKUP_COUNT = 4
+
+    def __init__(self, path: str, max_bytes: int = MAX_BYTES, backup_count: int = BACKUP_COUNT):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.__file = open(path, "ab")
+
+    def paths(self) -> list[str]:
+        """
+        Returns the paths of the telemetry files that exist, from the oldest to the current one
+        """
+        backups = (f"{self.path}.{i}" for i in range(self.backup_count, 0, -1))
+        return [path for path in backups if os.path.exists(path)] + [self.path]
+
+    def write(self, data: bytes) -> None:
+        if self.__file.tell() and self.__file.tell() + len(data) > self.max_bytes:
+            self.__rotate()
+        self.__file.write(data)
+
+    def flush(self) -> None:
+        self.__file.flush()
+
+    def close(self) -> None:
+        self.__file.close()
+
+    def __rotate(self) -> None:
+        self.__file.close()
+        if self.backup_count:
+            for i in range(self.backup_count - 1, 0, -1):
+                if os.path.exists(f"{self.path}.{i}"):
+                    os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        self.__file = open(self.path, "wb")
+
+
+class SocketSink:
+    """
+    Streams the telemetry to a connected socket (e.g., to a collector of the RMS)
+    """
+
+    def __init__(self, sock: socket.socket):
+        self.socket = sock
+
+    def write(self, data: bytes) -> None:
+        self.socket.sendall(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.socket.close()
@@ -0,0 +1,43 @@
+import os
+from typing import Iterable
+
+import numpy as np
+
+from src.telemetry import RECORD
+
+# The layout of telemetry.RECORD, to decode a whole log into one array per field
+DTYPE = np.dtype([
+    ("time", "<f8"),
+    ("sequence", "<u4"),
+    ("x", "<i4"),
+    ("y", "<i4"),
+    ("heading", "u1"),  # Index in HEADINGS
+    ("command", "S1"),
+    ("outcome", "u1"),
+    ("charge_left", "u1"),
+    ("obstacle_x", "<i4"),
+    ("obstacle_y", "<i4"),
+    ("duration", "<f4"),
+])
+assert DTYPE.itemsize == RECORD.size
+
+
+def decode(data: bytes) -> np.ndarray:
+    """
+    Decodes telemetry records (e.g., received from a SocketSink) into a structured array,
+    without copying them; a trailing partial record is ignored
+    """
+    return np.frombuffer(data, dtype=DTYPE, count=len(data) // DTYPE.itemsize)
+
+
+def read_telemetry(paths: str | Iterable[str]) -> np.ndarray:
+    """
+    Reads telemetry files into a structured array, with one field per value of the records
+    (e.g., log["x"], log["duration"])
+    :param paths: a file, or the files of a rotated log from the oldest (see RotatingFileSink.paths)
+    :return: the records of the files, in order
+    """
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    logs = [np.fromfile(path, dtype=DTYPE, count=os.path.getsize(path) // DTYPE.itemsize) for path in paths]
+    return np.concatenate(logs) if logs else np.empty(0, dtype=DTYPE)
@@ -0,0 +1,108 @@
+import numpy as np
+
+from src.cleaning_robot import CleaningRobot, CleaningRobotError
+from src.robot_state import HEADING_INDEX
+from src.room import Room
+from src.route import DX, DY
+
+
+class VectorizedFleet:
+    """
+    Pure simulation of many robots in the same room, stored as arrays (one element per robot).
+    Each step applies one command per robot with the same rules as CleaningRobot.execute_command.
+    """
+
+    # Outcome of a command, as returned by step()
+    MOVED = 0  # The command was executed (execute_command returns None)
+    OBSTACLE = 1  # An obstacle was found (execute_command returns "(x,y,H),(ox,oy)")
+    LOW_POWER = 2  # The battery is low (execute_command returns "!(x,y,H)")
+    ERROR = 3  # Invalid command or movement (execute_command raises CleaningRobotError)
+    IDLE = 4  # No command for the robot in this step
+
+    IDLE_COMMAND = "\0"
+    LOW_POWER_THRESHOLD = 10
+
+    def __init__(self, room: Room, count: int, start: tuple[int, int, str] = (0, 0, CleaningRobot.N),
+                 charge: float = 100, drain_per_move: float = 0, obstacles: np.ndarray = None):
+        """
+        :param room: the room where the robots move
+        :param count: the number of robots
+        :param start: the initial status of every robot, as (x, y, heading)
+        :param charge: the initial charge left of every robot
+        :param drain_per_move: the charge consumed by each executed command
+        :param obstacles: a (height, width) boolean array of the cells where the infrared sensor finds
+                          an obstacle; the cells marked with Room.OBSTACLE by default
+        """
+        x, y, heading = start
+        if heading not in CleaningRobot.HEADINGS:
+            raise CleaningRobotError
+
+        self.max_x = room.max_x
+        self.max_y = room.max_y
+        if obstacles is None:
+            grid = np.frombuffer(room.export_grid(), dtype=np.uint8).reshape(room.height, room.width)
+            obstacles = (grid & Room.OBSTACLE).astype(bool)
+        self.obstacles = obstacles
+        self.drain_per_move = drain_per_move
+
+        self.pos_x = np.full(count, x, dtype=np.int64)
+        self.pos_y = np.full(count, y, dtype=np.int64)
+        self.heading = np.full(count, HEADING_INDEX[heading], dtype=np.int64)
+        self.battery = np.full(count, charge, dtype=np.float64)
+        self.low_power = np.zeros(count, dtype=bool)  # Whether the robot entered the low power mode
+
+    def step(self, commands) -> np.ndarray:
+        """
+        Executes one command per robot
+        :param commands: a string with one command per robot, or an array of their character codes
+        :return: the outcome of each command (MOVED, OBSTACLE, LOW_POWER, ERROR or IDLE)
+        """
+        if isinstance(commands, str):
+            commands = np.frombuffer(commands.encode(), dtype=np.uint8)
+        if len(commands) != len(self.pos_x):
+            raise CleaningRobotError
+
+        idle = commands == ord(self.IDLE_COMMAND)
+        low_power = ~idle & (self.battery <= self.LOW_POWER_THRESHOLD)
+        active = ~idle & ~low_power
+        forward = active & (commands == ord(CleaningRobot.FORWARD))
+        left = active & (commands == ord(CleaningRobot.LEFT))
+        right = active & (commands == ord(CleaningRobot.RIGHT))
+
+        # The future position is checked against the room before the infrared sensor
+        next_x = self.pos_x + DX[self.heading]
+        next_y = self.pos_y + DY[self.heading]
+        inside = (next_x >= 0) & (next_x <= self.max_x) & (next_y >= 0) & (next_y <= self.max_y)
+        blocked = self.obstacles[np.where(inside, next_y, 0), np.where(inside, next_x, 0)] & inside
+        moving = forward & inside & ~blocked
+        rotating = left | right
+
+        self.pos_x = np.where(moving, next_x, self.pos_x)
+        self.pos_y = np.where(moving, next_y, self.pos_y)
+        self.heading = (self.heading + right - left) % 4
+
+        outcome = np.full(len(commands), self.ERROR, dtype=np.int8)
+        outcome[idle] = self.IDLE
+        outcome[low_power] = self.LOW_POWER
+        outcome[forward & inside & blocked] = self.OBSTACLE
+        executed = moving | rotating
+        outcome[executed] = self.MOVED
+
+        self.battery[executed] -= self.drain_per_move
+        self.low_power |= low_power
+        return outcome
+
+    def run(self, routes: list[str]) -> np.ndarray:
+        """
+        Executes a route per robot; shorter routes leave their robot idle at the end
+        :return: the outcome of each command, as a (steps, robots) array
+        """
+        if len(routes) != len(self.pos_x):
+            raise CleaningRobotError
+        steps = max((len(route) for route in routes), default=0)
+        padded = "".join(route.ljust(steps, self.IDLE_COMMAND) for route in routes).encode()
+        commands = np.frombuffer(padded, dtype=np.uint8).reshape(len(routes), steps).T
+        return np.array([self.step(commands[i]) for i in range(steps)], dtype=np.int8).reshape(steps, len(routes))
+
+    def robot_status(self, robot: int) -> str:
+        return f"({self.pos_x[robot]},{self.pos_y[robot]},{CleaningRobot.HEADINGS[self.heading[robot]]})"
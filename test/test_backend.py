@@ -0,0 +1,28 @@
+import os
+from unittest import TestCase
+from unittest.mock import patch
+
+from src.backend import use_hardware
+
+
+class TestBackend(TestCase):
+
+    def test_should_use_the_mock_hardware_when_a_library_is_missing(self):
+        with patch.dict(os.environ):
+            os.environ.pop("CLEANING_ROBOT_BACKEND", None)
+            self.assertFalse(use_hardware("RPi.GPIO", "unittest"))
+
+    def test_should_use_the_hardware_when_every_library_is_installed(self):
+        with patch.dict(os.environ):
+            os.environ.pop("CLEANING_ROBOT_BACKEND", None)
+            self.assertTrue(use_hardware("unittest.mock", "json"))
+
+    def test_should_use_the_backend_of_the_environment(self):
+        with patch.dict(os.environ, CLEANING_ROBOT_BACKEND="mock"):
+            self.assertFalse(use_hardware("json"))
+        with patch.dict(os.environ, CLEANING_ROBOT_BACKEND="hardware"):
+            self.assertTrue(use_hardware("RPi.GPIO"))
+
+    def test_should_reject_an_unknown_backend(self):
+        with patch.dict(os.environ, CLEANING_ROBOT_BACKEND="simulator"):
+            self.assertRaises(ValueError, use_hardware, "json")
@@ -0,0 +1,98 @@
+import time
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+import mock.board
+from mock.ibs import IBS
+from src.battery_monitor import BatteryMonitor
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestBatteryMonitor(TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+
+    @patch.object(IBS, "get_charge_left")
+    def test_should_reuse_a_reading_within_the_ttl(self, mock_ibs: Mock):
+        b = BatteryMonitor(IBS(mock.board.I2C()), ttl=1, clock=self.clock)
+        mock_ibs.return_value = 50
+        b.get_charge_left()
+        self.clock.now = 0.5
+        self.assertEqual(b.get_charge_left(), 50)
+        mock_ibs.assert_called_once()
+
+    @patch.object(IBS, "get_charge_left")
+    def test_should_read_the_ibs_again_after_the_ttl(self, mock_ibs: Mock):
+        b = BatteryMonitor(IBS(mock.board.I2C()), ttl=1, clock=self.clock)
+        mock_ibs.side_effect = [50, 49]
+        b.get_charge_left()
+        self.clock.now = 1
+        self.assertEqual(b.get_charge_left(), 49)
+
+    @patch.object(IBS, "get_charge_left")
+    def test_should_always_read_the_ibs_without_ttl(self, mock_ibs: Mock):
+        b = BatteryMonitor(IBS(mock.board.I2C()), ttl=0, clock=self.clock)
+        mock_ibs.return_value = 50
+        b.get_charge_left()
+        b.get_charge_left()
+        self.assertEqual(mock_ibs.call_count, 2)
+
+    @patch.object(IBS, "get_charge_left")
+    def test_should_estimate_the_discharge_rate(self, mock_ibs: Mock):
+        b = BatteryMonitor(IBS(mock.board.I2C()), ttl=0, clock=self.clock)
+        for t, charge in ((0, 50), (10, 45), (20, 40)):
+            self.clock.now = t
+            mock_ibs.return_value = charge
+            b.read()
+        self.assertAlmostEqual(b.get_discharge_rate(), 0.5)
+
+    @patch.object(IBS, "get_charge_left")
+    def test_should_predict_the_time_to_low_power(self, mock_ibs: Mock):
+        b = BatteryMonitor(IBS(mock.board.I2C()), ttl=0, clock=self.clock)
+        for t, charge in ((0, 30), (10, 20)):
+            self.clock.now = t
+            mock_ibs.return_value = charge
+            b.read()
+        self.assertAlmostEqual(b.predict_time_to_low_power(), 10)
+        self.assertTrue(b.will_reach_low_power_within(15))
+        self.assertFalse(b.will_reach_low_power_within(5))
+
+    @patch.object(IBS, "get_charge_left")
+    def test_should_predict_low_power_without_time_only_below_the_threshold(self, mock_ibs: Mock):
+        b = BatteryMonitor(IBS(mock.board.I2C()), ttl=0, clock=self.clock)
+        self.assertFalse(b.will_reach_low_power_within(0))
+        mock_ibs.return_value = 11
+        b.read()
+        self.assertFalse(b.will_reach_low_power_within(0))
+        mock_ibs.return_value = 10
+        b.read()
+        self.assertTrue(b.will_reach_low_power_within(0))
+
+    @patch.object(IBS, "get_charge_left")
+    def test_should_not_predict_low_power_when_not_discharging(self, mock_ibs: Mock):
+        b = BatteryMonitor(IBS(mock.board.I2C()), ttl=0, clock=self.clock)
+        mock_ibs.return_value = 40
+        b.read()
+        self.clock.now = 10
+        b.read()
+        self.assertIsNone(b.predict_time_to_low_power())
+
+    @patch.object(IBS, "get_charge_left")
+    def test_should_sample_the_ibs_in_the_background(self, mock_ibs: Mock):
+        b = BatteryMonitor(IBS(mock.board.I2C()), sample_interval=0.001)
+        mock_ibs.return_value = 40
+        b.start()
+        deadline = time.monotonic() + 1
+        while mock_ibs.call_count < 3 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        b.stop()
+        self.assertGreaterEqual(mock_ibs.call_count, 3)
@@ -1,9 +1,15 @@
+import os
+import tempfile
+import threading
+import time
 from unittest import TestCase
 from unittest.mock import Mock, patch, call
 
 from mock import GPIO
 from mock.ibs import IBS
+from src.battery_monitor import BatteryMonitor
 from src.cleaning_robot import CleaningRobot, CleaningRobotError
+from src.command_journal import CommandJournal, MOVED, OBSTACLE
 from src.display_manager import DisplayManager
 from src.room import Room
 
@@ -159,3 +165,321 @@ class TestCleaningRobot(TestCase):
         mock_ibs.return_value = 8
         c.execute_command(c.FORWARD)
         display_mock.assert_called_once()
+
+    @patch.object(IBS, "get_charge_left")
+    def test_should_execute_a_whole_route(self, mock_ibs: Mock):
+        r = Room(2, 2)
+        c = CleaningRobot(r)
+        c.initialize_robot()
+        mock_ibs.return_value = 12
+        self.assertEqual(c.execute_commands("frf"), ["(0,1,N)", "(0,1,E)", "(1,1,E)"])
+        self.assertEqual(c.robot_status(), "(1,1,E)")
+
+    @patch.object(IBS, "get_charge_left")
+    def test_should_read_the_battery_once_per_interval_when_executing_a_route(self, mock_ibs: Mock):
+        r = Room(2, 2)
+        c = CleaningRobot(r)
+        c.initialize_robot()
+        mock_ibs.return_value = 12
+        c.execute_commands(["f", "r", "f", "l", "f"], battery_check_interval=2)
+        self.assertEqual(mock_ibs.call_count, 3)
+
+    @patch.object(IBS, "get_charge_left")
+    def test_should_read_the_battery_before_every_command_when_low_power_is_near(self, mock_ibs: Mock):
+        r = Room(2, 2)
+        c = CleaningRobot(r)
+        c.initialize_robot()
+        c.battery = BatteryMonitor(c.ibs, ttl=100)
+        mock_ibs.return_value = 12
+        with patch.object(BatteryMonitor, "will_reach_low_power_within", return_value=True):
+            c.execute_commands(["f", "r", "f", "l", "f"], battery_check_interval=2)
+            c.execute_command(c.LEFT)
+        self.assertEqual(mock_ibs.call_count, 6)
+
+    @patch.object(IBS, "get_charge_left")
+    def test_should_reuse_a_battery_reading_when_low_power_is_far(self, mock_ibs: Mock):
+        r = Room(2, 2)
+        c = CleaningRobot(r)
+        c.initialize_robot()
+        c.battery = BatteryMonitor(c.ibs, ttl=100)
+        mock_ibs.return_value = 12
+        with patch.object(BatteryMonitor, "will_reach_low_power_within", return_value=False):
+            c.execute_commands(["f", "r", "f", "l", "f"], battery_check_interval=2)
+            c.execute_command(c.LEFT)
+        mock_ibs.assert_called_once()
+
+    @patch.object(DisplayManager, "update_display_info")
+    @patch.object(IBS, "get_charge_left")
+    def test_should_update_the_display_once_at_the_end_of_a_route(self, mock_ibs: Mock, display_mock: Mock):
+        r = Room(2, 2)
+        c = CleaningRobot(r)
+        c.initialize_robot()
+        mock_ibs.return_value = 12
+        c.execute_commands("ffr")
+        display_mock.assert_called_once_with((0, 2, 'E'), None, 12)
+
+    @patch.object(CleaningRobot, "activate_wheel_motor")
+    @patch.object(IBS, "get_charge_left")
+    def test_should_reject_an_out_of_bound_route_before_moving(self, mock_ibs: Mock, mock_motor: Mock):
+        r = Room(2, 2)
+        c = CleaningRobot(r)
+        c.initialize_robot()
+        mock_ibs.return_value = 12
+        self.assertRaises(CleaningRobotError, c.execute_commands, "fffl")
+        mock_motor.assert_not_called()
+        self.assertEqual(c.robot_status(), "(0,0,N)")
+
+    @patch.object(IBS, "get_charge_left")
+    def test_should_reject_a_route_with_an_invalid_command(self, mock_ibs: Mock):
+        r = Room(2, 2)
+        c = CleaningRobot(r)
+        c.initialize_robot()
+        mock_ibs.return_value = 12
+        self.assertRaises(CleaningRobotError, c.execute_commands, "frU")
+
+    @patch.object(IBS, "get_charge_left")
+    @patch.object(CleaningRobot, "activate_wheel_motor")
+    def test_should_stop_the_route_at_the_first_obstacle(self, mock_motor: Mock, mock_ibs: Mock):
+        self.addCleanup(GPIO.cleanup)
+        r = Room(2, 2)
+        c = CleaningRobot(r)
+        c.initialize_robot()
+        mock_motor.side_effect = lambda: GPIO.set_input(c.INFRARED_PIN, GPIO.HIGH)
+        mock_ibs.return_value = 12
+        self.assertEqual(c.execute_commands("ffr"), ["(0,1,N)", "(0,1,N),(0,2)"])
+
+    @patch.object(IBS, "get_charge_left")
+    def test_should_stop_the_route_on_low_power(self, mock_ibs: Mock):
+        r = Room(2, 2)
+        c = CleaningRobot(r)
+        c.initialize_robot()
+        mock_ibs.side_effect = [12, 9]
+        self.assertEqual(c.execute_commands("frf", battery_check_interval=2), ["(0,1,N)", "(0,1,E)", "!(0,1,E)"])
+        self.assertTrue(c.recharge_led_on)
+
+    @patch.object(IBS, "get_charge_left")
+    @patch.object(GPIO, "input")
+    def test_should_record_the_obstacle_in_the_room(self, mock_gpio: Mock, mock_ibs: Mock):
+        r = Room(2, 2)
+        c = CleaningRobot(r)
+        c.initialize_robot()
+        mock_gpio.return_value = True
+        mock_ibs.return_value = 12
+        c.execute_command(c.FORWARD)
+        self.assertEqual(r.get_positions(Room.OBSTACLE), [(0, 1)])
+
+    @patch.object(IBS, "get_charge_left")
+    def test_should_record_visited_and_cleaned_cells_in_the_room(self, mock_ibs: Mock):
+        r = Room(2, 2)
+        c = CleaningRobot(r)
+        mock_ibs.return_value = 12
+        c.initialize_robot()
+        c.execute_command(c.FORWARD)
+        c.manage_cleaning_system()
+        c.execute_command(c.FORWARD)
+        self.assertEqual(r.get_positions(Room.VISITED), [(0, 0), (0, 1), (0, 2)])
+        self.assertEqual(r.get_positions(Room.CLEANED), [(0, 2)])
+
+    @patch.object(IBS, "get_charge_left")
+    def test_should_detect_obstacles_from_gpio_edges(self, mock_ibs: Mock):
+        self.addCleanup(GPIO.cleanup)
+        r = Room(2, 2)
+        c = CleaningRobot(r)
+        c.initialize_robot()
+        mock_ibs.return_value = 12
+        GPIO.set_input(c.INFRARED_PIN, GPIO.HIGH)
+        self.assertEqual(c.execute_command(c.FORWARD), "(0,0,N),(0,1)")
+
+    @patch.object(GPIO, "input")
+    @patch.object(IBS, "get_charge_left")
+    def test_should_not_read_the_infrared_sensor_on_forward(self, mock_ibs: Mock, mock_gpio: Mock):
+        r = Room(2, 2)
+        c = CleaningRobot(r)
+        c.initialize_robot()
+        mock_ibs.return_value = 12
+        c.obstacle_found()  # The sensor reads the initial level when it is opened
+        mock_gpio.reset_mock()
+        c.execute_command(c.FORWARD)
+        mock_gpio.assert_not_called()
+
+    @patch.object(IBS, "get_charge_left")
+    def test_should_stop_moving_when_an_obstacle_appears_during_the_motion(self, mock_ibs: Mock):
+        self.addCleanup(GPIO.cleanup)
+        r = Room(2, 2)
+        c = CleaningRobot(r)
+        c.initialize_robot()
+        c.motor_driver.motion_time = 5
+        mock_ibs.return_value = 12
+        edge = threading.Timer(0.01, GPIO.set_input, (c.INFRARED_PIN, GPIO.HIGH))
+        edge.start()
+        start = time.monotonic()
+        self.assertEqual(c.execute_command(c.FORWARD), "(0,0,N),(0,1)")
+        self.assertLess(time.monotonic() - start, 1)
+
+    @patch.object(IBS, "get_charge_left")
+    def test_should_read_the_battery_once_per_command(self, mock_ibs: Mock):
+        r = Room(2, 2)
+        c = CleaningRobot(r)
+        c.initialize_robot()
+        mock_ibs.return_value = 12
+        c.execute_command(c.FORWARD)
+        mock_ibs.assert_called_once()
+
+    @patch.object(IBS, "get_charge_left")
+    def test_should_rebuild_the_status_only_when_the_state_changes(self, mock_ibs: Mock):
+        r = Room(2, 2)
+        c = CleaningRobot(r)
+        c.initialize_robot()
+        mock_ibs.return_value = 12
+        status = c.robot_status()
+        self.assertIs(c.robot_status(), status)
+        c.execute_command(c.RIGHT)
+        self.assertEqual(c.robot_status(), "(0,0,E)")
+
+    def test_should_update_the_status_when_the_position_is_set(self):
+        r = Room(2, 2)
+        c = CleaningRobot(r)
+        c.initialize_robot()
+        c.robot_status()
+        c.pos_x = 2
+        self.assertEqual(c.robot_status(), "(2,0,N)")
+
+    @patch.object(IBS, "get_charge_left")
+    def test_should_recover_the_state_from_the_journal_without_moving(self, mock_ibs: Mock):
+        path = os.path.join(self.enterContext(tempfile.TemporaryDirectory()), "robot.journal")
+        mock_ibs.return_value = 50
+        c = CleaningRobot(Room(3, 3))
+        c.recover_robot(CommandJournal(path, snapshot_interval=3))
+        c.manage_cleaning_system()
+        c.execute_commands("frff")
+        c.execute_command(c.LEFT)
+        c.journal.close()
+
+        r = Room(3, 3)
+        recovered = CleaningRobot(r)
+        with patch.object(recovered, "activate_wheel_motor") as wheel_motor, \
+                patch.object(recovered, "activate_rotation_motor") as rotation_motor:
+            recovered.recover_robot(CommandJournal(path, snapshot_interval=3))
+        self.addCleanup(recovered.journal.close)
+        wheel_motor.assert_not_called()
+        rotation_motor.assert_not_called()
+        self.assertEqual(recovered.robot_status(), "(2,1,N)")
+        self.assertTrue(recovered.cleaning_system_on)
+        self.assertEqual(r.get_positions(Room.CLEANED), [(0, 1), (1, 1), (2, 1)])
+
+    @patch.object(IBS, "get_charge_left")
+    def test_should_journal_a_malformed_command_at_low_power(self, mock_ibs: Mock):
+        path = os.path.join(self.enterContext(tempfile.TemporaryDirectory()), "robot.journal")
+        mock_ibs.return_value = 5
+        c = CleaningRobot(Room(3, 3))
+        c.recover_robot(CommandJournal(path))
+        for command in ("ff", "", "fx", "é"):
+            self.assertEqual(c.execute_command(command), "!(0,0,N)")
+        c.journal.close()
+
+        journal = CommandJournal(path)
+        self.addCleanup(journal.close)
+        self.assertEqual([(e.sequence, e.command) for e in journal.replay()], [(1, "?"), (2, "?"), (3, "?"), (4, "?")])
+
+    @patch.object(IBS, "get_charge_left")
+    def test_should_recover_the_obstacles_from_the_journal(self, mock_ibs: Mock):
+        path = os.path.join(self.enterContext(tempfile.TemporaryDirectory()), "robot.journal")
+        mock_ibs.return_value = 50
+        c = CleaningRobot(Room(3, 3))
+        c.recover_robot(CommandJournal(path))
+        GPIO.set_input(c.INFRARED_PIN, GPIO.HIGH)
+        self.addCleanup(GPIO.set_input, c.INFRARED_PIN, GPIO.LOW)
+        c.execute_command(c.FORWARD)
+        c.journal.close()
+
+        r = Room(3, 3)
+        recovered = CleaningRobot(r)
+        recovered.recover_robot(CommandJournal(path))
+        self.addCleanup(recovered.journal.close)
+        self.assertEqual(recovered.robot_status(), "(0,0,N)")
+        self.assertTrue(r.has_obstacle((0, 1)))
+
+    @patch.object(GPIO, "setup")
+    def test_should_set_up_the_motor_pins_on_first_use(self, mock_setup: Mock):
+        c = CleaningRobot(Room(2, 2))
+        c.initialize_robot()
+        mock_setup.assert_called_once_with([c.RECHARGE_LED_PIN, c.CLEANING_SYSTEM_PIN], GPIO.OUT)
+        c.execute_command(c.RIGHT)
+        mock_setup.assert_called_with([c.AIN1, c.AIN2, c.PWMA, c.BIN1, c.BIN2, c.PWMB, c.STBY], GPIO.OUT)
+        self.assertEqual(mock_setup.call_count, 2)
+
+    @patch("mock.ibs.IBS")
+    def test_should_not_open_the_ibs_until_the_battery_is_read(self, mock_ibs_class: Mock):
+        mock_ibs_class.return_value.get_charge_left.return_value = 50
+        c = CleaningRobot(Room(2, 2))
+        mock_ibs_class.assert_not_called()
+        c.manage_cleaning_system()
+        mock_ibs_class.assert_called_once()
+
+    @patch.object(IBS, "get_charge_left")
+    def test_should_move_forward_by_several_cells(self, mock_ibs: Mock):
+        r = Room(2, 2)
+        c = CleaningRobot(r)
+        c.initialize_robot()
+        mock_ibs.return_value = 12
+        self.assertIsNone(c.execute_command("f2"))
+        self.assertEqual(c.robot_status(), "(0,2,N)")
+        self.assertEqual(r.get_positions(Room.VISITED), [(0, 0), (0, 1), (0, 2)])
+
+    @patch.object(CleaningRobot, "activate_wheel_motor_for")
+    @patch.object(IBS, "get_charge_left")
+    def test_should_reject_a_run_of_forward_moves_out_of_bound(self, mock_ibs: Mock, mock_motor: Mock):
+        c = CleaningRobot(Room(2, 2))
+        c.initialize_robot()
+        mock_ibs.return_value = 12
+        self.assertRaises(CleaningRobotError, c.execute_command, "f3")
+        self.assertRaises(CleaningRobotError, c.execute_command, "f0")
+        self.assertRaises(CleaningRobotError, c.execute_command, "f" + "1" * 5000)
+        mock_motor.assert_not_called()
+
+    @patch.object(CleaningRobot, "obstacle_found")
+    @patch.object(IBS, "get_charge_left")
+    def test_should_stop_a_run_of_forward_moves_at_an_obstacle(self, mock_ibs: Mock, mock_obstacle: Mock):
+        c = CleaningRobot(Room(2, 2))
+        c.initialize_robot()
+        mock_ibs.return_value = 12
+        mock_obstacle.side_effect = [False, True]
+        self.assertEqual(c.execute_command("f2"), "(0,1,N),(0,2)")
+
+    @patch.object(IBS, "get_charge_left")
+    def test_should_merge_the_forward_moves_of_a_route(self, mock_ibs: Mock):
+        c = CleaningRobot(Room(3, 3))
+        c.initialize_robot()
+        c.run_length_moves = True
+        mock_ibs.return_value = 12
+        with patch.object(c, "activate_wheel_motor_for", wraps=c.activate_wheel_motor_for) as mock_motor:
+            self.assertEqual(c.execute_commands("ffrfff", battery_check_interval=4),
+                             ["(0,1,N)", "(0,2,N)", "(0,2,E)", "(1,2,E)", "(2,2,E)", "(3,2,E)"])
+        self.assertEqual(mock_motor.call_args_list, [call(2), call(1), call(2)])
+
+    @patch.object(CleaningRobot, "obstacle_found")
+    @patch.object(IBS, "get_charge_left")
+    def test_should_stop_merged_forward_moves_at_an_obstacle(self, mock_ibs: Mock, mock_obstacle: Mock):
+        c = CleaningRobot(Room(3, 3))
+        c.initialize_robot()
+        c.run_length_moves = True
+        mock_ibs.return_value = 12
+        mock_obstacle.side_effect = [False, False, True]
+        self.assertEqual(c.execute_commands("fffr"), ["(0,1,N)", "(0,2,N)", "(0,2,N),(0,3)"])
+
+    @patch.object(CleaningRobot, "obstacle_found")
+    @patch.object(IBS, "get_charge_left")
+    def test_should_send_a_telemetry_record_for_every_step(self, mock_ibs: Mock, mock_obstacle: Mock):
+        c = CleaningRobot(Room(3, 3))
+        c.initialize_robot()
+        c.run_length_moves = True
+        c.telemetry = Mock()
+        mock_ibs.return_value = 42
+        mock_obstacle.side_effect = [False, True]
+        c.execute_commands("rfff")
+
+        records = [send.args[0] for send in c.telemetry.send.call_args_list]
+        self.assertEqual([(r.x, r.y, r.heading, r.command, r.outcome) for r in records],
+                         [(0, 0, "E", "r", MOVED), (1, 0, "E", "f", MOVED), (1, 0, "E", "f", OBSTACLE)])
+        self.assertEqual([(r.obstacle_x, r.obstacle_y) for r in records], [(-1, -1), (-1, -1), (2, 0)])
+        self.assertTrue(all(r.charge_left == 42 for r in records))
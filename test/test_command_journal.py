@@ -0,0 +1,89 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from src.command_journal import CommandJournal, MOVED, OBSTACLE, LOW_POWER, RECORD, UNKNOWN_COMMAND, encode_command
+from src.robot_state import RobotState
+
+
+class TestCommandJournal(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "robot.journal")
+
+    def test_should_replay_the_appended_commands(self):
+        journal = CommandJournal(self.path)
+        journal.append("f", MOVED, True)
+        journal.append("f", OBSTACLE, True)
+        journal.append("r", LOW_POWER, False)
+        journal.close()
+
+        journal = CommandJournal(self.path)
+        self.addCleanup(journal.close)
+        self.assertEqual([(e.command, e.outcome, e.cleaning) for e in journal.replay()],
+                         [("f", MOVED, True), ("f", OBSTACLE, True), ("r", LOW_POWER, False)])
+        self.assertEqual(journal.sequence, 3)
+
+    def test_should_record_a_malformed_command_as_unknown(self):
+        journal = CommandJournal(self.path)
+        self.addCleanup(journal.close)
+        journal.append("f3", LOW_POWER, False)
+        journal.append("l", MOVED, False)
+        self.assertEqual(journal.sequence, 2)
+        self.assertEqual(encode_command("f3"), UNKNOWN_COMMAND)
+
+    def test_should_drop_a_partially_written_record(self):
+        journal = CommandJournal(self.path)
+        journal.append("f", MOVED, False)
+        journal.append("l", MOVED, False)
+        journal.close()
+        with open(self.path, "r+b") as f:
+            f.truncate(RECORD.size + 3)
+
+        journal = CommandJournal(self.path)
+        journal.append("r", MOVED, False)
+        journal.close()
+
+        journal = CommandJournal(self.path)
+        self.addCleanup(journal.close)
+        self.assertEqual([(e.sequence, e.command) for e in journal.replay()], [(1, "f"), (2, "r")])
+
+    def test_should_drop_a_corrupted_record(self):
+        journal = CommandJournal(self.path)
+        journal.append("f", MOVED, False)
+        journal.append("l", MOVED, False)
+        journal.close()
+        with open(self.path, "r+b") as f:
+            f.seek(RECORD.size + 4)
+            f.write(b"r")
+
+        journal = CommandJournal(self.path)
+        self.addCleanup(journal.close)
+        self.assertEqual([e.command for e in journal.replay()], ["f"])
+
+    def test_should_replay_only_the_commands_after_the_snapshot(self):
+        journal = CommandJournal(self.path, snapshot_interval=2)
+        journal.append("f", MOVED, False)
+        journal.append("f", MOVED, False)
+        self.assertTrue(journal.needs_snapshot)
+        journal.write_snapshot(RobotState(0, 2, "N"), True, 2, 2, bytes(9))
+        self.assertFalse(journal.needs_snapshot)
+        journal.append("r", MOVED, True)
+        journal.close()
+
+        journal = CommandJournal(self.path, snapshot_interval=2)
+        self.addCleanup(journal.close)
+        snapshot = journal.load_snapshot()
+        self.assertEqual((snapshot.sequence, snapshot.state, snapshot.cleaning), (2, RobotState(0, 2, "N"), True))
+        self.assertEqual([(e.sequence, e.command) for e in journal.replay()], [(3, "r")])
+
+    def test_should_ignore_a_corrupted_snapshot(self):
+        journal = CommandJournal(self.path)
+        self.addCleanup(journal.close)
+        journal.write_snapshot(RobotState(1, 1, "E"), False, 2, 2, bytes(9))
+        with open(journal.snapshot_path, "r+b") as f:
+            f.seek(8)
+            f.write(b"\xff")
+        self.assertIsNone(journal.load_snapshot())
@@ -0,0 +1,94 @@
+import asyncio
+import os
+import tempfile
+import threading
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from mock.ibs import IBS
+from src.cleaning_robot import CleaningRobot
+from src.command_server import CommandServer
+from src.room import Room
+
+
+class TestCommandServer(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.robot = CleaningRobot(Room(2, 2))
+        self.robot.initialize_robot()
+        self.robot.ibs.charge_left = 50
+        self.command_server = CommandServer(self.robot, max_pending=4)
+        self.addCleanup(self.command_server.close)
+
+    async def connect_tcp(self):
+        server = await self.command_server.start_tcp()
+        self.addAsyncCleanup(server.wait_closed)
+        self.addCleanup(server.close)
+        host, port = server.sockets[0].getsockname()[:2]
+        reader, writer = await asyncio.open_connection(host, port)
+        self.addCleanup(writer.close)
+        return reader, writer
+
+    async def send(self, reader, writer, commands):
+        writer.write("".join(f"{c}\n" for c in commands).encode())
+        await writer.drain()
+        return [(await reader.readline()).decode().rstrip("\n") for _ in commands]
+
+    async def test_should_respond_to_pipelined_commands_in_order(self):
+        reader, writer = await self.connect_tcp()
+        responses = await self.send(reader, writer, ["f", "r", "f", "l"])
+        self.assertEqual(responses, ["(0,1,N)", "(0,1,E)", "(1,1,E)", "(1,1,N)"])
+
+    async def test_should_respond_with_an_error_to_an_invalid_command(self):
+        reader, writer = await self.connect_tcp()
+        responses = await self.send(reader, writer, ["x", "l", "f", "r"])
+        self.assertEqual(responses, ["ERR", "(0,0,W)", "ERR", "(0,0,N)"])
+
+    async def test_should_keep_answering_after_a_command_fails(self):
+        reader, writer = await self.connect_tcp()
+        with patch.object(CleaningRobot, "obstacle_found", side_effect=[OSError("I/O error"), False]), \
+                self.assertLogs("src.command_server"):
+            responses = await self.send(reader, writer, ["f"])
+            responses += await self.send(reader, writer, ["f"])
+        self.assertEqual(responses, ["ERR", "(0,1,N)"])
+
+    async def test_should_respond_with_the_low_power_status(self):
+        self.robot.ibs.charge_left = 5
+        reader, writer = await self.connect_tcp()
+        self.assertEqual(await self.send(reader, writer, ["f"]), ["!(0,0,N)"])
+
+    async def test_should_respond_with_the_obstacle_position(self):
+        reader, writer = await self.connect_tcp()
+        with patch.object(CleaningRobot, "obstacle_found", return_value=True):
+            self.assertEqual(await self.send(reader, writer, ["f"]), ["(0,0,N),(0,1)"])
+
+    async def test_should_accept_connections_on_a_unix_socket(self):
+        path = os.path.join(self.enterContext(tempfile.TemporaryDirectory()), "robot.sock")
+        server = await self.command_server.start_unix(path)
+        self.addAsyncCleanup(server.wait_closed)
+        self.addCleanup(server.close)
+        reader, writer = await asyncio.open_unix_connection(path)
+        self.addCleanup(writer.close)
+        self.assertEqual(await self.send(reader, writer, ["r", "f"]), ["(0,0,E)", "(1,0,E)"])
+
+    async def test_should_stop_reading_while_the_robot_is_busy(self):
+        motors_free = threading.Event()
+        self.addCleanup(motors_free.set)
+        execute_command = self.robot.execute_command
+
+        def busy_execute_command(command):
+            motors_free.wait(5)
+            return execute_command(command)
+
+        reader, writer = await self.connect_tcp()
+        commands = ["r" + " " * 16384] * 1024
+        with patch.object(self.robot, "execute_command", side_effect=busy_execute_command):
+            writer.write("".join(f"{c}\n" for c in commands).encode())
+            await asyncio.sleep(0.2)
+            self.assertGreater(writer.transport.get_write_buffer_size(), 0)
+
+            motors_free.set()
+            await writer.drain()
+            responses = [await reader.readline() for _ in commands]
+        self.assertEqual(len(responses), 1024)
+        self.assertEqual(self.robot.robot_status(), "(0,0,N)")
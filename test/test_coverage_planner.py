@@ -0,0 +1,77 @@
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from mock.ibs import IBS
+from src.cleaning_robot import CleaningRobot, CleaningRobotError
+from src import coverage_planner
+from src.coverage_planner import plan_coverage, commands_for_path, count_rotations, find_path
+from src.room import Room
+
+
+class TestCoveragePlanner(TestCase):
+
+    def execute(self, room: Room, commands: str) -> Room:
+        # Drive a robot along the route on an empty copy of the room
+        executed = Room(room.max_x, room.max_y)
+        c = CleaningRobot(executed)
+        c.initialize_robot()
+        with patch.object(IBS, "get_charge_left", Mock(return_value=100)):
+            c.execute_commands(commands)
+        return executed
+
+    def test_should_cover_an_empty_room(self):
+        r = Room(3, 2)
+        executed = self.execute(r, plan_coverage(r))
+        self.assertEqual(executed.count(Room.VISITED), 12)
+
+    def test_should_sweep_along_the_longest_side_to_minimize_rotations(self):
+        r = Room(3, 0)
+        self.assertEqual(plan_coverage(r), "rfff")
+
+    def test_should_use_two_rotations_per_lane_change(self):
+        r = Room(1, 3)
+        self.assertEqual(plan_coverage(r), "fffrfrfff")
+
+    def test_should_avoid_known_obstacles(self):
+        r = Room(3, 3)
+        r.mark((1, 1), Room.OBSTACLE)
+        r.mark((2, 2), Room.OBSTACLE)
+        executed = self.execute(r, plan_coverage(r))
+        self.assertEqual(executed.count(Room.VISITED), 14)
+        self.assertFalse(executed.is_marked((1, 1), Room.VISITED))
+        self.assertFalse(executed.is_marked((2, 2), Room.VISITED))
+
+    def test_should_not_search_a_detour_for_each_lane_around_a_wall(self):
+        # A wall splitting the room in two, with a gap at its end
+        r = Room(39, 39)
+        for y in range(39):
+            r.mark((20, y), Room.OBSTACLE)
+        with patch.object(coverage_planner, "_find_nearest_uncovered", wraps=coverage_planner._find_nearest_uncovered) as search:
+            route = plan_coverage(r)
+        self.assertLessEqual(search.call_count, 4)
+        executed = self.execute(r, route)
+        self.assertEqual(executed.count(Room.VISITED), 40 * 40 - 39)
+
+    def test_should_skip_unreachable_cells(self):
+        r = Room(2, 2)
+        r.mark((1, 0), Room.OBSTACLE)
+        r.mark((1, 1), Room.OBSTACLE)
+        r.mark((1, 2), Room.OBSTACLE)
+        self.assertEqual(plan_coverage(r), "ff")
+
+    def test_should_raise_error_when_starting_on_an_obstacle(self):
+        r = Room(2, 2)
+        r.mark((0, 0), Room.OBSTACLE)
+        self.assertRaises(CleaningRobotError, plan_coverage, r)
+
+    def test_should_convert_a_path_into_commands(self):
+        self.assertEqual(commands_for_path([(1, 1), (1, 2), (0, 2), (0, 1)], 'E'), ("lflflf", 'S'))
+
+    def test_should_turn_around_with_two_rotations(self):
+        self.assertEqual(count_rotations(commands_for_path([(1, 1), (1, 0)], 'N')[0]), 2)
+
+    def test_should_return_none_when_no_path_exists(self):
+        r = Room(1, 1)
+        r.mark((0, 1), Room.OBSTACLE)
+        r.mark((1, 0), Room.OBSTACLE)
+        self.assertIsNone(find_path(r, (0, 0), (1, 1)))
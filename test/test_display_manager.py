@@ -1,5 +1,6 @@
+import time
 from unittest import TestCase
-from unittest.mock import Mock, patch
+from unittest.mock import Mock, patch, call
 
 import mock.board
 from mock.HD44780 import HD44780
@@ -24,3 +25,60 @@ class TestDisplayManager(TestCase):
         d = DisplayManager(mock.board.I2C())
         d.update_display_low_power()
         mock_display.assert_called_once_with("Low power, recharge needed")
+
+    @patch.object(HD44780, "lcd_write", create=True)
+    @patch.object(HD44780, "lcd_set_cursor", create=True)
+    def test_should_write_the_whole_message_on_the_first_diff_update(self, mock_cursor: Mock, mock_write: Mock):
+        d = DisplayManager(mock.board.I2C(), diff_updates=True)
+        d.update_display_info((0,0,'N'), None, 20)
+        mock_write.assert_has_calls([call("R: (0,0,N) - O:"), call("***** - B: 20%")])
+        mock_cursor.assert_has_calls([call(0, 0), call(1, 0)])
+
+    @patch.object(HD44780, "lcd_clear")
+    @patch.object(HD44780, "lcd_write", create=True)
+    @patch.object(HD44780, "lcd_set_cursor", create=True)
+    def test_should_write_only_the_changed_characters(self, mock_cursor: Mock, mock_write: Mock, mock_clear: Mock):
+        d = DisplayManager(mock.board.I2C(), diff_updates=True)
+        d.update_display_info((0,0,'N'), None, 20)
+        mock_write.reset_mock()
+        mock_cursor.reset_mock()
+        d.update_display_info((0,1,'N'), None, 19)
+        mock_cursor.assert_has_calls([call(0, 6), call(1, 11)])
+        mock_write.assert_has_calls([call("1"), call("19")])
+        mock_clear.assert_called_once()
+
+    @patch.object(HD44780, "lcd_write", create=True)
+    def test_should_not_write_when_nothing_changed(self, mock_write: Mock):
+        d = DisplayManager(mock.board.I2C(), diff_updates=True)
+        d.update_display_info((0,0,'N'), None, 20)
+        mock_write.reset_mock()
+        d.update_display_info((0,0,'N'), None, 20)
+        mock_write.assert_not_called()
+
+    @patch.object(HD44780, "lcd_string")
+    def test_should_redraw_the_display_when_the_driver_cannot_move_the_cursor(self, mock_display: Mock):
+        d = DisplayManager(mock.board.I2C(), diff_updates=True)
+        d.update_display_info((0,0,'N'), None, 20)
+        d.update_display_info((0,1,'N'), None, 20)
+        self.assertFalse(d.diff_updates)
+        mock_display.assert_called_with("R: (0,1,N) - O: ***** - B: 20%")
+
+    @patch.object(HD44780, "lcd_string")
+    def test_should_coalesce_rapid_updates(self, mock_display: Mock):
+        d = DisplayManager(mock.board.I2C(), max_refresh_rate=0.001)
+        d.update_display_info((0,0,'N'), None, 20)
+        d.update_display_info((0,1,'N'), None, 20)
+        d.update_display_info((0,2,'N'), None, 20)
+        d.close()
+        self.assertLessEqual(mock_display.call_count, 2)
+        mock_display.assert_called_with("R: (0,2,N) - O: ***** - B: 20%")
+
+    @patch.object(HD44780, "lcd_string")
+    def test_should_write_updates_from_the_background_worker(self, mock_display: Mock):
+        d = DisplayManager(mock.board.I2C(), max_refresh_rate=100)
+        d.update_display_low_power()
+        deadline = time.monotonic() + 1
+        while not mock_display.called and time.monotonic() < deadline:
+            time.sleep(0.001)
+        d.close()
+        mock_display.assert_called_once_with("Low power, recharge needed")
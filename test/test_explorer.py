@@ -0,0 +1,79 @@
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from mock.ibs import IBS
+from src.cleaning_robot import CleaningRobot
+from src.command_journal import MOVED
+from src.explorer import explore_room
+from src.robot_state import FORWARD_DELTA
+from src.room import Room
+
+
+class TestExplorer(TestCase):
+
+    def explore(self, free: set[tuple[int, int]], start: tuple[int, int], max_size: int = 32, charge: list[int] = None):
+        # Explores a room made of the free cells, starting from start heading north
+        robot = CleaningRobot(Room(None, None))
+        robot.initialize_robot()
+        robot.telemetry = Mock()  # Counts the steps
+        origin = []
+
+        def obstacle_found(r: CleaningRobot) -> bool:
+            if not origin:
+                origin.append((r.pos_x - start[0], r.pos_y - start[1]))
+            dx, dy = FORWARD_DELTA[r.heading]
+            return (r.pos_x + dx - origin[0][0], r.pos_y + dy - origin[0][1]) not in free
+
+        with patch.object(CleaningRobot, "obstacle_found", autospec=True, side_effect=obstacle_found), \
+                patch.object(IBS, "get_charge_left", side_effect=charge or (lambda: 80)):
+            return robot, explore_room(robot, max_size)
+
+    def test_should_discover_the_size_of_a_room(self):
+        free = {(x, y) for x in range(5) for y in range(3)}
+        robot, exploration = self.explore(free, (2, 1))
+        self.assertTrue(exploration.complete)
+        self.assertEqual((exploration.room.max_x, exploration.room.max_y), (4, 2))
+        self.assertEqual(exploration.room.count(Room.OBSTACLE), 0)
+        self.assertEqual(exploration.room.count(Room.VISITED), 15)
+        self.assertIs(robot.room, exploration.room)
+
+    def test_should_discover_the_obstacles(self):
+        free = {(x, y) for x in range(4) for y in range(4)} - {(1, 1), (2, 2)}
+        _, exploration = self.explore(free, (0, 0))
+        self.assertEqual(sorted(exploration.room.get_positions(Room.OBSTACLE)), [(1, 1), (2, 2)])
+
+    def test_should_mark_the_unreachable_cells_as_obstacles(self):
+        # An L-shaped room
+        free = {(x, 0) for x in range(4)} | {(0, y) for y in range(4)}
+        _, exploration = self.explore(free, (0, 0))
+        room = exploration.room
+        self.assertEqual((room.max_x, room.max_y), (3, 3))
+        self.assertEqual(room.count(Room.OBSTACLE), 9)
+        self.assertFalse(room.has_obstacle((3, 0)))
+
+    def test_should_leave_the_robot_at_its_position_in_the_discovered_room(self):
+        free = {(x, y) for x in range(3) for y in range(3)}
+        robot, exploration = self.explore(free, (1, 1))
+        self.assertIn((robot.pos_x, robot.pos_y), free)
+        self.assertEqual(robot.execute_command("l"), None)
+
+    def test_should_stop_at_the_exploration_limit(self):
+        free = {(x, y) for x in range(100) for y in range(2)}
+        _, exploration = self.explore(free, (0, 0), max_size=8)
+        self.assertFalse(exploration.complete)
+        self.assertEqual(exploration.room.max_x, 7)
+
+    def test_should_stop_when_the_battery_is_low(self):
+        free = {(x, y) for x in range(10) for y in range(10)}
+        _, exploration = self.explore(free, (0, 0), charge=[80] * 5 + [5] * 100)
+        self.assertFalse(exploration.complete)
+        self.assertLess(exploration.room.count(Room.VISITED), 100)
+
+    def test_should_enter_each_cell_at_most_twice(self):
+        free = {(x, y) for x in range(20) for y in range(20)}
+        robot, exploration = self.explore(free, (7, 3))
+        self.assertTrue(exploration.complete)
+        self.assertEqual(exploration.room.count(Room.VISITED), 400)
+        steps = [send.args[0] for send in robot.telemetry.send.call_args_list]
+        moves = sum(1 for step in steps if step.command == CleaningRobot.FORWARD and step.outcome == MOVED)
+        self.assertLessEqual(moves, 2 * 400)
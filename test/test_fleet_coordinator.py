@@ -0,0 +1,164 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from mock.ibs import IBS
+from src.cleaning_robot import CleaningRobot, CleaningRobotError
+from src.fleet_coordinator import FleetCoordinator, ReservationTable, partition_room
+from src.robot_state import RobotState
+from src.room import Room
+
+
+def simulate(starts: list[tuple[int, int, str]], steps: list[tuple]) -> list[list[tuple[int, int]]]:
+    # Returns the cells of the robots at each time step
+    states = [RobotState(*start) for start in starts]
+    positions = [[(s.x, s.y) for s in states]]
+    for commands in steps:
+        for robot, command in enumerate(commands):
+            if command == CleaningRobot.FORWARD:
+                states[robot] = states[robot].moved_forward()
+            elif command is not None:
+                states[robot] = states[robot].turned(command)
+        positions.append([(s.x, s.y) for s in states])
+    return positions
+
+
+class TestFleetCoordinator(TestCase):
+
+    def test_should_split_a_room_into_balanced_regions(self):
+        room = Room(5, 4)
+        room.mark((2, 2), Room.OBSTACLE)
+        regions = partition_room(room, 3)
+        self.assertEqual([len(region.cells) for region in regions], [9, 10, 10])
+        cells = [cell for region in regions for cell in region.cells]
+        self.assertEqual(sorted(cells), sorted((x, y) for x in range(6) for y in range(5) if (x, y) != (2, 2)))
+
+    def test_should_give_each_region_a_route_covering_it(self):
+        room = Room(4, 4)
+        for region in partition_room(room, 2):
+            state = region.start
+            visited = {(state.x, state.y)}
+            for command in region.commands:
+                state = state.moved_forward() if command == CleaningRobot.FORWARD else state.turned(command)
+                visited.add((state.x, state.y))
+            self.assertTrue(set(region.cells) <= visited)
+
+    def test_should_not_split_a_room_into_no_region(self):
+        self.assertRaises(CleaningRobotError, partition_room, Room(2, 2), 0)
+
+    def test_should_refuse_a_cell_reserved_by_another_robot(self):
+        table = ReservationTable()
+        self.assertTrue(table.reserve(0, (1, 1), 3))
+        self.assertFalse(table.reserve(1, (1, 1), 3))
+        self.assertTrue(table.reserve(1, (1, 1), 4))
+        self.assertEqual(table.owner((1, 1), 3), 0)
+
+    def test_should_refuse_to_move_into_a_cell_occupied_before_the_move(self):
+        table = ReservationTable()
+        table.reserve(0, (1, 1), 5)
+        self.assertFalse(table.reserve_move(1, (1, 1), 5))
+        self.assertIsNone(table.owner((1, 1), 6))
+
+    def test_should_keep_the_cell_of_a_parked_robot(self):
+        table = ReservationTable()
+        table.park(0, (2, 0))
+        self.assertFalse(table.reserve(1, (2, 0), 100))
+
+    def test_should_forget_the_past_reservations(self):
+        table = ReservationTable()
+        table.reserve(0, (1, 1), 1)
+        table.reserve(0, (1, 1), 2)
+        table.release_before(2)
+        self.assertIsNone(table.owner((1, 1), 1))
+        self.assertEqual(table.owner((1, 1), 2), 0)
+
+    def test_should_never_put_two_robots_in_the_same_cell(self):
+        room = Room(6, 5)
+        room.mark((3, 2), Room.OBSTACLE)
+        room.mark((3, 3), Room.OBSTACLE)
+        starts = [(0, 0, "N"), (6, 0, "N"), (0, 5, "E"), (6, 5, "S")]
+        steps = FleetCoordinator(room, starts).schedule()
+
+        positions = simulate(starts, steps)
+        for cells in positions:
+            self.assertEqual(len(set(cells)), len(cells))
+        visited = {cell for cells in positions for cell in cells}
+        self.assertEqual(len(visited), room.width * room.height - 2)
+
+    def test_should_clean_faster_than_a_single_robot(self):
+        room = Room(7, 7)
+        single = len(FleetCoordinator(room, [(0, 0, "N")]).schedule())
+        fleet = len(FleetCoordinator(room, [(0, 0, "N"), (7, 0, "N"), (0, 7, "S"), (7, 7, "S")]).schedule())
+        self.assertLess(fleet, single / 2)
+
+    def test_should_go_around_a_robot_blocking_the_way(self):
+        # In a one cell wide corridor the robots would wait for each other forever
+        room = Room(4, 1)
+        for x in range(1, 4):
+            room.mark((x, 1), Room.OBSTACLE)
+        starts = [(0, 0, "E"), (4, 0, "W")]
+        coordinator = FleetCoordinator(room, starts)
+        positions = simulate(starts, coordinator.schedule())
+        self.assertTrue(coordinator.done)
+        for cells in positions:
+            self.assertEqual(len(set(cells)), len(cells))
+
+    def test_should_clean_the_cells_skipped_to_resolve_a_deadlock(self):
+        room = Room(1, 3)
+        room.mark((1, 3), Room.OBSTACLE)
+        starts = [(0, 1, "E"), (1, 1, "E"), (1, 0, "N")]
+        coordinator = FleetCoordinator(room, starts)
+        positions = simulate(starts, coordinator.schedule())
+        self.assertEqual({cell for cells in positions for cell in cells}, {cell for region in coordinator.regions for cell in region.cells})
+        self.assertEqual(coordinator.uncleaned, [])
+
+    def test_should_give_the_cells_of_a_stopped_robot_to_the_others(self):
+        room = Room(3, 3)
+        starts = [(0, 0, "N"), (3, 3, "S")]
+        coordinator = FleetCoordinator(room, starts)
+        coordinator.stop(1, starts[1])
+        positions = simulate(starts, coordinator.schedule())
+        self.assertEqual(len({cells[0] for cells in positions}), room.width * room.height - 1)
+        self.assertEqual(coordinator.uncleaned, [])
+
+    def test_should_report_the_cells_no_robot_can_clean(self):
+        room = Room(3, 0)
+        starts = [(0, 0, "E"), (3, 0, "W")]
+        coordinator = FleetCoordinator(room, starts)
+        coordinator.stop(1, (2, 0, "W"))
+        coordinator.schedule()
+        self.assertEqual(coordinator.uncleaned, [(3, 0)])
+
+    def test_should_refuse_robots_starting_in_the_same_cell(self):
+        self.assertRaises(CleaningRobotError, FleetCoordinator, Room(2, 2), [(0, 0, "N"), (0, 0, "E")])
+
+    @patch.object(IBS, "get_charge_left")
+    def test_should_drive_the_robots(self, mock_ibs: Mock):
+        mock_ibs.return_value = 80
+        room = Room(3, 3)
+        starts = [(0, 0, "N"), (3, 3, "S")]
+        robots = []
+        for x, y, heading in starts:
+            robot = CleaningRobot(room)
+            robot.initialize_robot()
+            robot.pos_x, robot.pos_y, robot.heading = x, y, heading
+            robots.append(robot)
+
+        coordinator = FleetCoordinator(room, starts)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            self.assertEqual(coordinator.run(robots, executor), [])
+        self.assertEqual([robot.robot_status() for robot in robots], [s.status() for s in coordinator.states])
+        self.assertEqual(room.count(Room.VISITED), room.width * room.height)
+
+    @patch.object(IBS, "get_charge_left")
+    def test_should_stop_a_robot_that_finds_an_obstacle(self, mock_ibs: Mock):
+        mock_ibs.return_value = 80
+        room = Room(3, 3)
+        starts = [(0, 0, "N"), (3, 3, "S")]
+        robots = [Mock(pos_x=x, pos_y=y, heading=heading) for x, y, heading in starts]
+        robots[0].execute_command.return_value = None
+        robots[1].execute_command.return_value = "(3,3,S),(3,2)"
+
+        coordinator = FleetCoordinator(room, starts)
+        self.assertEqual(coordinator.run(robots), [1])
+        self.assertEqual(coordinator.states[1], RobotState(3, 3, "S"))
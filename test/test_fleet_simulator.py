@@ -0,0 +1,45 @@
+from unittest import TestCase
+
+from mock import GPIO
+from src.fleet_simulator import Scenario, run_scenario, run_fleet, FleetReport
+
+
+class TestFleetSimulator(TestCase):
+
+    def test_should_run_a_route(self):
+        result = run_scenario(Scenario("square", (2, 2), "ffrff"))
+        self.assertEqual(result.status, "(2,2,E)")
+        self.assertEqual(result.commands_executed, 5)
+        self.assertFalse(result.error)
+
+    def test_should_report_the_obstacles_hit(self):
+        result = run_scenario(Scenario("blocked", (2, 2), "frfrf", obstacles=((1, 1),)))
+        self.assertEqual(result.obstacles_hit, ((1, 1),))
+        self.assertEqual(result.status, "(0,0,S)")
+
+    def test_should_drain_the_battery_on_each_move(self):
+        result = run_scenario(Scenario("drain", (0, 5), "fffff", initial_charge=13, charge_per_move=1))
+        self.assertTrue(result.low_power)
+        self.assertEqual(result.status, "!(0,3,N)")
+        self.assertEqual(result.battery_used, 3)
+
+    def test_should_stop_on_invalid_movement(self):
+        result = run_scenario(Scenario("out", (2, 2), "lf"))
+        self.assertTrue(result.error)
+        self.assertEqual(result.commands_executed, 1)
+
+    def test_should_not_share_the_gpio_state_between_scenarios(self):
+        run_scenario(Scenario("blocked", (2, 2), "lf", obstacles=((0, 1),), start=(0, 0, 'E')))
+        self.assertEqual(GPIO.input(15), GPIO.LOW)
+
+    def test_should_merge_the_results(self):
+        scenarios = [Scenario("ok", (2, 2), "ff"), Scenario("blocked", (2, 2), "f", obstacles=((0, 1),)),
+                     Scenario("out", (0, 0), "f")]
+        report = run_fleet(scenarios, workers=1)
+        self.assertEqual(report.summary(), {"scenarios": 3, "completed": 2, "low_power": 0, "errors": 1,
+                                            "obstacles_hit": 1, "commands_executed": 3, "battery_used": 0})
+
+    def test_should_run_scenarios_on_a_process_pool(self):
+        scenarios = [Scenario(str(i), (2, 2), "ff" if i % 2 else "rff") for i in range(8)]
+        report = run_fleet(scenarios, workers=2, chunksize=2)
+        self.assertEqual(report, run_fleet(scenarios, workers=1))
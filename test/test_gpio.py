@@ -0,0 +1,63 @@
+from unittest import TestCase
+
+from mock import GPIO
+
+
+class TestGPIO(TestCase):
+
+    def setUp(self):
+        self.addCleanup(GPIO.cleanup)
+        GPIO.cleanup()
+
+    def test_should_read_back_the_output_level(self):
+        GPIO.setup(12, GPIO.OUT)
+        GPIO.output(12, GPIO.HIGH)
+        self.assertEqual(GPIO.input(12), GPIO.HIGH)
+
+    def test_should_read_low_from_an_unset_channel(self):
+        self.assertEqual(GPIO.input(15), GPIO.LOW)
+
+    def test_should_record_only_level_changes(self):
+        GPIO.output(12, GPIO.HIGH)
+        GPIO.output(12, GPIO.HIGH)
+        GPIO.output(12, GPIO.LOW)
+        self.assertEqual([(c, v) for _, c, v in GPIO.get_transitions()], [(12, GPIO.HIGH), (12, GPIO.LOW)])
+
+    def test_should_filter_transitions_by_channel(self):
+        GPIO.output(12, GPIO.HIGH)
+        GPIO.set_input(15, GPIO.HIGH)
+        self.assertEqual([(c, v) for _, c, v in GPIO.get_transitions(15)], [(15, GPIO.HIGH)])
+
+    def test_should_keep_a_bounded_history(self):
+        for i in range(GPIO.TRANSITION_HISTORY + 10):
+            GPIO.output(12, i % 2)
+        self.assertEqual(len(GPIO.get_transitions()), GPIO.TRANSITION_HISTORY)
+
+    def test_should_set_up_a_list_of_channels_with_an_initial_level(self):
+        GPIO.setup([16, 18], GPIO.OUT, initial=GPIO.HIGH)
+        self.assertEqual((GPIO.input(16), GPIO.input(18)), (GPIO.HIGH, GPIO.HIGH))
+
+    def test_should_remember_the_numbering_mode(self):
+        GPIO.setmode(GPIO.BOARD)
+        self.assertEqual(GPIO.getmode(), GPIO.BOARD)
+
+    def test_should_output_a_list_of_values_to_a_list_of_channels(self):
+        GPIO.output([16, 18], [GPIO.HIGH, GPIO.LOW])
+        GPIO.output((22, 33), GPIO.HIGH)
+        self.assertEqual([GPIO.input(c) for c in (16, 18, 22, 33)], [GPIO.HIGH, GPIO.LOW, GPIO.HIGH, GPIO.HIGH])
+
+    def test_should_reject_a_different_number_of_channels_and_values(self):
+        self.assertRaises(RuntimeError, GPIO.output, [16, 18], [GPIO.HIGH, GPIO.LOW, GPIO.HIGH])
+
+    def test_should_record_a_list_output_as_a_single_event(self):
+        GPIO.output([16, 18], GPIO.HIGH)
+        GPIO.output(16, GPIO.LOW)
+        self.assertEqual([(c, v) for _, c, v in GPIO.get_outputs()], [((16, 18), (GPIO.HIGH, GPIO.HIGH)), ((16,), (GPIO.LOW,))])
+
+    def test_should_log_the_previous_duty_cycle(self):
+        pwm = GPIO.PWM(16, 100)
+        pwm.start(20)
+        with self.assertLogs(GPIO.logger) as logs:
+            pwm.ChangeDutyCycle(60)
+        self.assertIn("from : 20 -> to : 60", logs.output[-1])
+        self.assertEqual(pwm.dutycycle, 60)
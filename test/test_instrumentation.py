@@ -0,0 +1,87 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from mock import GPIO
+from src.cleaning_robot import CleaningRobot, CleaningRobotError
+from src.instrumentation import Histogram, Metrics, instrument
+from src.room import Room
+
+
+class TestInstrumentation(TestCase):
+
+    def setUp(self):
+        self.robot = CleaningRobot(Room(2, 2))
+        self.robot.initialize_robot()
+        self.robot.ibs.charge_left = 50
+        self.metrics = instrument(self.robot)
+
+    def test_should_measure_the_phases_of_a_command(self):
+        self.robot.execute_command(self.robot.FORWARD)
+        phases = self.metrics.snapshot()["phases"]
+        for phase in ("command", "battery", "infrared", "motor", "display"):
+            self.assertEqual(phases[phase]["count"], 1, phase)
+        self.assertEqual(phases["route"]["count"], 0)
+
+    def test_should_count_the_events(self):
+        self.robot.execute_command(self.robot.FORWARD)
+        self.assertRaises(CleaningRobotError, self.robot.execute_command, "x")
+        GPIO.set_input(self.robot.INFRARED_PIN, GPIO.HIGH)
+        self.addCleanup(GPIO.set_input, self.robot.INFRARED_PIN, GPIO.LOW)
+        self.robot.execute_command(self.robot.FORWARD)
+        self.robot.ibs.charge_left = 5
+        self.robot.execute_command(self.robot.FORWARD)
+        self.assertEqual(self.metrics.snapshot()["counters"], {"commands": 3, "invalid_commands": 1, "obstacles": 1, "low_power": 1})
+
+    def test_should_count_the_commands_of_a_route(self):
+        self.robot.execute_commands("frf")
+        self.assertRaises(CleaningRobotError, self.robot.execute_commands, "ffff")
+        self.assertEqual(self.metrics.snapshot()["counters"], {"commands": 3, "invalid_commands": 1})
+        self.assertEqual(self.metrics.snapshot()["phases"]["motor"]["count"], 3)
+
+    def test_should_count_the_hardware_calls(self):
+        self.robot.execute_command(self.robot.LEFT)
+        calls = self.metrics.snapshot()["calls"]
+        self.assertEqual(calls["gpio.output"], 2)
+        self.assertEqual(calls["i2c.get_charge_left"], 1)
+        self.assertEqual(calls["i2c.lcd_string"], 1)
+
+    def test_should_time_every_battery_read_at_low_charge(self):
+        self.robot.ibs.charge_left = 5
+        for _ in range(4):
+            self.robot.execute_command(self.robot.FORWARD)
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(snapshot["calls"]["i2c.get_charge_left"], 4)
+        self.assertEqual(snapshot["phases"]["battery"]["count"], 4)
+
+    def test_should_still_drive_the_pins(self):
+        self.robot.manage_cleaning_system()
+        self.assertEqual(GPIO.input(self.robot.CLEANING_SYSTEM_PIN), GPIO.HIGH)
+
+    def test_should_export_to_prometheus(self):
+        self.robot.execute_command(self.robot.RIGHT)
+        text = self.metrics.to_prometheus()
+        self.assertIn('cleaning_robot_phase_seconds_bucket{phase="motor",le="+Inf"} 1\n', text)
+        self.assertIn('cleaning_robot_phase_seconds_count{phase="command"} 1\n', text)
+        self.assertIn("cleaning_robot_commands_total 1\n", text)
+        self.assertIn('cleaning_robot_hardware_calls_total{bus="i2c",call="get_charge_left"} 1\n', text)
+
+    def test_should_write_the_metrics_to_a_file(self):
+        path = os.path.join(self.enterContext(tempfile.TemporaryDirectory()), "robot.prom")
+        self.robot.execute_command(self.robot.RIGHT)
+        self.metrics.write(path)
+        with open(path) as f:
+            self.assertEqual(f.read(), self.metrics.to_prometheus())
+
+    def test_should_not_change_the_class(self):
+        self.assertNotIn("execute_command", vars(CleaningRobot(Room(2, 2))))
+
+
+class TestHistogram(TestCase):
+
+    def test_should_count_the_values_in_cumulative_buckets(self):
+        histogram = Histogram((1.0, 2.0))
+        for value in (0.5, 1.0, 1.5, 3.0):
+            histogram.observe(value)
+        self.assertEqual(histogram.cumulative_counts(), [2, 3, 4])
+        self.assertEqual((histogram.count, histogram.sum), (4, 6.0))
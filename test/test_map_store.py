@@ -0,0 +1,122 @@
+import os
+import tempfile
+import threading
+from unittest import TestCase
+
+from src.map_store import MapStore, StaleMapError
+from src.room import Room
+
+
+class TestMapStore(TestCase):
+
+    def setUp(self):
+        self.directory = self.enterContext(tempfile.TemporaryDirectory())
+        self.store = MapStore(self.directory)
+        self.room = Room(3, 2)
+        self.room.mark((1, 1), Room.OBSTACLE)
+        self.room.mark((2, 0), Room.VISITED | Room.CLEANED)
+
+    def test_should_load_a_saved_room(self):
+        self.assertEqual(self.store.save("kitchen", self.room), 1)
+        room = self.store.load("kitchen")
+        self.assertEqual((room.max_x, room.max_y), (3, 2))
+        self.assertEqual(room.export_grid(), self.room.export_grid())
+        self.assertEqual(room.get_positions(Room.OBSTACLE), [(1, 1)])
+
+    def test_should_load_a_read_only_room(self):
+        self.store.save("kitchen", self.room)
+        room = self.store.load("kitchen")
+        self.assertRaises(TypeError, room.mark, (0, 0), Room.VISITED)
+
+    def test_should_keep_the_changes_to_a_writable_room_private(self):
+        self.store.save("kitchen", self.room)
+        room = self.store.load("kitchen", writable=True)
+        room.mark((0, 0), Room.VISITED)
+        self.assertTrue(room.is_marked((0, 0), Room.VISITED))
+        self.assertFalse(self.store.load("kitchen").is_marked((0, 0), Room.VISITED))
+
+    def test_should_store_only_the_given_layers(self):
+        self.store.save("kitchen", self.room, layers=Room.OBSTACLE)
+        room = self.store.load("kitchen")
+        self.assertEqual(room.get_positions(Room.OBSTACLE), [(1, 1)])
+        self.assertEqual(room.count(Room.VISITED), 0)
+
+    def test_should_update_a_stored_room(self):
+        self.store.save("kitchen", self.room)
+        room = self.store.load("kitchen", writable=True)
+        room.mark((3, 2), Room.OBSTACLE)
+        room.unmark((1, 1), Room.OBSTACLE)
+        self.assertEqual(self.store.update("kitchen", room, base_version=1), 2)
+        self.assertEqual(self.store.version("kitchen"), 2)
+        self.assertEqual(self.store.load("kitchen").get_positions(Room.OBSTACLE), [(3, 2)])
+
+    def test_should_update_only_the_given_layers(self):
+        self.store.save("kitchen", self.room)
+        room = Room(3, 2)
+        room.mark((0, 1), Room.OBSTACLE)
+        self.store.update("kitchen", room, layers=Room.OBSTACLE)
+        stored = self.store.load("kitchen")
+        self.assertEqual(stored.get_positions(Room.OBSTACLE), [(0, 1)])
+        self.assertEqual(stored.get_positions(Room.CLEANED), [(2, 0)])
+
+    def test_should_update_a_big_room(self):
+        room = Room(999, 999)
+        self.store.save("hall", room)
+        room.mark((500, 500), Room.OBSTACLE)
+        room.mark((999, 999), Room.CLEANED)
+        self.store.update("hall", room)
+        self.assertEqual(self.store.load("hall").export_grid(), room.export_grid())
+
+    def test_should_reject_an_update_based_on_an_old_version(self):
+        self.store.save("kitchen", self.room)
+        self.store.update("kitchen", self.room)
+        self.assertRaises(StaleMapError, self.store.update, "kitchen", self.room, base_version=1)
+
+    def test_should_accept_only_one_of_concurrent_updates_of_the_same_version(self):
+        self.store.save("kitchen", self.room)
+        barrier = threading.Barrier(8)
+        results = []
+
+        def update(x: int) -> None:
+            room = Room(3, 2)
+            room.mark((x % 4, 0), Room.OBSTACLE)
+            barrier.wait()
+            try:
+                results.append(MapStore(self.directory).update("kitchen", room, base_version=1))
+            except StaleMapError:
+                results.append(None)
+
+        threads = [threading.Thread(target=update, args=(x,)) for x in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(results, key=str), [2] + [None] * 7)
+        self.assertEqual(self.store.version("kitchen"), 2)
+
+    def test_should_keep_the_loaded_version_of_an_updated_room(self):
+        self.store.save("kitchen", self.room)
+        loaded = self.store.load("kitchen")
+        room = Room(3, 2)
+        room.mark((0, 0), Room.OBSTACLE)
+        self.store.update("kitchen", room)
+        self.assertEqual(loaded.get_positions(Room.OBSTACLE), [(1, 1)])
+        self.assertEqual(self.store.load("kitchen").get_positions(Room.OBSTACLE), [(0, 0)])
+
+    def test_should_reject_an_update_of_a_different_size(self):
+        self.store.save("kitchen", self.room)
+        self.assertRaises(ValueError, self.store.update, "kitchen", Room(2, 2))
+
+    def test_should_list_the_stored_rooms(self):
+        self.store.save("kitchen", self.room)
+        self.store.save("bedroom", self.room)
+        self.assertEqual(self.store.rooms(), ["bedroom", "kitchen"])
+        self.assertEqual(self.store.version("hall"), 0)
+
+    def test_should_reject_an_invalid_room_name(self):
+        self.assertRaises(ValueError, self.store.save, "../kitchen", self.room)
+
+    def test_should_reject_a_file_of_another_format(self):
+        with open(os.path.join(self.directory, "kitchen.map"), "wb") as f:
+            f.write(b"not a map" * 10)
+        self.assertRaises(ValueError, self.store.load, "kitchen")
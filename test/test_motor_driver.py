@@ -0,0 +1,149 @@
+import asyncio
+import threading
+from unittest import TestCase
+from unittest.mock import Mock, patch, call
+
+from mock import GPIO
+from src.motor_driver import MotorDriver
+
+
+class TestMotorDriver(TestCase):
+
+    def setUp(self):
+        self.addCleanup(GPIO.cleanup)
+        GPIO.cleanup()
+
+    def create_driver(self, motion_time: float = 0) -> MotorDriver:
+        return MotorDriver(GPIO, (22, 18, 16), (29, 31, 32), 33, motion_time)
+
+    def get_outputs(self) -> list:
+        return [(channels, values) for _, channels, values in GPIO.get_outputs()]
+
+    def test_should_drive_the_wheel_motor_clockwise_and_stop_it(self):
+        d = self.create_driver()
+        d.run(d.move_forward())
+        self.assertEqual(self.get_outputs(), [((22, 18, 16, 33), (GPIO.HIGH, GPIO.LOW, GPIO.HIGH, GPIO.HIGH)),
+                                              ((22, 18, 16, 33), (GPIO.LOW, GPIO.LOW, GPIO.LOW, GPIO.LOW))])
+
+    @patch.object(asyncio, "Runner")
+    def test_should_not_use_an_event_loop_without_motion_time(self, mock_loop: Mock):
+        d = self.create_driver()
+        thread = threading.Thread(target=lambda: (d.run(d.move_forward()), d.run(d.move_forward_cells(3)),
+                                                  d.run(d.rotate("l")), d.run(d.pulse(36, 0.2))))
+        thread.start()
+        thread.join()
+        mock_loop.assert_not_called()
+        self.assertEqual(len(self.get_outputs()), 8)
+
+    def test_should_close_the_event_loop_of_a_timed_motion(self):
+        d = self.create_driver(motion_time=0.001)
+        loops = []
+        new_event_loop = asyncio.events.new_event_loop
+        with patch.object(asyncio.events, "new_event_loop", side_effect=lambda: loops.append(new_event_loop()) or loops[-1]):
+            thread = threading.Thread(target=d.run, args=(d.rotate("l"),))
+            thread.start()
+            thread.join()
+        self.assertEqual(len(loops), 1)
+        self.assertTrue(loops[0].is_closed())
+
+    def test_should_rotate_left(self):
+        d = self.create_driver()
+        d.run(d.rotate("l"))
+        self.assertEqual(self.get_outputs()[0], ((29, 31, 32, 33), (GPIO.HIGH, GPIO.LOW, GPIO.HIGH, GPIO.HIGH)))
+
+    def test_should_rotate_right(self):
+        d = self.create_driver()
+        d.run(d.rotate("r"))
+        self.assertEqual(self.get_outputs()[0], ((29, 31, 32, 33), (GPIO.LOW, GPIO.HIGH, GPIO.HIGH, GPIO.HIGH)))
+
+    def test_should_change_the_motor_pins_at_the_same_time(self):
+        d = self.create_driver()
+        d.run(d.move_forward())
+        times = {t for t, _, value in GPIO.get_transitions() if value == GPIO.HIGH}
+        self.assertEqual(len(times), 1)
+
+    @patch.object(GPIO, "output")
+    def test_should_drive_stby_low_when_a_motion_is_cancelled(self, mock_gpio: Mock):
+        d = self.create_driver(motion_time=10)
+
+        async def cancel_motion():
+            motion = asyncio.create_task(d.move_forward())
+            await asyncio.sleep(0)
+            motion.cancel()
+            await asyncio.gather(motion, return_exceptions=True)
+
+        asyncio.run(cancel_motion())
+        self.assertEqual(mock_gpio.call_args, call([22, 18, 16, 33], GPIO.LOW))
+
+    @patch.object(GPIO, "output")
+    def test_should_run_other_work_while_the_motor_is_moving(self, mock_gpio: Mock):
+        d = self.create_driver(motion_time=0.05)
+        events = []
+
+        async def poll_sensor():
+            await asyncio.sleep(0)
+            events.append(mock_gpio.call_count)
+
+        async def move_and_poll():
+            await asyncio.gather(d.move_forward(), poll_sensor())
+
+        asyncio.run(move_and_poll())
+        # The sensor was polled after the motor started and before it stopped
+        self.assertEqual(events, [1])
+
+    @patch.object(GPIO, "output")
+    def test_should_pulse_a_pin(self, mock_gpio: Mock):
+        d = self.create_driver()
+        d.run(d.pulse(36, 0))
+        mock_gpio.assert_has_calls([call(36, GPIO.HIGH), call(36, GPIO.LOW)])
+
+    @patch.object(GPIO, "output")
+    def test_should_abort_a_forward_motion_from_another_thread(self, mock_gpio: Mock):
+        d = self.create_driver(motion_time=5)
+        threading.Timer(0.01, d.abort_forward_motion).start()
+        self.assertFalse(d.run(d.move_forward()))
+        self.assertTrue(d.aborted)
+        self.assertEqual(mock_gpio.call_args, call([22, 18, 16, 33], GPIO.LOW))
+
+    @patch.object(GPIO, "output")
+    def test_should_complete_a_forward_motion_when_not_aborted(self, mock_gpio: Mock):
+        d = self.create_driver(motion_time=0.01)
+        self.assertTrue(d.run(d.move_forward()))
+        self.assertFalse(d.aborted)
+
+    @patch.object(GPIO.PWM, "ChangeDutyCycle")
+    def test_should_ramp_the_wheel_motor_up_and_down_in_a_run_of_forward_moves(self, mock_pwm: Mock):
+        d = self.create_driver()
+        self.assertEqual(d.run(d.move_forward_cells(5)), 5)
+        self.assertEqual([c.args[0] for c in mock_pwm.call_args_list], [25, 50, 75, 100, 75, 50, 25, 0])
+
+    def test_should_keep_the_wheel_motor_running_between_cells(self):
+        d = self.create_driver()
+        d.run(d.move_forward_cells(3))
+        self.assertEqual(self.get_outputs(), [((22, 18, 33), (GPIO.HIGH, GPIO.LOW, GPIO.HIGH)),
+                                              ((22, 18, 33), (GPIO.LOW, GPIO.LOW, GPIO.LOW))])
+
+    def test_should_stop_a_run_of_forward_moves_at_a_cell_boundary(self):
+        d = self.create_driver()
+        boundaries = []
+
+        def can_enter(moved):
+            boundaries.append(moved)
+            return moved < 2
+
+        self.assertEqual(d.run(d.move_forward_cells(5, can_enter)), 2)
+        self.assertEqual(boundaries, [0, 1, 2])
+        self.assertFalse(d.aborted)
+
+    @patch.object(GPIO, "output")
+    def test_should_not_start_the_motor_if_the_first_cell_cannot_be_entered(self, mock_gpio: Mock):
+        d = self.create_driver()
+        self.assertEqual(d.run(d.move_forward_cells(5, lambda moved: False)), 0)
+        mock_gpio.assert_not_called()
+
+    def test_should_abort_a_run_of_forward_moves_from_another_thread(self):
+        d = self.create_driver(motion_time=0.1)
+        d.RAMP_TIME = 0
+        threading.Timer(0.15, d.abort_forward_motion).start()
+        self.assertEqual(d.run(d.move_forward_cells(5)), 1)
+        self.assertTrue(d.aborted)
@@ -0,0 +1,91 @@
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from mock.ibs import IBS
+from src.cleaning_robot import CleaningRobot, CleaningRobotError
+from src.navigator import Navigator
+from src.room import Room
+
+STEPS = {'N': (0, 1), 'E': (1, 0), 'S': (0, -1), 'W': (-1, 0)}
+
+
+def obstacles_at(*cells):
+    # Simulates the infrared sensor: an obstacle is found if the cell in front of the robot is blocked
+    def obstacle_found(robot: CleaningRobot) -> bool:
+        dx, dy = STEPS[robot.heading]
+        return (robot.pos_x + dx, robot.pos_y + dy) in cells
+    return obstacle_found
+
+
+class TestNavigator(TestCase):
+
+    def setUp(self):
+        patcher = patch.object(IBS, "get_charge_left", Mock(return_value=100))
+        self.mock_ibs = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_should_reach_the_target(self):
+        c = CleaningRobot(Room(2, 2))
+        c.initialize_robot()
+        self.assertEqual(Navigator(c).navigate_to((2, 2)), "(2,2,E)")
+
+    @patch.object(CleaningRobot, "execute_command", autospec=True, side_effect=CleaningRobot.execute_command)
+    def test_should_prefer_paths_with_fewer_rotations(self, mock_execute: Mock):
+        c = CleaningRobot(Room(3, 3))
+        c.initialize_robot()
+        Navigator(c).navigate_to((2, 2))
+        commands = [args[1] for args, _ in mock_execute.call_args_list]
+        self.assertEqual(commands, ["f", "f", "r", "f", "f"])
+
+    @patch.object(CleaningRobot, "obstacle_found", autospec=True, side_effect=obstacles_at((0, 1)))
+    def test_should_go_around_an_obstacle_found_on_the_way(self, mock_obstacle: Mock):
+        r = Room(2, 2)
+        c = CleaningRobot(r)
+        c.initialize_robot()
+        Navigator(c).navigate_to((0, 2))
+        self.assertEqual((c.pos_x, c.pos_y), (0, 2))
+        self.assertTrue(r.is_marked((0, 1), Room.OBSTACLE))
+
+    @patch.object(CleaningRobot, "obstacle_found", autospec=True, side_effect=obstacles_at((0, 1), (1, 1)))
+    def test_should_replan_after_each_obstacle(self, mock_obstacle: Mock):
+        r = Room(2, 2)
+        c = CleaningRobot(r)
+        c.initialize_robot()
+        Navigator(c).navigate_to((1, 2))
+        self.assertEqual((c.pos_x, c.pos_y), (1, 2))
+        self.assertEqual(r.get_positions(Room.OBSTACLE), [(0, 1), (1, 1)])
+
+    def test_should_avoid_known_obstacles(self):
+        r = Room(2, 2)
+        r.mark((0, 1), Room.OBSTACLE)
+        c = CleaningRobot(r)
+        c.initialize_robot()
+        Navigator(c).navigate_to((0, 2))
+        self.assertFalse(r.is_marked((0, 1), Room.VISITED))
+
+    @patch.object(CleaningRobot, "obstacle_found", autospec=True, side_effect=obstacles_at((0, 1), (1, 0)))
+    def test_should_raise_error_when_the_target_is_unreachable(self, mock_obstacle: Mock):
+        c = CleaningRobot(Room(2, 2))
+        c.initialize_robot()
+        self.assertRaises(CleaningRobotError, Navigator(c).navigate_to, (2, 2))
+
+    def test_should_raise_error_when_the_target_is_outside_the_room(self):
+        c = CleaningRobot(Room(2, 2))
+        c.initialize_robot()
+        self.assertRaises(CleaningRobotError, Navigator(c).navigate_to, (3, 0))
+
+    def test_should_stop_on_low_power(self):
+        c = CleaningRobot(Room(2, 2))
+        c.initialize_robot()
+        self.mock_ibs.return_value = 5
+        self.assertEqual(Navigator(c).navigate_to((0, 2)), "!(0,0,N)")
+
+    @patch.object(CleaningRobot, "obstacle_found", autospec=True, side_effect=obstacles_at((5, 9)))
+    def test_should_go_around_an_obstacle_in_a_large_room(self, mock_obstacle: Mock):
+        r = Room(19, 19)
+        c = CleaningRobot(r)
+        c.initialize_robot()
+        c.pos_x = 5
+        Navigator(c).navigate_to((5, 19))
+        self.assertEqual((c.pos_x, c.pos_y), (5, 19))
+        self.assertEqual(r.get_positions(Room.OBSTACLE), [(5, 9)])
@@ -0,0 +1,68 @@
+import time
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from mock import GPIO
+from src.obstacle_sensor import ObstacleSensor
+
+
+class TestObstacleSensor(TestCase):
+
+    def setUp(self):
+        self.addCleanup(GPIO.cleanup)
+
+    def test_should_read_the_initial_state(self):
+        GPIO.set_input(15, GPIO.HIGH)
+        s = ObstacleSensor(GPIO, 15)
+        self.assertTrue(s.obstacle_detected)
+
+    def test_should_update_the_state_on_edges(self):
+        s = ObstacleSensor(GPIO, 15, bouncetime=0)
+        GPIO.set_input(15, GPIO.HIGH)
+        self.assertTrue(s.obstacle_detected)
+        GPIO.set_input(15, GPIO.LOW)
+        self.assertFalse(s.obstacle_detected)
+
+    def test_should_notify_listeners_when_an_obstacle_appears(self):
+        s = ObstacleSensor(GPIO, 15, bouncetime=0)
+        listener = Mock()
+        s.add_listener(listener)
+        GPIO.set_input(15, GPIO.HIGH)
+        GPIO.set_input(15, GPIO.LOW)
+        listener.assert_called_once_with()
+
+    def test_should_ignore_edges_within_the_bounce_time(self):
+        s = ObstacleSensor(GPIO, 15, bouncetime=10000)
+        listener = Mock()
+        s.add_listener(listener)
+        GPIO.set_input(15, GPIO.HIGH)
+        GPIO.set_input(15, GPIO.LOW)
+        GPIO.set_input(15, GPIO.HIGH)
+        GPIO.set_input(15, GPIO.LOW)
+        listener.assert_called_once_with()
+        # The pin settled on the level of an ignored edge
+        self.assertFalse(s.obstacle_detected)
+
+    @patch.object(time, "monotonic")
+    def test_should_trust_the_edges_again_after_the_bounce_time(self, mock_clock: Mock):
+        mock_clock.return_value = 100
+        s = ObstacleSensor(GPIO, 15, bouncetime=10)
+        GPIO.set_input(15, GPIO.HIGH)
+        mock_clock.return_value = 100.01
+        self.assertTrue(s.obstacle_detected)
+        with patch.object(GPIO, "input") as mock_input:
+            self.assertTrue(s.obstacle_detected)
+            mock_input.assert_not_called()
+
+    @patch.object(GPIO, "add_event_detect")
+    def test_should_register_edge_detection_on_both_edges(self, mock_gpio: Mock):
+        s = ObstacleSensor(GPIO, 15, bouncetime=20)
+        mock_gpio.assert_called_once()
+        self.assertEqual(mock_gpio.call_args.args, (15, GPIO.BOTH))
+        self.assertEqual(mock_gpio.call_args.kwargs["bouncetime"], 20)
+
+    def test_should_stop_receiving_edges_when_closed(self):
+        s = ObstacleSensor(GPIO, 15, bouncetime=0)
+        s.close()
+        GPIO.set_input(15, GPIO.HIGH)
+        self.assertFalse(s.obstacle_detected)
@@ -0,0 +1,41 @@
+from unittest import TestCase
+from unittest.mock import Mock, patch, call
+
+from mock import GPIO
+from src.pin_transaction import PinTransaction
+
+
+class TestPinTransaction(TestCase):
+
+    @patch.object(GPIO, "output")
+    def test_should_write_the_changes_in_a_single_call(self, mock_gpio: Mock):
+        with PinTransaction(GPIO) as pins:
+            pins.output(22, GPIO.HIGH).output(18, GPIO.LOW)
+            mock_gpio.assert_not_called()
+        mock_gpio.assert_called_once_with([22, 18], [GPIO.HIGH, GPIO.LOW])
+
+    @patch.object(GPIO, "output")
+    def test_should_keep_the_last_level_of_a_channel(self, mock_gpio: Mock):
+        with PinTransaction(GPIO) as pins:
+            pins.output(22, GPIO.HIGH).output(18, GPIO.LOW).output(22, GPIO.LOW)
+        mock_gpio.assert_called_once_with([22, 18], [GPIO.LOW, GPIO.LOW])
+
+    @patch.object(GPIO, "output")
+    def test_should_drop_the_changes_on_exception(self, mock_gpio: Mock):
+        with self.assertRaises(KeyError):
+            with PinTransaction(GPIO) as pins:
+                pins.output(22, GPIO.HIGH)
+                raise KeyError
+        mock_gpio.assert_not_called()
+
+    @patch.object(GPIO, "output")
+    def test_should_not_write_an_empty_transaction(self, mock_gpio: Mock):
+        PinTransaction(GPIO).commit()
+        mock_gpio.assert_not_called()
+
+    @patch.object(GPIO, "output")
+    def test_should_be_reusable_after_a_commit(self, mock_gpio: Mock):
+        pins = PinTransaction(GPIO)
+        pins.output(22, GPIO.HIGH).commit()
+        pins.output(33, GPIO.HIGH).commit()
+        self.assertEqual(mock_gpio.call_args_list, [call([22], [GPIO.HIGH]), call([33], [GPIO.HIGH])])
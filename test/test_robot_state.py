@@ -0,0 +1,28 @@
+from unittest import TestCase
+
+from src.robot_state import RobotState
+
+
+class TestRobotState(TestCase):
+
+    def test_should_turn_left(self):
+        self.assertEqual(RobotState(1, 1, 'N').turned('l'), RobotState(1, 1, 'W'))
+
+    def test_should_turn_right(self):
+        self.assertEqual(RobotState(1, 1, 'W').turned('r'), RobotState(1, 1, 'N'))
+
+    def test_should_move_forward(self):
+        self.assertEqual(RobotState(1, 1, 'S').moved_forward(), RobotState(1, 0, 'S'))
+
+    def test_should_return_the_forward_position(self):
+        self.assertEqual(RobotState(1, 1, 'E').forward_position(), (2, 1))
+
+    def test_should_be_immutable(self):
+        s = RobotState(0, 0, 'N')
+        self.assertRaises(AttributeError, setattr, s, "x", 1)
+
+    def test_should_not_have_a_dictionary(self):
+        self.assertFalse(hasattr(RobotState(0, 0, 'N'), "__dict__"))
+
+    def test_should_format_the_status(self):
+        self.assertEqual(RobotState(2, 1, 'E').status(), "(2,1,E)")
@@ -1,3 +1,4 @@
+import mmap
 from unittest import TestCase
 
 from src.room import Room
@@ -12,3 +13,54 @@ class TestRoom(TestCase):
     def test_should_return_position_invalid(self):
         r = Room(2, 2)
         self.assertFalse(r.is_position_valid((3, 1)))
+
+    def test_should_mark_a_cell(self):
+        r = Room(2, 2)
+        r.mark((1, 2), Room.OBSTACLE)
+        self.assertTrue(r.is_marked((1, 2), Room.OBSTACLE))
+        self.assertFalse(r.is_marked((1, 2), Room.VISITED))
+
+    def test_should_keep_flags_independent(self):
+        r = Room(2, 2)
+        r.mark((1, 1), Room.VISITED)
+        r.mark((1, 1), Room.CLEANED)
+        r.unmark((1, 1), Room.VISITED)
+        self.assertFalse(r.is_marked((1, 1), Room.VISITED))
+        self.assertTrue(r.is_marked((1, 1), Room.CLEANED))
+
+    def test_should_raise_error_when_marking_outside_the_room(self):
+        r = Room(2, 2)
+        self.assertRaises(IndexError, r.mark, (3, 0), Room.OBSTACLE)
+
+    def test_should_not_report_obstacles_outside_the_room(self):
+        r = Room(2, 2)
+        self.assertFalse(r.has_obstacle((-1, 0)))
+
+    def test_should_export_marked_positions(self):
+        r = Room(3, 2)
+        r.mark((1, 2), Room.OBSTACLE)
+        r.mark((3, 0), Room.OBSTACLE | Room.VISITED)
+        self.assertEqual(r.get_positions(Room.OBSTACLE), [(3, 0), (1, 2)])
+        self.assertEqual(r.count(Room.VISITED), 1)
+
+    def test_should_export_the_grid(self):
+        r = Room(1, 1)
+        r.mark((1, 0), Room.CLEANED)
+        self.assertEqual(r.export_grid(), bytes([0, Room.CLEANED, 0, 0]))
+
+    def test_should_use_an_external_grid_buffer(self):
+        grid = bytearray(6)
+        r = Room.with_grid(2, 1, grid)
+        r.mark((2, 1), Room.VISITED)
+        self.assertEqual(grid[5], Room.VISITED)
+
+    def test_should_count_the_cells_of_a_memory_mapped_grid(self):
+        grid = mmap.mmap(-1, 6)
+        self.addCleanup(grid.close)
+        r = Room.with_grid(2, 1, grid)
+        r.mark((0, 0), Room.VISITED | Room.OBSTACLE)
+        r.mark((2, 1), Room.VISITED)
+        self.assertEqual((r.count(Room.VISITED), r.count(Room.OBSTACLE), r.count(Room.CLEANED)), (2, 1, 0))
+
+    def test_should_raise_error_when_the_grid_does_not_match_the_room_size(self):
+        self.assertRaises(ValueError, Room.with_grid, 2, 2, bytearray(4))
@@ -0,0 +1,35 @@
+from unittest import TestCase
+
+from src.cleaning_robot import CleaningRobotError
+from src.room import Room
+from src.route import plan_route, find_first_invalid_step
+
+
+class TestRoute(TestCase):
+
+    def test_should_compute_positions_along_the_route(self):
+        xs, ys, _ = plan_route("ffrfl")
+        self.assertEqual(list(zip(xs.tolist(), ys.tolist())), [(0, 1), (0, 2), (0, 2), (1, 2), (1, 2)])
+
+    def test_should_compute_headings_along_the_route(self):
+        _, _, headings = plan_route("rrrrlf", (1, 1, 'W'))
+        self.assertEqual(headings.tolist(), [0, 1, 2, 3, 2, 2])
+
+    def test_should_start_from_the_given_status(self):
+        xs, ys, _ = plan_route("ff", (2, 2, 'S'))
+        self.assertEqual((xs[-1], ys[-1]), (2, 0))
+
+    def test_should_raise_error_on_invalid_command(self):
+        self.assertRaises(CleaningRobotError, plan_route, "ffx")
+
+    def test_should_return_none_when_the_route_is_valid(self):
+        self.assertIsNone(find_first_invalid_step(Room(2, 2), "ffrff"))
+
+    def test_should_return_the_first_out_of_bound_step(self):
+        self.assertEqual(find_first_invalid_step(Room(2, 2), "ffrfffff"), 5)
+
+    def test_should_detect_negative_positions(self):
+        self.assertEqual(find_first_invalid_step(Room(2, 2), "lf"), 1)
+
+    def test_should_accept_an_empty_route(self):
+        self.assertIsNone(find_first_invalid_step(Room(2, 2), ""))
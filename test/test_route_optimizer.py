@@ -0,0 +1,66 @@
+import random
+import time
+from unittest import TestCase
+
+from src.cleaning_robot import CleaningRobot, CleaningRobotError
+from src.coverage_planner import plan_coverage
+from src.room import Room
+from src.route_optimizer import optimize_route, estimate_time
+
+
+class TestRouteOptimizer(TestCase):
+
+    def test_should_cancel_opposite_rotations(self):
+        self.assertEqual(optimize_route("flrf").commands, "ff")
+
+    def test_should_replace_three_rotations_with_the_opposite_one(self):
+        self.assertEqual(optimize_route("rrrf").commands, "lf")
+
+    def test_should_drop_full_turns(self):
+        self.assertEqual(optimize_route("fllllf").commands, "ff")
+
+    def test_should_keep_the_final_heading(self):
+        self.assertEqual(optimize_route("frlll").commands, "frr")
+
+    def test_should_remove_a_dead_detour(self):
+        self.assertEqual(optimize_route("ffrrfrrf").commands, "ff")
+
+    def test_should_keep_a_detour_visiting_a_new_cell(self):
+        self.assertEqual(optimize_route("frrf").commands, "frrf")
+
+    def test_should_remove_a_dead_loop(self):
+        # Around the square of cells (0,0), (0,1), (1,1), (1,0), and around it again
+        self.assertEqual(optimize_route("frfrfrf" + "rfrfrfrf").commands, "frfrfrf")
+
+    def test_should_optimize_a_route_sweeping_a_room_twice_quickly(self):
+        route = plan_coverage(Room(99, 99))
+        start = time.monotonic()
+        optimize_route(route + "rr" + route)
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_should_estimate_the_time_saved(self):
+        route = optimize_route("rrrfrl", motion_time=1)
+        self.assertEqual((route.original_time, route.time, route.time_saved), (6, 2, 4))
+
+    def test_should_estimate_the_time_of_a_route(self):
+        self.assertEqual(estimate_time("ffr", motion_time=0.5), 1.5)
+
+    def test_should_raise_an_exception_on_invalid_command(self):
+        self.assertRaises(CleaningRobotError, optimize_route, "fxf")
+
+    def test_should_visit_the_same_cells_and_end_in_the_same_state(self):
+        generator = random.Random(18)
+        for _ in range(200):
+            route = "".join(generator.choice("fffllr") for _ in range(40))
+            optimized = optimize_route(route).commands
+            self.assertLessEqual(len(optimized), len(route))
+            self.assertEqual(self.execute(optimized), self.execute(route), route)
+
+    def execute(self, route):
+        r = Room(80, 80)
+        c = CleaningRobot(r)
+        c.initialize_robot()
+        c.pos_x, c.pos_y = 40, 40
+        r.mark((40, 40), Room.VISITED)
+        c.execute_commands(route)
+        return c.robot_status(), set(r.get_positions(Room.VISITED)) - {(0, 0)}
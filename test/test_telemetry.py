@@ -0,0 +1,129 @@
+import os
+import socket
+import tempfile
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+import numpy as np
+
+from mock.ibs import IBS
+from src.cleaning_robot import CleaningRobot
+from src.command_journal import MOVED, OBSTACLE, LOW_POWER
+from src.room import Room
+from src.telemetry import RECORD, RotatingFileSink, SocketSink, TelemetryRecord, encode, telemetry_writer
+from src.telemetry_reader import decode, read_telemetry
+
+
+def make_record(x: int, command: str = "f", outcome: int = MOVED, obstacle: tuple[int, int] = (-1, -1)) -> TelemetryRecord:
+    return TelemetryRecord(1000.0 + x, x, 0, "E", command, outcome, 80, *obstacle, 0.5)
+
+
+class TestTelemetry(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "robot.telemetry")
+
+    def test_should_encode_fixed_width_records(self):
+        records = list(encode([make_record(1), make_record(2, obstacle=(3, 0))]))
+        self.assertEqual([len(record) for record in records], [RECORD.size, RECORD.size])
+        self.assertEqual(RECORD.unpack(records[1]), (1002.0, 1, 2, 0, 1, b"f", MOVED, 80, 3, 0, 0.5))
+
+    def test_should_write_the_records_in_blocks(self):
+        sink = Mock()
+        writer = telemetry_writer(sink, block_records=2)
+        for x in range(3):
+            writer.send(make_record(x))
+        self.assertEqual([len(c.args[0]) for c in sink.write.call_args_list], [2 * RECORD.size])
+
+        writer.close()
+        self.assertEqual(sink.write.call_count, 2)
+        sink.flush.assert_called_once()
+
+    def test_should_rotate_the_file_at_record_boundaries(self):
+        sink = RotatingFileSink(self.path, max_bytes=3 * RECORD.size, backup_count=2)
+        writer = telemetry_writer(sink, block_records=2)
+        for x in range(10):
+            writer.send(make_record(x))
+        writer.close()
+        sink.close()
+
+        self.assertEqual(sink.paths(), [self.path + ".2", self.path + ".1", self.path])
+        self.assertTrue(all(os.path.getsize(path) % RECORD.size == 0 for path in sink.paths()))
+        self.assertEqual(read_telemetry(sink.paths())["x"].tolist(), [4, 5, 6, 7, 8, 9])
+
+    def test_should_stream_the_records_to_a_socket(self):
+        sender, receiver = socket.socketpair()
+        self.addCleanup(receiver.close)
+        writer = telemetry_writer(SocketSink(sender))
+        writer.send(make_record(1))
+        writer.send(make_record(2, outcome=OBSTACLE, obstacle=(3, 0)))
+        writer.close()
+        sender.close()
+
+        data = b"".join(iter(lambda: receiver.recv(4096), b""))
+        log = decode(data)
+        self.assertEqual(log["sequence"].tolist(), [0, 1])
+        self.assertEqual(log["outcome"].tolist(), [MOVED, OBSTACLE])
+        self.assertEqual((log["obstacle_x"][1], log["obstacle_y"][1]), (3, 0))
+
+    def test_should_keep_streaming_after_a_malformed_record(self):
+        sink = Mock()
+        writer = telemetry_writer(sink)
+        writer.send(make_record(1, command="ff", outcome=LOW_POWER))
+        with self.assertLogs("src.telemetry", "WARNING") as logs:
+            writer.send(make_record(2)._replace(charge_left=1000))
+        writer.send(make_record(3))
+        writer.close()
+
+        self.assertIn("record 1 dropped", logs.output[0])
+
+        log = decode(b"".join(bytes(c.args[0]) for c in sink.write.call_args_list))
+        self.assertEqual(log["command"].tolist(), [b"?", b"f"])
+        self.assertEqual(log["sequence"].tolist(), [0, 2])
+
+    @patch.object(IBS, "get_charge_left")
+    def test_should_record_a_malformed_command_at_low_power(self, mock_ibs: Mock):
+        sink = Mock()
+        c = CleaningRobot(Room(3, 3))
+        c.initialize_robot()
+        c.telemetry = telemetry_writer(sink)
+        mock_ibs.return_value = 5
+        self.assertEqual(c.execute_command("fx"), "!(0,0,N)")
+        mock_ibs.return_value = 80
+        c.execute_command("f")
+        c.telemetry.close()
+
+        log = decode(b"".join(bytes(call.args[0]) for call in sink.write.call_args_list))
+        self.assertEqual(log["command"].tolist(), [b"?", b"f"])
+        self.assertEqual(log["outcome"].tolist(), [LOW_POWER, MOVED])
+
+    def test_should_not_hide_a_wrong_object_sent_as_a_record(self):
+        writer = telemetry_writer(Mock())
+        self.assertRaises(AttributeError, writer.send, "not a record")
+
+    def test_should_ignore_a_partial_record(self):
+        data = b"".join(encode([make_record(1), make_record(2)]))
+        self.assertEqual(len(decode(data[:-1])), 1)
+
+    @patch.object(IBS, "get_charge_left")
+    def test_should_read_the_steps_of_a_robot_into_arrays(self, mock_ibs: Mock):
+        mock_ibs.return_value = 80
+        sink = RotatingFileSink(self.path)
+        c = CleaningRobot(Room(3, 3))
+        c.initialize_robot()
+        c.telemetry = telemetry_writer(sink)
+        c.execute_commands("frff")
+        c.execute_command("l")
+        c.telemetry.close()
+        sink.close()
+
+        log = read_telemetry(self.path)
+        self.assertEqual(log.dtype.names[:4], ("time", "sequence", "x", "y"))
+        self.assertEqual(log["command"].tobytes(), b"frffl")
+        self.assertEqual(log["x"].tolist(), [0, 0, 1, 2, 2])
+        self.assertEqual(log["y"].tolist(), [1, 1, 1, 1, 1])
+        self.assertEqual(log["heading"].tolist(), [0, 1, 1, 1, 0])
+        self.assertTrue(np.all(log["charge_left"] == 80))
+        self.assertTrue(np.all(log["duration"] >= 0))
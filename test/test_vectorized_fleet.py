@@ -0,0 +1,83 @@
+import random
+from unittest import TestCase
+
+import numpy as np
+
+from mock import GPIO
+from src.cleaning_robot import CleaningRobot, CleaningRobotError
+from src.room import Room
+from src.vectorized_fleet import VectorizedFleet
+
+
+def execute_on_robot(room: Room, obstacles: set, route: str, charge: int, drain: int) -> list[tuple[int, str]]:
+    # Reference execution on CleaningRobot: the outcome and status after each command
+    steps = []
+    with GPIO.use_context():
+        robot = CleaningRobot(room)
+        robot.initialize_robot()
+        robot.ibs.charge_left = charge
+        for command in route:
+            dx, dy = robot.STEPS[robot.heading]
+            GPIO.set_input(robot.INFRARED_PIN, (robot.pos_x + dx, robot.pos_y + dy) in obstacles)
+            try:
+                result = robot.execute_command(command)
+            except CleaningRobotError:
+                outcome = VectorizedFleet.ERROR
+            else:
+                if result is None:
+                    outcome = VectorizedFleet.MOVED
+                    robot.ibs.charge_left -= drain
+                elif result.startswith("!"):
+                    outcome = VectorizedFleet.LOW_POWER
+                else:
+                    outcome = VectorizedFleet.OBSTACLE
+            steps.append((outcome, robot.robot_status()))
+    return steps
+
+
+class TestVectorizedFleet(TestCase):
+
+    def test_should_move_forward_and_rotate(self):
+        f = VectorizedFleet(Room(2, 2), 3)
+        outcome = f.step("flr")
+        self.assertEqual(outcome.tolist(), [f.MOVED] * 3)
+        self.assertEqual([f.robot_status(i) for i in range(3)], ["(0,1,N)", "(0,0,W)", "(0,0,E)"])
+
+    def test_should_report_obstacles_and_invalid_commands(self):
+        r = Room(2, 2)
+        r.mark((0, 1), Room.OBSTACLE)
+        f = VectorizedFleet(r, 3, start=(0, 0, 'N'))
+        f.pos_x[2] = 2
+        f.heading[2] = 1
+        self.assertEqual(f.step("fUf").tolist(), [f.OBSTACLE, f.ERROR, f.ERROR])
+        self.assertEqual(f.robot_status(0), "(0,0,N)")
+
+    def test_should_stop_robots_with_low_battery(self):
+        f = VectorizedFleet(Room(2, 2), 2, charge=11, drain_per_move=1)
+        self.assertEqual(f.run(["ff", "\0f"]).tolist(), [[f.MOVED, f.IDLE], [f.LOW_POWER, f.MOVED]])
+        self.assertEqual(f.low_power.tolist(), [True, False])
+
+    def test_should_raise_error_when_the_commands_do_not_match_the_robots(self):
+        f = VectorizedFleet(Room(2, 2), 2)
+        self.assertRaises(CleaningRobotError, f.step, "f")
+
+    def test_should_match_cleaning_robot_on_random_routes(self):
+        rng = random.Random(42)
+        for _ in range(20):
+            room_size = (rng.randint(0, 4), rng.randint(0, 4))
+            obstacles = {(rng.randint(0, room_size[0]), rng.randint(0, room_size[1])) for _ in range(3)} - {(0, 0)}
+            routes = ["".join(rng.choice("fffllrrx") for _ in range(rng.randint(0, 30))) for _ in range(5)]
+
+            grid = np.zeros((room_size[1] + 1, room_size[0] + 1), dtype=bool)
+            for x, y in obstacles:
+                grid[y, x] = True
+            f = VectorizedFleet(Room(*room_size), len(routes), charge=25, drain_per_move=1, obstacles=grid)
+            actual = [[] for _ in routes]
+            for step in range(max(len(route) for route in routes)):
+                outcome = f.step("".join(route[step] if step < len(route) else f.IDLE_COMMAND for route in routes))
+                for i, route in enumerate(routes):
+                    if step < len(route):
+                        actual[i].append((outcome[i], f.robot_status(i)))
+
+            for i, route in enumerate(routes):
+                self.assertEqual(actual[i], execute_on_robot(Room(*room_size), obstacles, route, 25, 1))